@@ -0,0 +1,57 @@
+import json
+import sys
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from utils.eld_audit import DEFAULT_CHUNK_ROWS, audit_eld_csv
+
+
+class Command(BaseCommand):
+    help = (
+        "Audit an ELD duty-status CSV export (driver_id, status, start, end) against the 11-hour, 14-hour, "
+        "30-minute break and 70-hour/8-day rules and write one NDJSON report line per driver."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("csv_path", help="ELD CSV export, or - to read from stdin.")
+        parser.add_argument("--output", default="-", help="Report file (default: stdout).")
+        parser.add_argument(
+            "--chunk-rows",
+            type=int,
+            default=DEFAULT_CHUNK_ROWS,
+            help="CSV rows parsed into columns per chunk.",
+        )
+        parser.add_argument(
+            "--violations-only",
+            action="store_true",
+            help="Only report drivers with at least one violation.",
+        )
+
+    def handle(self, *args, **options):
+        started = time.perf_counter()
+        source = sys.stdin if options["csv_path"] == "-" else open(options["csv_path"], newline="", encoding="utf-8")
+        output = self.stdout if options["output"] == "-" else open(options["output"], "w", encoding="utf-8")
+        drivers = flagged = records = 0
+        try:
+            reports, rejected = audit_eld_csv(source, chunk_rows=options["chunk_rows"])
+            for report in reports:
+                drivers += 1
+                records += report["records"]
+                if report["violations"]:
+                    flagged += 1
+                elif options["violations_only"]:
+                    continue
+                output.write(json.dumps(report) + "\n")
+        except ValueError as exc:
+            raise CommandError(str(exc)) from exc
+        finally:
+            if source is not sys.stdin:
+                source.close()
+            if output is not self.stdout:
+                output.close()
+
+        self.stderr.write(
+            f"Audited {records} rows for {drivers} driver(s) in {time.perf_counter() - started:.1f}s: "
+            f"{flagged} with violations, {rejected} row(s) rejected"
+        )
@@ -0,0 +1,31 @@
+# Generated by Django 5.2.11 on 2026-10-18 22:21
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+        ('trips', '0002_tripplan'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DailyLog',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('day', models.PositiveIntegerField()),
+                ('events', models.JSONField(default=list)),
+                ('remarks', models.JSONField(default=list)),
+                ('content_hash', models.CharField(max_length=64)),
+                ('trip', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='daily_logs', to='trips.tripplan')),
+            ],
+            options={
+                'ordering': ['trip', 'day'],
+                'constraints': [models.UniqueConstraint(fields=('trip', 'day'), name='logs_dailylog_trip_day_uniq')],
+            },
+        ),
+    ]
@@ -1,3 +1,16 @@
 from django.db import models
 
-# Create your models here.
+
+class DailyLog(models.Model):
+    trip = models.ForeignKey("trips.TripPlan", on_delete=models.CASCADE, related_name="daily_logs")
+    day = models.PositiveIntegerField()
+    events = models.JSONField(default=list)
+    remarks = models.JSONField(default=list)
+    content_hash = models.CharField(max_length=64)
+
+    class Meta:
+        ordering = ["trip", "day"]
+        constraints = [models.UniqueConstraint(fields=["trip", "day"], name="logs_dailylog_trip_day_uniq")]
+
+    def __str__(self):
+        return f"DailyLog {self.trip_id} day {self.day}"
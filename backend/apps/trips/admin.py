@@ -1,3 +1,41 @@
 from django.contrib import admin
 
-# Register your models here.
+from .models import PlanJob, TripCorridorCell, TripDayRollup, TripLaneRollup, TripPingBatch, TripPlan
+
+
+@admin.register(PlanJob)
+class PlanJobAdmin(admin.ModelAdmin):
+    list_display = ("id", "status", "attempts", "worker", "created_at", "finished_at", "expires_at")
+    list_filter = ("status",)
+    readonly_fields = ("created_at", "started_at", "finished_at")
+
+
+@admin.register(TripPlan)
+class TripPlanAdmin(admin.ModelAdmin):
+    list_display = ("id", "driver_id", "distance_miles", "total_days", "created_at")
+    search_fields = ("driver_id",)
+    readonly_fields = ("content_hash", "geometry_offset", "created_at")
+
+
+@admin.register(TripPingBatch)
+class TripPingBatchAdmin(admin.ModelAdmin):
+    list_display = ("id", "trip", "count", "first_ts", "last_ts", "created_at")
+    exclude = ("ts", "lng", "lat", "route_mile", "offset_miles")
+    readonly_fields = ("created_at",)
+
+
+@admin.register(TripCorridorCell)
+class TripCorridorCellAdmin(admin.ModelAdmin):
+    list_display = ("id", "cell", "trip")
+    search_fields = ("cell",)
+
+
+@admin.register(TripDayRollup)
+class TripDayRollupAdmin(admin.ModelAdmin):
+    list_display = ("day", "plans", "total_miles", "driving_hours", "noncompliant_plans")
+
+
+@admin.register(TripLaneRollup)
+class TripLaneRollupAdmin(admin.ModelAdmin):
+    list_display = ("day", "lane", "plans", "total_miles", "driving_hours", "noncompliant_plans")
+    search_fields = ("lane",)
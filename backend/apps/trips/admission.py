@@ -0,0 +1,108 @@
+import threading
+import time
+from collections import deque
+
+from django.conf import settings
+from rest_framework.exceptions import APIException, Throttled
+
+
+class PlanQueueTimeout(APIException):
+    status_code = 503
+    default_detail = "Trip planning is saturated, retry shortly."
+    default_code = "plan_queue_timeout"
+
+    def __init__(self, wait, detail=None):
+        # DRF's exception handler turns `wait` into a Retry-After header.
+        self.wait = wait
+        super().__init__(detail)
+
+
+class AdmissionGate:
+    # Bounded-concurrency gate with a short FIFO wait queue. Requests beyond
+    # max_queue are shed immediately (429); queued requests that cannot start
+    # within queue_timeout seconds are shed with 503. A released slot is
+    # handed straight to the oldest waiter, so later arrivals cannot overtake
+    # it. Limits are per process.
+
+    def __init__(self, max_concurrent, max_queue, queue_timeout, retry_after):
+        self.max_concurrent = max(1, int(max_concurrent))
+        self.max_queue = max(0, int(max_queue))
+        self.queue_timeout = max(0.0, float(queue_timeout))
+        self.retry_after = max(1, int(retry_after))
+        self._lock = threading.Lock()
+        self._condition = threading.Condition(self._lock)
+        self._queue = deque()
+        self.active = 0
+        self.waiting = 0
+        self.peak_waiting = 0
+        self.admitted_total = 0
+        self.rejected_queue_full_total = 0
+        self.rejected_timeout_total = 0
+
+    def acquire(self):
+        with self._condition:
+            if self.active < self.max_concurrent and self.waiting == 0:
+                self.active += 1
+                self.admitted_total += 1
+                return
+
+            if self.waiting >= self.max_queue:
+                self.rejected_queue_full_total += 1
+                raise Throttled(wait=self.retry_after, detail="Trip planning queue is full.")
+
+            # Each waiter sleeps on its own condition over the gate's lock;
+            # release() marks it admitted with the slot already counted.
+            ticket = {"wake": threading.Condition(self._lock), "admitted": False}
+            self._queue.append(ticket)
+            self.waiting += 1
+            self.peak_waiting = max(self.peak_waiting, self.waiting)
+            deadline = time.monotonic() + self.queue_timeout
+            while not ticket["admitted"]:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    self._queue.remove(ticket)
+                    self.waiting -= 1
+                    self.rejected_timeout_total += 1
+                    raise PlanQueueTimeout(wait=self.retry_after)
+                ticket["wake"].wait(remaining)
+            self.admitted_total += 1
+
+    def release(self):
+        with self._condition:
+            if self._queue:
+                ticket = self._queue.popleft()
+                self.waiting -= 1
+                ticket["admitted"] = True
+                ticket["wake"].notify()
+            else:
+                self.active -= 1
+
+    def snapshot(self):
+        with self._condition:
+            return {
+                "active": self.active,
+                "queue_depth": self.waiting,
+                "peak_queue_depth": self.peak_waiting,
+                "max_concurrent": self.max_concurrent,
+                "max_queue": self.max_queue,
+                "admitted_total": self.admitted_total,
+                "rejected_queue_full_total": self.rejected_queue_full_total,
+                "rejected_timeout_total": self.rejected_timeout_total,
+            }
+
+
+_plan_gate = None
+_plan_gate_lock = threading.Lock()
+
+
+def plan_admission_gate():
+    global _plan_gate
+    with _plan_gate_lock:
+        if _plan_gate is None:
+            _plan_gate = AdmissionGate(
+                max_concurrent=settings.PLAN_MAX_CONCURRENT,
+                max_queue=settings.PLAN_MAX_QUEUE,
+                queue_timeout=settings.PLAN_QUEUE_TIMEOUT_SECONDS,
+                retry_after=settings.PLAN_RETRY_AFTER_SECONDS,
+            )
+        return _plan_gate
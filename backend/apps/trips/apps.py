@@ -1,6 +1,20 @@
 from django.apps import AppConfig
+from django.conf import settings
+from django.core.signals import setting_changed
+
+from utils.hos_engine import timeline_memo
+
+
+def _resize_timeline_memo(setting, value, **kwargs):
+    if setting == "HOS_TIMELINE_MEMO_SIZE":
+        timeline_memo.resize(value)
 
 
 class TripsConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'apps.trips'
+
+    def ready(self):
+        # The HOS engine also runs outside Django, so its memo is sized here.
+        timeline_memo.resize(settings.HOS_TIMELINE_MEMO_SIZE)
+        setting_changed.connect(_resize_timeline_memo)
@@ -0,0 +1,62 @@
+from django.conf import settings
+
+from apps.trips.models import TripCorridorCell, TripPlan
+from apps.trips.pings import segment_index_for
+from utils.geohash import polyline_cells, radius_cells
+
+# Stored plans are indexed by the geohash cells their polyline passes through.
+# A "near this point" query looks up trips in the cells around the point (the
+# corridor radius lives in the query, not the index), then measures the exact
+# distance to each candidate's polyline.
+CORRIDOR_CELL_BATCH_SIZE = 2000
+
+
+def corridor_cell_rows(plan, polyline):
+    return [
+        TripCorridorCell(trip=plan, cell=cell)
+        for cell in sorted(polyline_cells(polyline, settings.TRIP_CORRIDOR_GEOHASH_PRECISION))
+    ]
+
+
+def index_trip_corridor(plan, polyline):
+    TripCorridorCell.objects.bulk_create(
+        corridor_cell_rows(plan, polyline), batch_size=CORRIDOR_CELL_BATCH_SIZE, ignore_conflicts=True
+    )
+
+
+def trips_near(lng, lat, radius_miles, created_after=None, created_before=None, limit=None):
+    cells = radius_cells(lng, lat, radius_miles, settings.TRIP_CORRIDOR_GEOHASH_PRECISION)
+    candidate_ids = TripCorridorCell.objects.filter(cell__in=cells).values("trip_id").distinct()
+    plans = TripPlan.objects.filter(pk__in=candidate_ids, geometry_offset__isnull=False)
+    if created_after is not None:
+        plans = plans.filter(created_at__gte=created_after)
+    if created_before is not None:
+        plans = plans.filter(created_at__lt=created_before)
+
+    candidates = 0
+    matches = []
+    for plan in plans.only("id", "request", "distance_miles", "geometry_offset", "total_days", "created_at"):
+        candidates += 1
+        projected = segment_index_for(plan).project(lng, lat, radius_miles)
+        if projected is None:
+            continue
+        route_mile, offset_miles = projected
+        matches.append(
+            {
+                "trip_id": str(plan.pk),
+                "offset_miles": round(offset_miles, 3),
+                "route_mile": round(route_mile, 2),
+                "distance_miles": plan.distance_miles,
+                "total_days": plan.total_days,
+                "created_at": plan.created_at,
+                "pickup_location": (plan.request or {}).get("pickup_location"),
+                "dropoff_location": (plan.request or {}).get("dropoff_location"),
+            }
+        )
+    matches.sort(key=lambda match: (match["offset_miles"], match["trip_id"]))
+    return {
+        "cells": len(cells),
+        "candidates": candidates,
+        "count": len(matches),
+        "trips": matches[:limit] if limit else matches,
+    }
@@ -0,0 +1,158 @@
+import csv
+from datetime import datetime, time, timedelta
+from itertools import islice
+
+from django.utils import timezone
+from rest_framework.utils.encoders import JSONEncoder
+
+from apps.logs.models import DailyLog
+from apps.trips.rollups import trip_lane
+
+# Flat exports of stored plans for billing and compliance systems: one row
+# per trip, per planned stop, or per duty-status event. Plans are read with
+# server-side iterators in created_at order (the created_at and driver_id +
+# created_at indexes), and rows are encoded in small blocks, so memory stays
+# flat however many rows an export has.
+EXPORT_FORMATS = {"csv": "text/csv", "ndjson": "application/x-ndjson"}
+EXPORT_CHUNK_SIZE = 500
+EVENT_EXPORT_PLAN_BLOCK = 50
+EXPORT_COLUMNS = {
+    "trips": (
+        "trip_id",
+        "created_at",
+        "driver_id",
+        "lane",
+        "distance_miles",
+        "total_days",
+        "driving_hours",
+        "hos_compliant",
+        "cycle_remaining_hours_after",
+    ),
+    "stops": (
+        "trip_id",
+        "driver_id",
+        "seq",
+        "type",
+        "mile",
+        "lng",
+        "lat",
+        "label",
+        "reason",
+        "duration_minutes",
+        "eld_required",
+        "combined_break",
+    ),
+    "events": ("trip_id", "driver_id", "day", "seq", "status", "start_minute", "end_minute", "duration_minutes"),
+}
+
+
+def _day_start(day):
+    return timezone.make_aware(datetime.combine(day, time.min), timezone.get_current_timezone())
+
+
+def export_plans(plans, from_date=None, to_date=None, driver_id=None):
+    # Date bounds are inclusive local days, applied as a created_at range so
+    # the index is used.
+    if from_date is not None:
+        plans = plans.filter(created_at__gte=_day_start(from_date))
+    if to_date is not None:
+        plans = plans.filter(created_at__lt=_day_start(to_date + timedelta(days=1)))
+    if driver_id:
+        plans = plans.filter(driver_id=driver_id)
+    return plans.order_by("created_at", "id")
+
+
+def _trip_rows(plans):
+    fields = ("id", "created_at", "driver_id", "request", "distance_miles", "total_days", "summary")
+    for plan in plans.only(*fields).iterator(chunk_size=EXPORT_CHUNK_SIZE):
+        summary = plan.summary or {}
+        yield (
+            str(plan.pk),
+            plan.created_at.isoformat(),
+            plan.driver_id,
+            trip_lane(plan.request or {}),
+            plan.distance_miles,
+            plan.total_days,
+            summary.get("driving_hours"),
+            summary.get("hos_compliant"),
+            summary.get("cycle_remaining_hours_after"),
+        )
+
+
+def _stop_rows(plans):
+    columns = EXPORT_COLUMNS["stops"][3:]
+    for trip_id, driver_id, stops in plans.values_list("id", "driver_id", "stops").iterator(
+        chunk_size=EXPORT_CHUNK_SIZE
+    ):
+        for seq, stop in enumerate(stops or [], start=1):
+            yield (str(trip_id), driver_id, seq, *(stop.get(name) for name in columns))
+
+
+def _event_rows(plans):
+    # Plans are read in blocks and each block's days are fetched in one query
+    # on the (trip, day) index, then emitted in plan order.
+    rows = plans.values_list("id", "driver_id").iterator(chunk_size=EXPORT_CHUNK_SIZE)
+    while True:
+        block = list(islice(rows, EVENT_EXPORT_PLAN_BLOCK))
+        if not block:
+            return
+        days = {}
+        for trip_id, day, events in (
+            DailyLog.objects.filter(trip_id__in=[trip_id for trip_id, _ in block])
+            .order_by("trip", "day")
+            .values_list("trip_id", "day", "events")
+        ):
+            days.setdefault(trip_id, []).append((day, events))
+        for trip_id, driver_id in block:
+            for day, events in days.get(trip_id, []):
+                for seq, event in enumerate(events or [], start=1):
+                    start, end = event.get("start_minute"), event.get("end_minute")
+                    yield (str(trip_id), driver_id, day, seq, event.get("status"), start, end, end - start)
+
+
+EXPORT_ROWS = {"trips": _trip_rows, "stops": _stop_rows, "events": _event_rows}
+
+
+class _LineBuffer:
+    def __init__(self):
+        self.parts = []
+
+    def write(self, text):
+        self.parts.append(text)
+
+    def drain(self):
+        text = "".join(self.parts)
+        self.parts = []
+        return text
+
+
+def _iter_csv(columns, rows):
+    buffer = _LineBuffer()
+    writer = csv.writer(buffer, lineterminator="\n")
+    writer.writerow(columns)
+    for count, row in enumerate(rows, start=1):
+        writer.writerow(row)
+        if count % EXPORT_CHUNK_SIZE == 0:
+            yield buffer.drain()
+    yield buffer.drain()
+
+
+def _iter_ndjson(columns, rows):
+    encoder = JSONEncoder(separators=(",", ":"))
+    lines = []
+    for row in rows:
+        lines.append(encoder.encode(dict(zip(columns, row))))
+        if len(lines) == EXPORT_CHUNK_SIZE:
+            yield "\n".join(lines) + "\n"
+            lines = []
+    if lines:
+        yield "\n".join(lines) + "\n"
+
+
+def iter_export(kind, export_format, plans):
+    # Text chunks of the whole export; nothing is read until iteration starts.
+    columns = EXPORT_COLUMNS[kind]
+    rows = EXPORT_ROWS[kind](plans)
+    if export_format == "csv":
+        return _iter_csv(columns, rows)
+    return _iter_ndjson(columns, rows)
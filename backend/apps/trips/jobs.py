@@ -0,0 +1,153 @@
+import json
+import logging
+import os
+import socket
+import threading
+import time
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import close_old_connections
+from django.db.models import F
+from django.utils import timezone
+from rest_framework.utils.encoders import JSONEncoder
+
+from apps.trips.models import PlanJob
+
+PURGE_INTERVAL_SECONDS = 60
+MAX_ERROR_BACKOFF_SECONDS = 60
+
+logger = logging.getLogger(__name__)
+
+
+def _plain_payload(data):
+    if hasattr(data, "dict"):
+        return data.dict()
+    return dict(data or {})
+
+
+def enqueue_plan_jobs(payloads):
+    return PlanJob.objects.bulk_create([PlanJob(payload=_plain_payload(payload)) for payload in payloads])
+
+
+def claim_next_job(worker_id):
+    # Optimistic claim: only the worker whose conditional UPDATE flips the row
+    # from queued to running owns it, which works the same on SQLite and Postgres.
+    while True:
+        job_id = (
+            PlanJob.objects.filter(status=PlanJob.Status.QUEUED)
+            .order_by("created_at")
+            .values_list("pk", flat=True)
+            .first()
+        )
+        if job_id is None:
+            return None
+
+        claimed = PlanJob.objects.filter(pk=job_id, status=PlanJob.Status.QUEUED).update(
+            status=PlanJob.Status.RUNNING,
+            worker=worker_id,
+            started_at=timezone.now(),
+            attempts=F("attempts") + 1,
+        )
+        if claimed:
+            return PlanJob.objects.get(pk=job_id)
+
+
+def run_plan_job(job):
+    # Imported here because the views module enqueues through this one.
+    from apps.trips.views import plan_trip
+
+    try:
+        result = json.loads(json.dumps(plan_trip(job.payload), cls=JSONEncoder))
+    except Exception as exc:  # noqa: BLE001 - any pipeline failure is reported on the job
+        job.status = PlanJob.Status.FAILED
+        job.error = f"{type(exc).__name__}: {exc}"
+        job.result = None
+    else:
+        job.status = PlanJob.Status.SUCCEEDED
+        job.error = ""
+        job.result = result
+
+    job.finished_at = timezone.now()
+    job.expires_at = job.finished_at + timedelta(seconds=settings.PLAN_JOB_RESULT_TTL_SECONDS)
+    job.save(update_fields=["status", "error", "result", "finished_at", "expires_at"])
+    return job
+
+
+def purge_expired_jobs():
+    # Stale running jobs lost their worker. They are requeued until they have
+    # been claimed PLAN_JOB_MAX_ATTEMPTS times, so a job that keeps crashing
+    # its worker fails instead of being retried forever.
+    now = timezone.now()
+    deleted, _ = PlanJob.objects.filter(expires_at__lte=now).delete()
+    stale = PlanJob.objects.filter(
+        status=PlanJob.Status.RUNNING,
+        started_at__lt=now - timedelta(seconds=settings.PLAN_JOB_STALE_SECONDS),
+    )
+    stale.filter(attempts__gte=settings.PLAN_JOB_MAX_ATTEMPTS).update(
+        status=PlanJob.Status.FAILED,
+        error=f"Worker lost the job {settings.PLAN_JOB_MAX_ATTEMPTS} time(s); giving up.",
+        finished_at=now,
+        expires_at=now + timedelta(seconds=settings.PLAN_JOB_RESULT_TTL_SECONDS),
+    )
+    requeued = stale.update(status=PlanJob.Status.QUEUED, worker="")
+    return deleted, requeued
+
+
+def _worker_loop(worker_id, poll_interval, stop_event, drain):
+    # Errors outside the plan itself (e.g. the database going away) are logged
+    # and retried with a growing back-off instead of ending the thread.
+    failures = 0
+    try:
+        while not stop_event.is_set():
+            try:
+                close_old_connections()
+                job = claim_next_job(worker_id)
+                if job is not None:
+                    run_plan_job(job)
+            except Exception:  # noqa: BLE001 - the worker must outlive transient errors
+                failures += 1
+                logger.exception("Plan worker %s failed (%d in a row)", worker_id, failures)
+                stop_event.wait(min(MAX_ERROR_BACKOFF_SECONDS, max(poll_interval, 1.0) * 2 ** min(failures - 1, 6)))
+                continue
+            failures = 0
+            if job is not None:
+                continue
+            if drain:
+                return
+            stop_event.wait(poll_interval)
+    finally:
+        close_old_connections()
+
+
+def run_worker_pool(concurrency=None, poll_interval=None, drain=False, stop_event=None):
+    concurrency = max(1, int(concurrency or settings.PLAN_JOB_WORKERS))
+    poll_interval = float(poll_interval if poll_interval is not None else settings.PLAN_JOB_POLL_SECONDS)
+    stop_event = stop_event or threading.Event()
+    prefix = f"{socket.gethostname()}:{os.getpid()}"
+
+    purge_expired_jobs()
+    threads = [
+        threading.Thread(
+            target=_worker_loop,
+            args=(f"{prefix}:{index}", poll_interval, stop_event, drain),
+            name=f"plan-worker-{index}",
+            daemon=True,
+        )
+        for index in range(concurrency)
+    ]
+    for thread in threads:
+        thread.start()
+
+    last_purge = time.monotonic()
+    try:
+        while any(thread.is_alive() for thread in threads):
+            if stop_event.wait(poll_interval):
+                break
+            if time.monotonic() - last_purge >= PURGE_INTERVAL_SECONDS:
+                purge_expired_jobs()
+                last_purge = time.monotonic()
+    finally:
+        stop_event.set()
+        for thread in threads:
+            thread.join()
@@ -0,0 +1,72 @@
+import os
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.utils import timezone
+
+from apps.trips.models import TripPlan
+from apps.trips.pings import clear_segment_indexes
+from utils.route_geometry import GeometryStore, open_geometry_store
+
+
+class Command(BaseCommand):
+    help = (
+        "Rewrite the route geometry store with only the records stored plans still point to, optionally deleting "
+        "old plans first. Run it with the API and plan workers stopped: they map the file and cache by offset."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--delete-plans-older-than",
+            type=int,
+            metavar="DAYS",
+            help="Delete stored plans (with their logs, pings and corridor cells) created more than DAYS days ago.",
+        )
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=1000,
+            help="Plans read and offsets updated per batch.",
+        )
+
+    def handle(self, *args, **options):
+        days = options["delete_plans_older_than"]
+        if days is not None:
+            if days < 0:
+                raise CommandError("--delete-plans-older-than must not be negative.")
+            deleted, _ = TripPlan.objects.filter(created_at__lt=timezone.now() - timedelta(days=days)).delete()
+            self.stdout.write(f"Deleted {deleted} row(s) for plans older than {days} day(s)")
+
+        path = settings.ROUTE_GEOMETRY_STORE_PATH
+        if not os.path.exists(path):
+            self.stdout.write("No route geometry store to compact")
+            return
+        batch_size = max(1, options["batch_size"])
+        before = os.path.getsize(path)
+        source = open_geometry_store(path)
+        compacted_path = f"{path}.compact"
+        if os.path.exists(compacted_path):
+            os.remove(compacted_path)
+        target = GeometryStore(compacted_path)
+
+        # Records are copied in file order; the offset updates and the file
+        # swap happen in one transaction, so a failure leaves both untouched.
+        plans = TripPlan.objects.filter(geometry_offset__isnull=False).order_by("geometry_offset")
+        moved = []
+        for plan in plans.only("id", "geometry_offset").iterator(chunk_size=batch_size):
+            polyline = source.read(plan.geometry_offset)
+            plan.geometry_offset = target.append(polyline, typecode=polyline.coords.format)
+            moved.append(plan)
+
+        with transaction.atomic():
+            TripPlan.objects.bulk_update(moved, ["geometry_offset"], batch_size=batch_size)
+            if moved:
+                os.replace(compacted_path, path)
+            else:
+                os.remove(path)
+        source.reset()
+        clear_segment_indexes()
+        after = os.path.getsize(path) if moved else 0
+        self.stdout.write(f"Kept {len(moved)} route geometry record(s); {before} -> {after} bytes")
@@ -0,0 +1,41 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.utils.dateparse import parse_date
+
+from apps.trips.exports import EXPORT_COLUMNS, EXPORT_FORMATS, export_plans, iter_export
+from apps.trips.models import TripPlan
+
+
+class Command(BaseCommand):
+    help = "Stream stored trips, stops or duty-status events as CSV or NDJSON."
+
+    def add_arguments(self, parser):
+        parser.add_argument("kind", choices=sorted(EXPORT_COLUMNS))
+        parser.add_argument("--format", dest="export_format", choices=sorted(EXPORT_FORMATS), default="csv")
+        parser.add_argument("--from", dest="from_date", help="First plan day (YYYY-MM-DD), inclusive.")
+        parser.add_argument("--to", dest="to_date", help="Last plan day (YYYY-MM-DD), inclusive.")
+        parser.add_argument("--driver", help="Only plans for this driver_id.")
+        parser.add_argument("--output", help="File to write (default: stdout).")
+
+    def _date(self, value, name):
+        if not value:
+            return None
+        day = parse_date(value)
+        if day is None:
+            raise CommandError(f"{name} must be a date (YYYY-MM-DD).")
+        return day
+
+    def handle(self, *args, **options):
+        plans = export_plans(
+            TripPlan.objects.all(),
+            self._date(options["from_date"], "--from"),
+            self._date(options["to_date"], "--to"),
+            options["driver"],
+        )
+        chunks = iter_export(options["kind"], options["export_format"], plans)
+        if not options["output"]:
+            for chunk in chunks:
+                self.stdout.write(chunk, ending="")
+            return
+        with open(options["output"], "w", encoding="utf-8", newline="") as handle:
+            for chunk in chunks:
+                handle.write(chunk)
@@ -0,0 +1,49 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from apps.trips.corridors import corridor_cell_rows
+from apps.trips.models import TripCorridorCell, TripPlan
+from utils.route_geometry import open_geometry_store
+
+
+class Command(BaseCommand):
+    help = "Build the geohash corridor index for stored trip plans (e.g. after changing its precision)."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--rebuild",
+            action="store_true",
+            help="Drop existing cells and reindex every plan instead of only unindexed ones.",
+        )
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=200,
+            help="Plans read and indexed per transaction.",
+        )
+
+    def handle(self, *args, **options):
+        plans = TripPlan.objects.filter(geometry_offset__isnull=False)
+        if options["rebuild"]:
+            TripCorridorCell.objects.all().delete()
+        else:
+            plans = plans.exclude(pk__in=TripCorridorCell.objects.values("trip_id"))
+
+        store = open_geometry_store(settings.ROUTE_GEOMETRY_STORE_PATH)
+        batch_size = max(1, options["batch_size"])
+        indexed = cells = 0
+        rows = []
+        for idx, plan in enumerate(plans.only("id", "geometry_offset").iterator(chunk_size=batch_size), start=1):
+            rows.extend(corridor_cell_rows(plan, store.read(plan.geometry_offset)))
+            if idx % batch_size == 0:
+                cells += self._flush(rows)
+                rows = []
+            indexed = idx
+        cells += self._flush(rows)
+        self.stdout.write(f"Indexed {indexed} plan(s) into {cells} corridor cell(s)")
+
+    def _flush(self, rows):
+        with transaction.atomic():
+            TripCorridorCell.objects.bulk_create(rows, batch_size=2000, ignore_conflicts=True)
+        return len(rows)
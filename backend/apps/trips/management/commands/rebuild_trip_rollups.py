@@ -0,0 +1,74 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.utils.dateparse import parse_date
+
+from apps.trips.models import TripDayRollup, TripLaneRollup, TripPlan
+from apps.trips.rollups import add_totals, plan_rollup
+
+
+class Command(BaseCommand):
+    help = "Rebuild the per-day and per-lane trip rollups from stored plans."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--since",
+            help="Only rebuild days from this date (YYYY-MM-DD) onward.",
+        )
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=1000,
+            help="Plans fetched per query and rollup rows written per transaction.",
+        )
+
+    def handle(self, *args, **options):
+        since = None
+        if options["since"]:
+            since = parse_date(options["since"])
+            if since is None:
+                raise CommandError("--since must be a date (YYYY-MM-DD).")
+        batch_size = max(1, options["batch_size"])
+
+        plans = TripPlan.objects.only("id", "request", "distance_miles", "summary", "total_days", "created_at")
+        if since is not None:
+            plans = plans.filter(created_at__date__gte=since)
+
+        # Plans come in creation order, so a day is complete once a later one
+        # shows up and can be written while the rest is still being read.
+        pending = {}
+        seen = set()
+        days = lanes = 0
+        for plan in plans.order_by("created_at").iterator(chunk_size=batch_size):
+            day, lane, totals = plan_rollup(plan)
+            if day not in pending and sum(len(entry[1]) for entry in pending.values()) >= batch_size:
+                written = self._flush(pending)
+                days, lanes = days + written[0], lanes + written[1]
+                pending = {}
+            seen.add(day)
+            entry = pending.setdefault(day, ({}, {}))
+            add_totals(entry[0], totals)
+            add_totals(entry[1].setdefault(lane, {}), totals)
+        written = self._flush(pending)
+        days, lanes = days + written[0], lanes + written[1]
+
+        # Days whose plans are all gone.
+        for model in (TripDayRollup, TripLaneRollup):
+            stale = model.objects.exclude(day__in=seen)
+            if since is not None:
+                stale = stale.filter(day__gte=since)
+            stale.delete()
+        self.stdout.write(f"Rebuilt {days} day rollup(s) and {lanes} lane rollup(s)")
+
+    def _flush(self, pending):
+        day_rows = [TripDayRollup(day=day, **totals) for day, (totals, _) in pending.items()]
+        lane_rows = [
+            TripLaneRollup(day=day, lane=lane, **totals)
+            for day, (_, by_lane) in pending.items()
+            for lane, totals in by_lane.items()
+        ]
+        with transaction.atomic():
+            TripDayRollup.objects.filter(day__in=list(pending)).delete()
+            TripLaneRollup.objects.filter(day__in=list(pending)).delete()
+            TripDayRollup.objects.bulk_create(day_rows)
+            TripLaneRollup.objects.bulk_create(lane_rows, batch_size=500)
+        return len(day_rows), len(lane_rows)
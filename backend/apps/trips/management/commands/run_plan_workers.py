@@ -0,0 +1,38 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from apps.trips.jobs import run_worker_pool
+
+
+class Command(BaseCommand):
+    help = "Run the local worker pool that executes queued async trip plan jobs."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--concurrency",
+            type=int,
+            default=settings.PLAN_JOB_WORKERS,
+            help="Number of worker threads (default: PLAN_JOB_WORKERS).",
+        )
+        parser.add_argument(
+            "--poll-interval",
+            type=float,
+            default=settings.PLAN_JOB_POLL_SECONDS,
+            help="Seconds an idle worker waits before polling the queue again.",
+        )
+        parser.add_argument(
+            "--drain",
+            action="store_true",
+            help="Exit once the queue is empty instead of polling forever.",
+        )
+
+    def handle(self, *args, **options):
+        self.stdout.write(f"Starting {options['concurrency']} plan worker(s)")
+        try:
+            run_worker_pool(
+                concurrency=options["concurrency"],
+                poll_interval=options["poll_interval"],
+                drain=options["drain"],
+            )
+        except KeyboardInterrupt:
+            self.stdout.write("Stopping plan workers")
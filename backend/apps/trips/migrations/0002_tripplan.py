@@ -0,0 +1,29 @@
+# Generated by Django 5.2.11 on 2026-10-18 22:21
+
+import uuid
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('trips', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TripPlan',
+            fields=[
+                ('id', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ('request', models.JSONField(default=dict)),
+                ('distance_miles', models.FloatField()),
+                ('geometry_offset', models.BigIntegerField(blank=True, null=True)),
+                ('summary', models.JSONField(default=dict)),
+                ('stops', models.JSONField(default=list)),
+                ('timeline_stops', models.JSONField(default=list)),
+                ('total_days', models.PositiveIntegerField(default=0)),
+                ('content_hash', models.CharField(max_length=64)),
+                ('created_at', models.DateTimeField(auto_now_add=True, db_index=True)),
+            ],
+        ),
+    ]
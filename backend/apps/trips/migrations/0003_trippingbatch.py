@@ -0,0 +1,33 @@
+# Generated by Django 5.2.11 on 2026-10-18 22:30
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('trips', '0002_tripplan'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TripPingBatch',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('count', models.PositiveIntegerField()),
+                ('first_ts', models.FloatField()),
+                ('last_ts', models.FloatField()),
+                ('ts', models.BinaryField()),
+                ('lng', models.BinaryField()),
+                ('lat', models.BinaryField()),
+                ('route_mile', models.BinaryField()),
+                ('offset_miles', models.BinaryField()),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('trip', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='ping_batches', to='trips.tripplan')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['trip', 'last_ts'], name='trips_pingbatch_trip_ts_idx')],
+            },
+        ),
+    ]
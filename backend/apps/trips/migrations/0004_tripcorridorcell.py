@@ -0,0 +1,25 @@
+# Generated by Django 5.2.11 on 2026-10-18 22:52
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('trips', '0003_trippingbatch'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TripCorridorCell',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('cell', models.CharField(max_length=12)),
+                ('trip', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='corridor_cells', to='trips.tripplan')),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('cell', 'trip'), name='trips_corridor_cell_trip_uniq')],
+            },
+        ),
+    ]
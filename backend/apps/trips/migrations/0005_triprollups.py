@@ -0,0 +1,46 @@
+# Generated by Django 5.2.11 on 2026-10-18 22:54
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('trips', '0004_tripcorridorcell'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TripDayRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('day', models.DateField()),
+                ('plans', models.PositiveIntegerField(default=0)),
+                ('total_miles', models.FloatField(default=0)),
+                ('driving_hours', models.FloatField(default=0)),
+                ('total_days', models.PositiveIntegerField(default=0)),
+                ('noncompliant_plans', models.PositiveIntegerField(default=0)),
+                ('cycle_remaining_hours', models.FloatField(default=0)),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('day',), name='trips_day_rollup_day_uniq')],
+            },
+        ),
+        migrations.CreateModel(
+            name='TripLaneRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('day', models.DateField()),
+                ('plans', models.PositiveIntegerField(default=0)),
+                ('total_miles', models.FloatField(default=0)),
+                ('driving_hours', models.FloatField(default=0)),
+                ('total_days', models.PositiveIntegerField(default=0)),
+                ('noncompliant_plans', models.PositiveIntegerField(default=0)),
+                ('cycle_remaining_hours', models.FloatField(default=0)),
+                ('lane', models.CharField(max_length=255)),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('day', 'lane'), name='trips_lane_rollup_day_lane_uniq')],
+            },
+        ),
+    ]
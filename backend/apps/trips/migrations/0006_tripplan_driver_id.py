@@ -0,0 +1,22 @@
+# Generated by Django 5.2.11 on 2026-10-18 22:56
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('trips', '0005_triprollups'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='tripplan',
+            name='driver_id',
+            field=models.CharField(blank=True, default='', max_length=64),
+        ),
+        migrations.AddIndex(
+            model_name='tripplan',
+            index=models.Index(fields=['driver_id', 'created_at'], name='trips_plan_driver_created_idx'),
+        ),
+    ]
@@ -1,3 +1,129 @@
+import uuid
+
 from django.db import models
+from django.db.models import Q
+from django.utils import timezone
+
+
+class PlanJobQuerySet(models.QuerySet):
+    def unexpired(self):
+        return self.filter(Q(expires_at__isnull=True) | Q(expires_at__gt=timezone.now()))
+
+
+class PlanJob(models.Model):
+    class Status(models.TextChoices):
+        QUEUED = "queued"
+        RUNNING = "running"
+        SUCCEEDED = "succeeded"
+        FAILED = "failed"
+
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    status = models.CharField(max_length=16, choices=Status.choices, default=Status.QUEUED)
+    payload = models.JSONField()
+    result = models.JSONField(null=True, blank=True)
+    error = models.TextField(blank=True, default="")
+    attempts = models.PositiveIntegerField(default=0)
+    worker = models.CharField(max_length=64, blank=True, default="")
+    created_at = models.DateTimeField(auto_now_add=True)
+    started_at = models.DateTimeField(null=True, blank=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+    expires_at = models.DateTimeField(null=True, blank=True, db_index=True)
+
+    objects = PlanJobQuerySet.as_manager()
+
+    class Meta:
+        indexes = [models.Index(fields=["status", "created_at"], name="trips_planjob_queue_idx")]
+
+    def __str__(self):
+        return f"PlanJob {self.pk} ({self.status})"
+
+
+class TripPlan(models.Model):
+    # A computed plan as returned by the plan endpoint. The polyline lives in
+    # the route geometry store (ROUTE_GEOMETRY_STORE_PATH) and each day's log in
+    # logs.DailyLog; content_hash covers all of it and is the plan's ETag.
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    request = models.JSONField(default=dict)
+    driver_id = models.CharField(max_length=64, blank=True, default="")
+    distance_miles = models.FloatField()
+    geometry_offset = models.BigIntegerField(null=True, blank=True)
+    summary = models.JSONField(default=dict)
+    stops = models.JSONField(default=list)
+    timeline_stops = models.JSONField(default=list)
+    total_days = models.PositiveIntegerField(default=0)
+    content_hash = models.CharField(max_length=64)
+    created_at = models.DateTimeField(auto_now_add=True, db_index=True)
+
+    class Meta:
+        indexes = [models.Index(fields=["driver_id", "created_at"], name="trips_plan_driver_created_idx")]
+
+    def __str__(self):
+        return f"TripPlan {self.pk} ({self.total_days} days)"
+
+
+class TripPingBatch(models.Model):
+    # One ingested batch of GPS pings, stored column-wise as packed little-endian
+    # arrays (see apps/trips/pings.py): ts float64 epoch seconds; lng, lat,
+    # route_mile and offset_miles float32. Off-route pings have NaN route_mile.
+    trip = models.ForeignKey(TripPlan, on_delete=models.CASCADE, related_name="ping_batches")
+    count = models.PositiveIntegerField()
+    first_ts = models.FloatField()
+    last_ts = models.FloatField()
+    ts = models.BinaryField()
+    lng = models.BinaryField()
+    lat = models.BinaryField()
+    route_mile = models.BinaryField()
+    offset_miles = models.BinaryField()
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        indexes = [models.Index(fields=["trip", "last_ts"], name="trips_pingbatch_trip_ts_idx")]
+
+    def __str__(self):
+        return f"TripPingBatch {self.pk} ({self.count} pings)"
+
+
+class TripCorridorCell(models.Model):
+    # One geohash cell (TRIP_CORRIDOR_GEOHASH_PRECISION) that a stored plan's
+    # polyline passes through; see apps/trips/corridors.py.
+    trip = models.ForeignKey(TripPlan, on_delete=models.CASCADE, related_name="corridor_cells")
+    cell = models.CharField(max_length=12)
+
+    class Meta:
+        constraints = [models.UniqueConstraint(fields=["cell", "trip"], name="trips_corridor_cell_trip_uniq")]
+
+    def __str__(self):
+        return f"TripCorridorCell {self.cell} ({self.trip_id})"
+
+
+class TripRollupTotals(models.Model):
+    # Running totals over the plans saved on `day`, kept current by
+    # apps/trips/rollups.py; averages are derived from them on read.
+    day = models.DateField()
+    plans = models.PositiveIntegerField(default=0)
+    total_miles = models.FloatField(default=0)
+    driving_hours = models.FloatField(default=0)
+    total_days = models.PositiveIntegerField(default=0)
+    noncompliant_plans = models.PositiveIntegerField(default=0)
+    cycle_remaining_hours = models.FloatField(default=0)
+
+    class Meta:
+        abstract = True
+
+
+class TripDayRollup(TripRollupTotals):
+    class Meta:
+        constraints = [models.UniqueConstraint(fields=["day"], name="trips_day_rollup_day_uniq")]
+
+    def __str__(self):
+        return f"TripDayRollup {self.day} ({self.plans} plans)"
+
+
+class TripLaneRollup(TripRollupTotals):
+    lane = models.CharField(max_length=255)
+
+    class Meta:
+        constraints = [models.UniqueConstraint(fields=["day", "lane"], name="trips_lane_rollup_day_lane_uniq")]
 
-# Create your models here.
+    def __str__(self):
+        return f"TripLaneRollup {self.day} {self.lane} ({self.plans} plans)"
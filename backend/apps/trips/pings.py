@@ -0,0 +1,225 @@
+import json
+import math
+import sys
+import threading
+from array import array
+from collections import OrderedDict
+from struct import Struct
+
+from django.conf import settings
+from django.db.models import Sum
+from rest_framework.exceptions import ValidationError
+
+from apps.trips.models import TripPingBatch
+from utils.route_geometry import open_geometry_store
+from utils.route_projection import SegmentIndex
+
+# Binary batches are packed little-endian records: float64 ts (epoch seconds),
+# float32 lng, float32 lat. NDJSON batches carry one {"ts", "lng", "lat"} per line.
+BINARY_PING = Struct("<dff")
+BINARY_CONTENT_TYPES = {"application/octet-stream", "application/x-trip-pings"}
+NDJSON_CONTENT_TYPES = {"application/x-ndjson", "application/jsonl"}
+READ_CHUNK_BYTES = 64 * 1024
+SEGMENT_INDEX_CACHE_SIZE = 32
+
+_segment_indexes = OrderedDict()
+_segment_indexes_lock = threading.Lock()
+
+
+def _valid_ping(ts, lng, lat):
+    return math.isfinite(ts) and -180 <= lng <= 180 and -90 <= lat <= 90
+
+
+def _iter_chunks(stream):
+    while True:
+        chunk = stream.read(READ_CHUNK_BYTES)
+        if not chunk:
+            return
+        yield chunk
+
+
+def _iter_binary_pings(stream):
+    pending = b""
+    for chunk in _iter_chunks(stream):
+        data = pending + chunk
+        usable = len(data) - len(data) % BINARY_PING.size
+        yield from BINARY_PING.iter_unpack(memoryview(data)[:usable])
+        pending = data[usable:]
+    if pending:
+        raise ValidationError({"detail": f"Binary ping batches must be a multiple of {BINARY_PING.size} bytes."})
+
+
+def _ndjson_ping(line):
+    try:
+        item = json.loads(line)
+        return float(item["ts"]), float(item["lng"]), float(item["lat"])
+    except (ValueError, TypeError, KeyError):
+        return None
+
+
+def _iter_ndjson_pings(stream):
+    pending = b""
+    for chunk in _iter_chunks(stream):
+        lines = (pending + chunk).split(b"\n")
+        pending = lines.pop()
+        for line in lines:
+            if line.strip():
+                yield _ndjson_ping(line)
+    if pending.strip():
+        yield _ndjson_ping(pending)
+
+
+def iter_request_pings(content_type, stream):
+    # Yields (ts, lng, lat), or None for an NDJSON line that does not parse.
+    media_type = (content_type or "").split(";")[0].strip().lower()
+    if media_type in BINARY_CONTENT_TYPES:
+        return _iter_binary_pings(stream)
+    if media_type in NDJSON_CONTENT_TYPES:
+        return _iter_ndjson_pings(stream)
+    supported = ", ".join(sorted(NDJSON_CONTENT_TYPES | BINARY_CONTENT_TYPES))
+    raise ValidationError({"detail": f"Unsupported ping content type; use one of: {supported}."})
+
+
+def segment_index_for(plan):
+    # Built once per stored route and shared across batches; plans are
+    # immutable, so the geometry offset identifies the index.
+    key = (settings.ROUTE_GEOMETRY_STORE_PATH, plan.geometry_offset)
+    with _segment_indexes_lock:
+        index = _segment_indexes.get(key)
+        if index is not None:
+            _segment_indexes.move_to_end(key)
+            return index
+
+    polyline = open_geometry_store(settings.ROUTE_GEOMETRY_STORE_PATH).read(plan.geometry_offset)
+    index = SegmentIndex(polyline)
+    with _segment_indexes_lock:
+        _segment_indexes[key] = index
+        while len(_segment_indexes) > SEGMENT_INDEX_CACHE_SIZE:
+            _segment_indexes.popitem(last=False)
+    return index
+
+
+def clear_segment_indexes():
+    with _segment_indexes_lock:
+        _segment_indexes.clear()
+
+
+def _pack(typecode, values):
+    column = array(typecode, values)
+    if sys.byteorder == "big":
+        column.byteswap()
+    return column.tobytes()
+
+
+def _unpack(typecode, data):
+    column = array(typecode)
+    column.frombytes(bytes(data))
+    if sys.byteorder == "big":
+        column.byteswap()
+    return column
+
+
+def _ping_payload(ts, lng, lat, route_mile, offset_miles):
+    return {
+        "ts": ts,
+        "lng": lng,
+        "lat": lat,
+        "route_mile": round(route_mile, 3),
+        "offset_miles": round(offset_miles, 3),
+    }
+
+
+def _latest_on_route(ts, lng, lat, route_mile, offset_miles):
+    latest = None
+    for idx, mile in enumerate(route_mile):
+        if mile == mile and (latest is None or ts[idx] >= ts[latest]):
+            latest = idx
+    if latest is None:
+        return None
+    return _ping_payload(ts[latest], lng[latest], lat[latest], route_mile[latest], offset_miles[latest])
+
+
+def ingest_pings(plan, pings):
+    if plan.geometry_offset is None:
+        raise ValidationError({"detail": "Trip has no stored route geometry."})
+
+    index = segment_index_for(plan)
+    project = index.project
+    max_offset = settings.PING_MAX_OFFSET_MILES
+    max_pings = settings.PING_BATCH_MAX_PINGS
+    ts, lng, lat = array("d"), array("f"), array("f")
+    route_mile, offset_miles = array("f"), array("f")
+    rejected = off_route = 0
+
+    for ping in pings:
+        if ping is None or not _valid_ping(*ping):
+            rejected += 1
+            continue
+        if len(ts) >= max_pings:
+            raise ValidationError({"detail": f"At most {max_pings} pings per batch."})
+        ping_ts, ping_lng, ping_lat = ping
+        projected = project(ping_lng, ping_lat, max_offset)
+        if projected is None:
+            off_route += 1
+            projected = (math.nan, math.nan)
+        ts.append(ping_ts)
+        lng.append(ping_lng)
+        lat.append(ping_lat)
+        route_mile.append(projected[0])
+        offset_miles.append(projected[1])
+
+    if not ts:
+        raise ValidationError({"detail": "No valid pings in batch.", "rejected": rejected})
+
+    TripPingBatch.objects.create(
+        trip=plan,
+        count=len(ts),
+        first_ts=min(ts),
+        last_ts=max(ts),
+        ts=_pack("d", ts),
+        lng=_pack("f", lng),
+        lat=_pack("f", lat),
+        route_mile=_pack("f", route_mile),
+        offset_miles=_pack("f", offset_miles),
+    )
+    return {
+        "trip_id": str(plan.pk),
+        "accepted": len(ts),
+        "rejected": rejected,
+        "off_route": off_route,
+        "latest": _latest_on_route(ts, lng, lat, route_mile, offset_miles),
+    }
+
+
+def batch_columns(batch):
+    return (
+        _unpack("d", batch.ts),
+        _unpack("f", batch.lng),
+        _unpack("f", batch.lat),
+        _unpack("f", batch.route_mile),
+        _unpack("f", batch.offset_miles),
+    )
+
+
+def trip_progress(plan):
+    batches = TripPingBatch.objects.filter(trip=plan)
+    latest = None
+    # Newest batches first; once a batch ends before the best ping so far,
+    # no older batch can hold a later one.
+    for batch in batches.order_by("-last_ts", "-pk").iterator(chunk_size=4):
+        if latest is not None and batch.last_ts < latest["ts"]:
+            break
+        candidate = _latest_on_route(*batch_columns(batch))
+        if candidate is not None and (latest is None or candidate["ts"] > latest["ts"]):
+            latest = candidate
+
+    progress = None
+    if latest is not None and plan.distance_miles > 0:
+        progress = round(min(1.0, latest["route_mile"] / plan.distance_miles), 4)
+    return {
+        "trip_id": str(plan.pk),
+        "distance_miles": plan.distance_miles,
+        "pings": batches.aggregate(total=Sum("count"))["total"] or 0,
+        "latest": latest,
+        "progress": progress,
+    }
@@ -0,0 +1,116 @@
+import hashlib
+import json
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from rest_framework.utils.encoders import JSONEncoder
+
+from apps.logs.models import DailyLog
+from apps.trips.corridors import index_trip_corridor
+from apps.trips.models import TripPlan
+from apps.trips.rollups import record_plan_rollup
+from utils.eld_svg import LAYOUT_VERSION, render_log_sheet_svg
+from utils.route_geometry import PackedPolyline, open_geometry_store
+
+
+def _canonical_json(value):
+    return json.dumps(value, cls=JSONEncoder, sort_keys=True, separators=(",", ":")).encode("utf-8")
+
+
+def content_etag(content_hash):
+    return f'"{content_hash}"'
+
+
+def day_content_hash(day):
+    return hashlib.sha256(_canonical_json(day)).hexdigest()
+
+
+def save_trip_plan(request, result):
+    route = result["route"]
+    polyline = route.get("polyline") or []
+    if not isinstance(polyline, PackedPolyline):
+        polyline = PackedPolyline.from_points(polyline)
+    days = [(day, day_content_hash(day)) for day in result["logs"]]
+
+    # The geometry is hashed as packed floats rather than as JSON, and each
+    # day contributes its own hash, which is also that day's ETag.
+    digest = hashlib.sha256()
+    digest.update(
+        _canonical_json(
+            {
+                "distance_miles": route["distance_miles"],
+                "summary": result["summary"],
+                "stops": result["stops"],
+                "timeline_stops": result["timeline_stops"],
+            }
+        )
+    )
+    digest.update(polyline.coords)
+    for _, day_hash in days:
+        digest.update(day_hash.encode("ascii"))
+
+    with transaction.atomic():
+        plan = TripPlan.objects.create(
+            request=request,
+            driver_id=request.get("driver_id") or "",
+            distance_miles=route["distance_miles"],
+            summary=result["summary"],
+            stops=result["stops"],
+            timeline_stops=result["timeline_stops"],
+            total_days=len(days),
+            content_hash=digest.hexdigest(),
+        )
+        DailyLog.objects.bulk_create(
+            [
+                DailyLog(
+                    trip=plan,
+                    day=day.get("day"),
+                    events=day.get("events", []),
+                    remarks=day.get("remarks", []),
+                    content_hash=day_hash,
+                )
+                for day, day_hash in days
+            ]
+        )
+        if len(polyline):
+            index_trip_corridor(plan, polyline)
+        record_plan_rollup(plan)
+
+        # The geometry file is not transactional, so it is written last: a
+        # failed insert above leaves nothing behind, and a record orphaned by
+        # a failure after this point is dropped by compact_route_geometry.
+        if len(polyline):
+            plan.geometry_offset = open_geometry_store(settings.ROUTE_GEOMETRY_STORE_PATH).append(polyline)
+            TripPlan.objects.filter(pk=plan.pk).update(geometry_offset=plan.geometry_offset)
+    return plan
+
+
+def daily_log_payload(log):
+    return {"day": log.day, "events": log.events, "remarks": log.remarks}
+
+
+def log_sheet_svg(content_hash, theme, load_log):
+    # Keyed on the day's content hash, so identical days share one render and
+    # the DailyLog row is only loaded on a cache miss.
+    key = f"eld-svg:{LAYOUT_VERSION}:{theme}:{content_hash}"
+    svg = cache.get(key)
+    if svg is None:
+        svg = render_log_sheet_svg(daily_log_payload(load_log()), theme)
+        cache.set(key, svg, settings.ELD_SVG_CACHE_SECONDS)
+    return svg
+
+
+def trip_plan_payload(plan):
+    polyline = []
+    if plan.geometry_offset is not None:
+        polyline = open_geometry_store(settings.ROUTE_GEOMETRY_STORE_PATH).read(plan.geometry_offset)
+
+    return {
+        "trip_id": str(plan.pk),
+        "route": {"distance_miles": plan.distance_miles, "polyline": polyline},
+        "summary": plan.summary,
+        "stops": plan.stops,
+        "timeline_stops": plan.timeline_stops,
+        "logs": [daily_log_payload(log) for log in plan.daily_logs.order_by("day")],
+    }
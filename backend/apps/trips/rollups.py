@@ -0,0 +1,75 @@
+from django.db import transaction
+from django.db.models import F
+from django.utils import timezone
+
+from apps.trips.models import TripDayRollup, TripLaneRollup
+
+# Fleet dashboards read per-day and per-day-per-lane totals instead of stored
+# plans. Each saved plan adds its numbers to both rows in the same transaction
+# as the plan; the backfill command rebuilds them from the plans in bulk.
+ROLLUP_FIELDS = ("plans", "total_miles", "driving_hours", "total_days", "noncompliant_plans", "cycle_remaining_hours")
+LANE_MAX_LENGTH = 255
+
+
+def _place(location):
+    if isinstance(location, dict):
+        label = str(location.get("label") or "").strip()
+        if label or location.get("lng") is None or location.get("lat") is None:
+            return label
+        return f"{float(location['lat']):.2f},{float(location['lng']):.2f}"
+    return str(location or "").strip()
+
+
+def trip_lane(request):
+    lane = f"{_place(request.get('pickup_location'))} -> {_place(request.get('dropoff_location'))}"
+    return lane[:LANE_MAX_LENGTH]
+
+
+def plan_rollup(plan):
+    # (day, lane, totals) that one stored plan contributes.
+    summary = plan.summary or {}
+    totals = {
+        "plans": 1,
+        "total_miles": float(plan.distance_miles or 0),
+        "driving_hours": float(summary.get("driving_hours") or 0),
+        "total_days": int(plan.total_days or 0),
+        "noncompliant_plans": 0 if summary.get("hos_compliant", True) else 1,
+        "cycle_remaining_hours": float(summary.get("cycle_remaining_hours_after") or 0),
+    }
+    return timezone.localdate(plan.created_at), trip_lane(plan.request or {}), totals
+
+
+def _add(model, keys, totals):
+    row, _ = model.objects.get_or_create(**keys)
+    model.objects.filter(pk=row.pk).update(**{name: F(name) + value for name, value in totals.items()})
+
+
+def record_plan_rollup(plan):
+    day, lane, totals = plan_rollup(plan)
+    with transaction.atomic():
+        _add(TripDayRollup, {"day": day}, totals)
+        _add(TripLaneRollup, {"day": day, "lane": lane}, totals)
+
+
+def add_totals(into, totals):
+    for name in ROLLUP_FIELDS:
+        into[name] = into.get(name, 0) + totals[name]
+    return into
+
+
+def rollup_payload(row):
+    plans = row.plans or 1
+    payload = {"day": row.day}
+    if isinstance(row, TripLaneRollup):
+        payload["lane"] = row.lane
+    payload.update(
+        {
+            "plans": row.plans,
+            "total_miles": round(row.total_miles, 2),
+            "driving_hours": round(row.driving_hours, 2),
+            "days_per_trip": round(row.total_days / plans, 2),
+            "noncompliant_plans": row.noncompliant_plans,
+            "avg_cycle_remaining_hours": round(row.cycle_remaining_hours / plans, 2),
+        }
+    )
+    return payload
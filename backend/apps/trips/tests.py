@@ -1,10 +1,68 @@
-from django.test import TestCase
+import csv
+import io
+import itertools
+import json
+import math
+import os
+import struct
+import tempfile
+import threading
+import time
+
+from datetime import timedelta
+from urllib import error
+from xml.etree import ElementTree
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.utils import timezone
+from rest_framework.exceptions import Throttled
 from rest_framework.test import APIClient
 from unittest.mock import patch
 
-from apps.trips.views import compute_summary_metrics
-from utils.hos_engine import generate_hos_logs
-from utils.stop_planner import plan_stops
+from apps.logs.models import DailyLog
+from apps.trips.admission import AdmissionGate, PlanQueueTimeout
+from apps.trips.jobs import _worker_loop, claim_next_job, purge_expired_jobs, run_plan_job
+from apps.trips.models import PlanJob, TripCorridorCell, TripDayRollup, TripLaneRollup, TripPingBatch, TripPlan
+from apps.trips.plans import save_trip_plan
+from apps.trips.views import compute_summary_metrics, cycle_sweep
+from utils.assignment import min_cost_assignment
+from utils.departure_search import departure_minutes, search_departures
+from utils.eld_audit import audit_eld_csv
+from utils.eld_svg import render_log_sheet_svg
+from utils.fuel_planner import plan_fuel_stops
+from utils.geohash import cell_degrees, encode, polyline_cells, radius_cells
+from utils.hos_engine import _duty_ops, _miles_to_minutes, _simulate, generate_hos_logs, iter_hos_logs, timeline_memo
+from utils.hos_schedule import DriverSchedule, hos_clock
+from utils.ors_stream import parse_ors_directions
+from utils.route_geometry import GeometryStore, PackedPolyline, open_geometry_store
+from utils.route_projection import MILES_PER_DEGREE, SegmentIndex
+from utils.route_service import get_route, get_synthetic_route
+from utils.stop_planner import (
+    DEFAULT_STOP_RULES,
+    _haversine_miles,
+    get_point_at_distance,
+    load_stop_rules,
+    plan_stops,
+)
+
+
+_geometry_dir = tempfile.TemporaryDirectory()
+_geometry_settings = override_settings(
+    ROUTE_GEOMETRY_STORE_PATH=os.path.join(_geometry_dir.name, "route_geometry.bin")
+)
+
+
+def setUpModule():
+    # Stored plans append their polylines to the geometry file.
+    _geometry_settings.enable()
+
+
+def tearDownModule():
+    _geometry_settings.disable()
+    _geometry_dir.cleanup()
 
 
 def _polyline_for_miles(total_miles, step_miles=100):
@@ -151,6 +209,382 @@ class PlanTripViewTests(TestCase):
         self.assertIsNotNone(eld_limit)
         self.assertTrue(eld_limit.get("eld_required"))
 
+    def test_departure_search_returns_best_schedule_with_logs(self):
+        response = self.client.post(
+            "/api/trips/plan/departures",
+            {
+                "pickup_location": "Barstow, CA",
+                "dropoff_location": "Las Vegas, NV",
+                "earliest_minute": 360,
+                "latest_minute": 720,
+                "step_minutes": 30,
+                "starting_clocks": [{}, {"driving_hours_used": 2, "shift_hours_used": 3}],
+            },
+            format="json",
+        )
+
+        self.assertEqual(response.status_code, 200)
+        body = response.json()
+        self.assertEqual(body["evaluated"] + body["pruned"], 24)
+        departure = body["departure"]
+        self.assertTrue(360 <= departure["departure_minute"] < 720)
+        self.assertEqual(body["logs"][0]["events"][0]["end_minute"], departure["departure_minute"])
+        self.assertEqual(body["summary"]["total_days"], departure["total_days"])
+
+        invalid = self.client.post(
+            "/api/trips/plan/departures",
+            {"pickup_location": "Barstow, CA", "starting_clocks": [{"driving_hours_used": 12}]},
+            format="json",
+        )
+        self.assertEqual(invalid.status_code, 400)
+
+    def test_chain_endpoint_returns_clock_that_resumes_the_schedule(self):
+        loads = [
+            {"pickup_location": "Barstow, CA", "dropoff_location": "Las Vegas, NV"},
+            {"pickup_location": "Las Vegas, NV", "dropoff_location": "Barstow, CA", "rest_hours": 10},
+        ]
+        whole = self.client.post("/api/trips/plan/chain", {"loads": loads}, format="json")
+        first = self.client.post("/api/trips/plan/chain", {"loads": loads[:1]}, format="json")
+        second = self.client.post(
+            "/api/trips/plan/chain", {"loads": loads[1:], "clock": first.json()["clock"]}, format="json"
+        )
+
+        self.assertEqual(whole.status_code, 200)
+        self.assertEqual(second.status_code, 200)
+        self.assertEqual(whole.json()["clock"], second.json()["clock"])
+        self.assertEqual(whole.json()["loads"][1]["start_day"], second.json()["loads"][0]["start_day"])
+        self.assertEqual(whole.json()["logs"][-1], second.json()["logs"][-1])
+
+        invalid = self.client.post(
+            "/api/trips/plan/chain", {"loads": loads, "clock": {"driving_minutes": 700}}, format="json"
+        )
+        self.assertEqual(invalid.status_code, 400)
+
+
+class StoredTripPlanTests(TestCase):
+    @patch("apps.trips.views.get_route")
+    def setUp(self, mock_get_route):
+        mock_get_route.return_value = {
+            "distance_miles": 1300.0,
+            "duration_hours": 26.0,
+            "polyline": _polyline_for_miles(1300),
+        }
+        self.client = APIClient()
+        response = self.client.post(
+            "/api/trips/plan",
+            {"pickup_location": "Los Angeles, CA", "dropoff_location": "Chicago, IL", "cycle_used_hours": 0},
+            format="json",
+        )
+        self.plan = response.json()
+
+    def test_plan_is_stored_and_served_with_etag(self):
+        plan = TripPlan.objects.get(pk=self.plan["trip_id"])
+        self.assertEqual(DailyLog.objects.filter(trip=plan).count(), len(self.plan["logs"]))
+
+        response = self.client.get(f"/api/trips/{plan.pk}")
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response["ETag"], f'"{plan.content_hash}"')
+        self.assertEqual(response["Cache-Control"], "private, no-cache")
+        self.assertEqual(response.json(), json.loads(json.dumps(self.plan)))
+
+    def test_matching_if_none_match_returns_304_without_loading_plan(self):
+        etag = self.client.get(f"/api/trips/{self.plan['trip_id']}")["ETag"]
+
+        with patch("apps.trips.views.trip_plan_payload") as mock_trip_plan_payload:
+            response = self.client.get(
+                f"/api/trips/{self.plan['trip_id']}", HTTP_IF_NONE_MATCH=f'"stale", W/{etag}'
+            )
+
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response["ETag"], etag)
+        self.assertEqual(response["Cache-Control"], "private, no-cache")
+        self.assertEqual(response.content, b"")
+        mock_trip_plan_payload.assert_not_called()
+
+    def test_failed_save_leaves_no_geometry_and_compaction_drops_orphans(self):
+        path = settings.ROUTE_GEOMETRY_STORE_PATH
+        result = {name: self.plan[name] for name in ("route", "summary", "stops", "timeline_stops", "logs")}
+        size = os.path.getsize(path)
+        with patch("apps.trips.plans.DailyLog.objects.bulk_create", side_effect=RuntimeError("insert failed")):
+            with self.assertRaises(RuntimeError):
+                save_trip_plan({"pickup_location": "A", "dropoff_location": "B"}, result)
+        self.assertEqual(os.path.getsize(path), size)
+
+        open_geometry_store(path).append(_polyline_for_miles(3000, step_miles=1))
+        call_command("compact_route_geometry", stdout=io.StringIO())
+
+        self.assertLess(os.path.getsize(path), size)
+        stored = self.client.get(f"/api/trips/{self.plan['trip_id']}").json()
+        self.assertEqual(stored["route"], self.plan["route"])
+
+        call_command("compact_route_geometry", "--delete-plans-older-than", "0", stdout=io.StringIO())
+        self.assertFalse(TripPlan.objects.exists())
+        self.assertFalse(os.path.exists(path))
+
+    def test_day_log_has_its_own_etag(self):
+        url = f"/api/trips/{self.plan['trip_id']}/logs/2"
+        response = self.client.get(url)
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json(), self.plan["logs"][1])
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=response["ETag"]).status_code, 304)
+        self.assertNotEqual(response["ETag"], self.client.get(f"/api/trips/{self.plan['trip_id']}/logs/1")["ETag"])
+        self.assertEqual(self.client.get(f"/api/trips/{self.plan['trip_id']}/logs/99").status_code, 404)
+
+    def test_day_log_sheet_svg_is_rendered_once_and_cached(self):
+        url = f"/api/trips/{self.plan['trip_id']}/logs/1.svg"
+        cache.clear()
+
+        with patch("apps.trips.plans.render_log_sheet_svg", wraps=render_log_sheet_svg) as mock_render:
+            response = self.client.get(url)
+            cached = self.client.get(url)
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response["Content-Type"], "image/svg+xml; charset=utf-8")
+        self.assertEqual(mock_render.call_count, 1)
+        self.assertEqual(cached.content, response.content)
+        root = ElementTree.fromstring(response.content)
+        self.assertEqual(root.tag, "{http://www.w3.org/2000/svg}svg")
+        remarks = [remark["reason"] for remark in self.plan["logs"][0]["remarks"]]
+        self.assertIn(remarks[0], response.content.decode("utf-8"))
+
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=response["ETag"]).status_code, 304)
+        self.assertNotEqual(self.client.get(url, {"theme": "dark"})["ETag"], response["ETag"])
+        self.assertEqual(self.client.get(url, {"theme": "sepia"}).status_code, 400)
+
+    def test_logs_pdf_streams_one_page_per_day_with_valid_xref(self):
+        url = f"/api/trips/{self.plan['trip_id']}/logs.pdf"
+
+        response = self.client.get(url, {"from_day": 2}, HTTP_ACCEPT="application/pdf")
+
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.streaming)
+        self.assertEqual(response["Content-Type"], "application/pdf")
+        body = b"".join(response.streaming_content)
+        self.assertTrue(body.startswith(b"%PDF-1.4"))
+        self.assertTrue(body.endswith(b"%%EOF\n"))
+        self.assertIn(b"/Count %d" % (len(self.plan["logs"]) - 1), body)
+
+        xref_at = int(body.rsplit(b"startxref\n", 1)[1].split(b"\n", 1)[0])
+        entries = body[xref_at:].split(b"\n")
+        object_count = int(entries[1].split()[1])
+        for number, entry in enumerate(entries[3:2 + object_count], start=1):
+            offset = int(entry.split()[0])
+            self.assertTrue(body[offset:].startswith(b"%d 0 obj" % number))
+
+        self.assertEqual(self.client.get(url, {"from_day": 2}, HTTP_IF_NONE_MATCH=response["ETag"]).status_code, 304)
+        self.assertEqual(self.client.get(url, {"from_day": 0}, HTTP_ACCEPT="application/pdf").status_code, 400)
+
+    def test_logs_day_range_pages_through_stored_plan(self):
+        url = f"/api/trips/{self.plan['trip_id']}/logs"
+        total_days = len(self.plan["logs"])
+        self.assertGreaterEqual(total_days, 3)
+
+        first_page = self.client.get(url, {"from_day": 1, "to_day": 2}).json()
+        self.assertEqual(first_page["logs"], self.plan["logs"][:2])
+        self.assertEqual(first_page["total_days"], total_days)
+        self.assertTrue(first_page["next"].endswith(f"?from_day=3&to_day={min(total_days, 4)}"))
+
+        last_page = self.client.get(first_page["next"]).json()
+        self.assertEqual(last_page["logs"], self.plan["logs"][2:4])
+        self.assertEqual(self.client.get(url, {"from_day": 0}).status_code, 400)
+        self.assertEqual(self.client.get(url, {"from_day": 3, "to_day": 2}).status_code, 400)
+
+    @patch("apps.trips.views.get_route")
+    def test_plan_can_return_summary_and_first_days_only(self, mock_get_route):
+        mock_get_route.return_value = {
+            "distance_miles": 1300.0,
+            "duration_hours": 26.0,
+            "polyline": _polyline_for_miles(1300),
+        }
+
+        response = self.client.post(
+            "/api/trips/plan?log_days=1",
+            {"pickup_location": "Los Angeles, CA", "dropoff_location": "Chicago, IL", "cycle_used_hours": 0},
+            format="json",
+        )
+
+        body = response.json()
+        self.assertEqual(set(body), {"trip_id", "summary", "logs", "plan_url", "next"})
+        self.assertEqual(body["logs"], self.plan["logs"][:1])
+        self.assertEqual(body["summary"], self.plan["summary"])
+        self.assertEqual(self.client.get(body["next"]).json()["logs"], self.plan["logs"][1:2])
+
+    def test_pings_are_projected_onto_route_and_stored_per_trip(self):
+        url = f"/api/trips/{self.plan['trip_id']}/pings"
+        lines = [
+            json.dumps({"ts": 1000, "lng": 100 / MILES_PER_DEGREE, "lat": 0.01}),
+            json.dumps({"ts": 1060, "lng": 250 / MILES_PER_DEGREE, "lat": -0.02}),
+            json.dumps({"ts": 1120, "lng": 250 / MILES_PER_DEGREE, "lat": 3.0}),
+            "not json",
+        ]
+
+        response = self.client.generic("POST", url, "\n".join(lines), content_type="application/x-ndjson")
+
+        self.assertEqual(response.status_code, 201)
+        body = response.json()
+        self.assertEqual((body["accepted"], body["rejected"], body["off_route"]), (3, 1, 1))
+        self.assertEqual(body["latest"]["ts"], 1060)
+        self.assertAlmostEqual(body["latest"]["route_mile"], 250, delta=0.01)
+        self.assertAlmostEqual(body["latest"]["offset_miles"], 0.02 * MILES_PER_DEGREE, delta=0.01)
+
+        packed = b"".join(struct.pack("<dff", 2000 + idx, (600 + idx) / MILES_PER_DEGREE, 0.0) for idx in range(5))
+        response = self.client.generic("POST", url, packed, content_type="application/octet-stream")
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(response.json()["accepted"], 5)
+        truncated = self.client.generic("POST", url, packed[:-1], content_type="application/octet-stream")
+        self.assertEqual(truncated.status_code, 400)
+        self.assertEqual(self.client.post(url, {"ts": 1}, format="json").status_code, 400)
+
+        batch = TripPingBatch.objects.filter(trip_id=self.plan["trip_id"]).order_by("pk").first()
+        self.assertEqual(len(batch.ts), 3 * 8)
+        self.assertEqual(len(batch.route_mile), 3 * 4)
+
+        progress = self.client.get(url).json()
+        self.assertEqual(progress["pings"], 8)
+        self.assertEqual(progress["latest"]["ts"], 2004)
+        self.assertAlmostEqual(progress["latest"]["route_mile"], 604, delta=0.01)
+        self.assertAlmostEqual(progress["progress"], 604 / 1300, places=3)
+
+    @patch("apps.trips.views.get_route")
+    def test_nearby_narrows_by_corridor_cells_then_exact_distance(self, mock_get_route):
+        mock_get_route.return_value = {
+            "distance_miles": 600.0,
+            "duration_hours": 12.0,
+            "polyline": [[lng, 0.5] for lng, _ in _polyline_for_miles(600)],
+        }
+        other = self.client.post(
+            "/api/trips/plan",
+            {"pickup_location": "Dallas, TX", "dropoff_location": "Denver, CO", "cycle_used_hours": 0},
+            format="json",
+        ).json()
+        self.assertTrue(TripCorridorCell.objects.filter(trip_id=other["trip_id"]).exists())
+
+        lng = 300 / MILES_PER_DEGREE
+        body = self.client.get("/api/trips/nearby", {"lng": lng, "lat": 0.1, "radius_miles": 10}).json()
+        self.assertEqual([trip["trip_id"] for trip in body["trips"]], [self.plan["trip_id"]])
+        self.assertAlmostEqual(body["trips"][0]["route_mile"], 300, delta=0.01)
+        self.assertAlmostEqual(body["trips"][0]["offset_miles"], 0.1 * MILES_PER_DEGREE, delta=0.01)
+
+        body = self.client.get("/api/trips/nearby", {"lng": lng, "lat": 0.3, "radius_miles": 25}).json()
+        self.assertEqual([trip["trip_id"] for trip in body["trips"]], [other["trip_id"], self.plan["trip_id"]])
+        far = self.client.get("/api/trips/nearby", {"lng": 1000 / MILES_PER_DEGREE, "lat": 0.3, "radius_miles": 25})
+        self.assertEqual([trip["trip_id"] for trip in far.json()["trips"]], [self.plan["trip_id"]])
+        self.assertLess(far.json()["candidates"], 2)
+
+        later = (timezone.now() + timedelta(days=1)).date().isoformat()
+        params = {"lng": lng, "lat": 0.3, "radius_miles": 25, "since": later}
+        self.assertEqual(self.client.get("/api/trips/nearby", params).json()["trips"], [])
+        params = {"lng": lng, "lat": 0.3, "radius_miles": 500}
+        self.assertEqual(self.client.get("/api/trips/nearby", params).status_code, 400)
+
+        # The backfill command rebuilds the same index.
+        before = set(TripCorridorCell.objects.values_list("trip_id", "cell"))
+        TripCorridorCell.objects.all().delete()
+        call_command("index_trip_corridors", stdout=io.StringIO())
+        self.assertEqual(set(TripCorridorCell.objects.values_list("trip_id", "cell")), before)
+
+    @patch("apps.trips.views.get_route")
+    def test_rollups_are_updated_on_save_and_paged_by_key(self, mock_get_route):
+        mock_get_route.return_value = {
+            "distance_miles": 600.0,
+            "duration_hours": 12.0,
+            "polyline": _polyline_for_miles(600),
+        }
+        for pickup, cycle_used_hours in (("Dallas, TX", 0), ("Dallas, TX", 69), ("Austin, TX", 10)):
+            self.client.post(
+                "/api/trips/plan",
+                {"pickup_location": pickup, "dropoff_location": "Denver, CO", "cycle_used_hours": cycle_used_hours},
+                format="json",
+            )
+        plans = list(TripPlan.objects.all())
+
+        days = self.client.get("/api/trips/analytics").json()
+        self.assertEqual(len(days["results"]), 1)
+        day = days["results"][0]
+        self.assertEqual(day["day"], timezone.localdate().isoformat())
+        self.assertEqual(day["plans"], 4)
+        self.assertAlmostEqual(day["total_miles"], 1300 + 3 * 600)
+        self.assertAlmostEqual(day["driving_hours"], sum(plan.summary["driving_hours"] for plan in plans), places=1)
+        self.assertAlmostEqual(day["days_per_trip"], sum(plan.total_days for plan in plans) / 4, places=2)
+        self.assertEqual(day["noncompliant_plans"], 1)
+        expected = sum(plan.summary["cycle_remaining_hours_after"] for plan in plans) / 4
+        self.assertAlmostEqual(day["avg_cycle_remaining_hours"], expected, places=2)
+
+        lanes = []
+        url = "/api/trips/analytics?by=lane&limit=2"
+        while url:
+            page = self.client.get(url).json()
+            self.assertLessEqual(len(page["results"]), 2)
+            lanes.extend(page["results"])
+            url = page["next"]
+        self.assertEqual(
+            [(lane["lane"], lane["plans"]) for lane in lanes],
+            [("Austin, TX -> Denver, CO", 1), ("Dallas, TX -> Denver, CO", 2), ("Los Angeles, CA -> Chicago, IL", 1)],
+        )
+        self.assertEqual(lanes[1]["noncompliant_plans"], 1)
+        later = (timezone.localdate() + timedelta(days=1)).isoformat()
+        self.assertEqual(self.client.get("/api/trips/analytics", {"from": later}).json()["results"], [])
+        self.assertEqual(self.client.get("/api/trips/analytics", {"cursor": "nope"}).status_code, 400)
+
+        # The backfill rebuilds the same rows from the stored plans.
+        TripDayRollup.objects.update(plans=0, total_miles=0)
+        TripLaneRollup.objects.filter(lane__startswith="Austin").delete()
+        TripLaneRollup.objects.create(day=timezone.localdate() - timedelta(days=3), lane="gone", plans=1)
+        call_command("rebuild_trip_rollups", "--batch-size", "1", stdout=io.StringIO())
+        self.assertEqual(self.client.get("/api/trips/analytics").json()["results"], days["results"])
+        self.assertEqual(self.client.get("/api/trips/analytics?by=lane").json()["results"], lanes)
+
+    @patch("apps.trips.views.get_route")
+    def test_exports_stream_trips_stops_and_events(self, mock_get_route):
+        mock_get_route.return_value = {
+            "distance_miles": 600.0,
+            "duration_hours": 12.0,
+            "polyline": _polyline_for_miles(600),
+        }
+        data = {"pickup_location": "Dallas, TX", "dropoff_location": "Denver, CO", "cycle_used_hours": 0}
+        driver_trip = self.client.post("/api/trips/plan", {**data, "driver_id": "D-7"}, format="json").json()
+
+        def export(path, **params):
+            response = self.client.get(f"/api/trips/export/{path}", params)
+            self.assertEqual(response.status_code, 200)
+            self.assertTrue(response.streaming)
+            return b"".join(response.streaming_content).decode("utf-8")
+
+        trips = list(csv.DictReader(io.StringIO(export("trips.csv"))))
+        self.assertEqual([row["trip_id"] for row in trips], [self.plan["trip_id"], driver_trip["trip_id"]])
+        self.assertEqual(trips[1]["driver_id"], "D-7")
+        self.assertEqual(trips[1]["lane"], "Dallas, TX -> Denver, CO")
+
+        stops = list(csv.DictReader(io.StringIO(export("stops.csv", driver="D-7"))))
+        self.assertEqual([row["type"] for row in stops], [stop["type"] for stop in driver_trip["stops"]])
+
+        events = [json.loads(line) for line in export("events.ndjson").splitlines()]
+        expected = [
+            (plan["trip_id"], day["day"], event["status"], event["start_minute"], event["end_minute"])
+            for plan in (self.plan, driver_trip)
+            for day in plan["logs"]
+            for event in day["events"]
+        ]
+        self.assertEqual(
+            [(row["trip_id"], row["day"], row["status"], row["start_minute"], row["end_minute"]) for row in events],
+            expected,
+        )
+        self.assertTrue(all(row["duration_minutes"] == row["end_minute"] - row["start_minute"] for row in events))
+
+        later = (timezone.localdate() + timedelta(days=1)).isoformat()
+        self.assertEqual(export("trips.ndjson", **{"from": later}), "")
+        self.assertEqual(self.client.get("/api/trips/export/trips.xml").status_code, 404)
+        self.assertEqual(self.client.get("/api/trips/export/trips.csv", {"to": "soon"}).status_code, 400)
+
+        output = io.StringIO()
+        call_command("export_trips", "events", "--format", "ndjson", "--driver", "D-7", stdout=output)
+        self.assertEqual(
+            [json.loads(line) for line in output.getvalue().splitlines()],
+            [row for row in events if row["driver_id"] == "D-7"],
+        )
+
 
 class StopPlannerTests(TestCase):
     def _build_route(self, miles):
@@ -234,6 +668,165 @@ class StopPlannerTests(TestCase):
         self.assertEqual(stops[0].get("mile"), 0)
         self.assertEqual(stops[-1].get("mile"), round(route["distance_miles"], 2))
 
+    def test_stop_rules_place_sites_and_let_rest_areas_absorb_breaks(self):
+        route = self._build_route(1200)
+        pickup, dropoff = self._pickup_dropoff(route)
+        rules = [
+            {"type": "break", "interval_miles": 400, "eld_required": True},
+            {
+                "type": "weigh_station",
+                "sites": [
+                    {"mile": 150, "label": "Scale 1"},
+                    {"lng": 700 / MILES_PER_DEGREE, "lat": 0.02, "label": "Scale 2"},
+                ],
+                "duration_minutes": 15,
+                "duty_status": "on_duty",
+            },
+            {
+                "type": "rest_area",
+                "sites": [{"mile": 395, "label": "Rest 1"}, {"mile": 600, "label": "Rest 2"}],
+                "optional": True,
+                "absorbs": "break",
+                "combined": {"duration_minutes": 30, "duty_status": "off_duty", "eld_required": True},
+            },
+        ]
+
+        stops = plan_stops(route, pickup, dropoff, rules=rules)
+
+        self.assertEqual(
+            [(stop["type"], round(stop["mile"])) for stop in stops],
+            [("pickup", 0), ("weigh_station", 150), ("rest_area", 395), ("weigh_station", 700), ("break", 800),
+             ("dropoff", 1200)],
+        )
+        self.assertEqual(stops[2]["label"], "Rest 1")
+        self.assertTrue(stops[2]["eld_required"])
+        self.assertEqual(stops[3]["label"], "Scale 2")
+
+        logs = generate_hos_logs(route, stops)
+        remarks = {remark["label"]: remark for day in logs for remark in day["remarks"]}
+        self.assertEqual(remarks["Scale 1"]["end_minute"] - remarks["Scale 1"]["start_minute"], 15)
+        events = [event for day in logs for event in day["events"]]
+        start = remarks["Rest 1"]["start_minute"]
+        self.assertIn({"status": "off_duty", "start_minute": start, "end_minute": start + 30}, events)
+
+        path = os.path.join(_geometry_dir.name, "stop_rules.json")
+        with open(path, "w", encoding="utf-8") as handle:
+            json.dump({"carriers": {"acme": rules}}, handle)
+        self.assertEqual(load_stop_rules(path, "acme"), rules)
+        self.assertEqual(load_stop_rules(path, "other"), list(DEFAULT_STOP_RULES))
+        default_stops = plan_stops(route, pickup, dropoff)
+        self.assertEqual(plan_stops(route, pickup, dropoff, rules=load_stop_rules(path)), default_stops)
+
+    @patch("apps.trips.views.get_route_alternatives")
+    @patch("apps.trips.views.get_route")
+    def test_carrier_stop_rules_apply_on_every_planning_endpoint(self, mock_get_route, mock_alternatives):
+        route = {"distance_miles": 1300.0, "duration_hours": 26.0, "polyline": _polyline_for_miles(1300)}
+        mock_get_route.return_value = route
+        mock_alternatives.return_value = [route]
+        path = os.path.join(_geometry_dir.name, "carrier_rules.json")
+        with open(path, "w", encoding="utf-8") as handle:
+            json.dump({"carriers": {"acme": [{"type": "break", "interval_miles": 250, "eld_required": True}]}}, handle)
+        pickup, dropoff = {"label": "A", "lng": 0.0, "lat": 0.0}, {"label": "B", "lng": 1.0, "lat": 0.0}
+        data = {"pickup_location": pickup, "dropoff_location": dropoff, "cycle_used_hours": 0, "carrier": "acme"}
+
+        client = APIClient()
+        with override_settings(STOP_RULES_PATH=path):
+            plan = client.post("/api/trips/plan", data, format="json").json()
+            alternative = client.post("/api/trips/plan/alternatives", data, format="json").json()["alternatives"][0]
+            chain = client.post("/api/trips/plan/chain", {**data, "loads": [data]}, format="json").json()
+
+        self.assertEqual([stop["type"] for stop in plan["stops"]].count("break"), 5)
+        self.assertEqual(alternative["stops"], plan["stops"])
+        self.assertEqual(alternative["summary"]["total_days"], plan["summary"]["total_days"])
+        self.assertEqual(chain["logs"], plan["logs"])
+
+    @patch("apps.trips.views.get_route")
+    def _plan_with_rules_file(self, config, mock_get_route):
+        mock_get_route.return_value = {"distance_miles": 600.0, "polyline": _polyline_for_miles(600)}
+        path = os.path.join(_geometry_dir.name, "malformed_rules.json")
+        with open(path, "w", encoding="utf-8") as handle:
+            json.dump(config, handle)
+        data = {"pickup_location": "A", "dropoff_location": "B", "cycle_used_hours": 0, "carrier": "acme"}
+        with override_settings(STOP_RULES_PATH=path):
+            response = APIClient().post("/api/trips/plan", data, format="json")
+        self.assertEqual(response.status_code, 400)
+        self.assertIn("carrier", response.json())
+
+    def test_stop_rules_with_null_interval_are_rejected(self):
+        self._plan_with_rules_file({"default": [{"type": "fuel", "interval_miles": None}]})
+
+    def test_stop_rules_with_non_object_sites_are_rejected(self):
+        self._plan_with_rules_file({"default": [{"type": "scale", "sites": ["I-15 mile 40"]}]})
+
+    def test_stop_rules_with_non_numeric_site_mile_are_rejected(self):
+        self._plan_with_rules_file({"carriers": {"acme": [{"type": "scale", "sites": [{"mile": "x"}]}]}})
+
+    def test_stop_rules_file_must_be_an_object(self):
+        self._plan_with_rules_file([{"type": "fuel", "interval_miles": 500}])
+
+    def test_fuel_stop_miles_are_clamped_to_route_distance(self):
+        # The polyline runs 1010 miles but the router reported 1000.
+        route = {"distance_miles": 1000.0, "polyline": _polyline_for_miles(1010, step_miles=10)}
+        stations = [("Start", 0.0, 0.0, 3.0), ("Past the end", 1008 / MILES_PER_DEGREE, 0.0, 2.0)]
+
+        stops, summary = plan_fuel_stops(route, stations, tank_range_miles=1100, start_fuel_fraction=0.0)
+
+        self.assertEqual([(stop["label"], stop["mile"]) for stop in stops], [("Start", 0.0)])
+        self.assertEqual(summary["gallons"], round(1000 / 6.5, 1))
+
+    @patch("apps.trips.views.get_route")
+    def test_fuel_planning_buys_cheapest_fuel_and_merges_with_breaks(self, mock_get_route):
+        mock_get_route.return_value = {
+            "distance_miles": 2400,
+            "duration_hours": 48,
+            "polyline": _polyline_for_miles(2400, step_miles=20),
+        }
+        path = os.path.join(_geometry_dir.name, "fuel_stations.csv")
+        with open(path, "w", encoding="utf-8") as handle:
+            handle.write("name,lng,lat,price\n")
+            for name, mile, lat, price in (
+                ("Near break", 390, 0.01, 3.0),
+                ("Pricey", 600, 0.0, 5.0),
+                ("Mid", 950, -0.01, 4.0),
+                ("Cheap", 1500, 0.0, 3.5),
+                ("Off corridor", 1700, 1.0, 1.0),
+                ("Late", 2000, 0.0, 4.5),
+            ):
+                handle.write(f"{name},{mile / MILES_PER_DEGREE},{lat},{price}\n")
+
+        with override_settings(FUEL_STATIONS_PATH=path):
+            response = APIClient().post(
+                "/api/trips/plan",
+                {
+                    "pickup_location": "A",
+                    "dropoff_location": "B",
+                    "fuel_planning": {"tank_range_miles": 1000, "mpg": 10, "start_fuel_fraction": 0.5},
+                },
+                format="json",
+            )
+
+        self.assertEqual(response.status_code, 200)
+        body = response.json()
+        fuel = [stop for stop in body["stops"] if stop["type"] == "fuel"]
+        # 500 miles on board: fill up at the cheap first station, top up at
+        # Mid just enough to reach Cheap, then buy the rest there.
+        self.assertEqual([stop["label"] for stop in fuel], ["Near break", "Mid", "Cheap"])
+        for stop, gallons in zip(fuel, (89, 11, 90)):
+            self.assertAlmostEqual(stop["gallons"], gallons, delta=0.1)
+        self.assertTrue(fuel[0]["combined_break"])
+        self.assertNotIn(400, [stop["mile"] for stop in body["stops"] if stop["type"] == "break"])
+        fuel_plan = body["summary"]["fuel_plan"]
+        self.assertEqual((fuel_plan["stations_in_corridor"], fuel_plan["purchases"]), (5, 3))
+        self.assertAlmostEqual(fuel_plan["fuel_cost"], 89 * 3.0 + 11 * 4.0 + 90 * 3.5, delta=1)
+
+        with override_settings(FUEL_STATIONS_PATH=path):
+            short_range = APIClient().post(
+                "/api/trips/plan",
+                {"pickup_location": "A", "dropoff_location": "B", "fuel_planning": {"tank_range_miles": 300}},
+                format="json",
+            )
+        self.assertEqual(short_range.status_code, 400)
+
 
 class HosEngineTests(TestCase):
     def _route(self, distance_miles):
@@ -392,8 +985,188 @@ class HosEngineTests(TestCase):
         self.assertEqual(combined["reason"], "Fuel + 30-min break")
         self.assertEqual(combined["end_minute"] - combined["start_minute"], 45)
 
+    def test_iter_hos_logs_yields_each_day_as_it_closes_with_running_totals(self):
+        route = self._route(2500)
+        stops = [
+            {"type": "pickup", "lng": -118.2, "lat": 34.0, "mile": 0},
+            {"type": "dropoff", "lng": -74.0, "lat": 40.7, "mile": 2500},
+        ]
+        aggregates = {}
+        days = iter_hos_logs(route, stops, aggregates)
+
+        first_day = next(days)
+        self.assertEqual(first_day["day"], 1)
+        self.assertEqual(aggregates["days"], 1)
+        self.assertLess(aggregates["driving_minutes"], _miles_to_minutes(2500))
+
+        remaining = list(days)
+        expected = generate_hos_logs(route, stops)
+        self.assertEqual([first_day] + remaining, expected)
+        self.assertEqual(aggregates["days"], len(expected))
+        self.assertEqual(aggregates["driving_minutes"], _miles_to_minutes(2500))
+        self.assertEqual(
+            aggregates["driving_minutes"] + aggregates["on_duty_minutes"] + aggregates["off_duty_minutes"],
+            len(expected) * 24 * 60,
+        )
+
+    def test_aggregates_include_day_totals_and_ordered_timeline(self):
+        route = {"distance_miles": 1300, "duration_hours": 26.0, "polyline": _polyline_for_miles(1300)}
+        stops = [
+            {"type": "pickup", "lng": -118.2, "lat": 34.0, "mile": 0},
+            {"type": "break", "lng": -117.0, "lat": 34.5, "mile": 400},
+            {"type": "dropoff", "lng": -114.5, "lat": 36.3, "mile": 1300},
+        ]
+        aggregates = {}
+
+        logs = generate_hos_logs(route, stops, aggregates=aggregates)
+
+        self.assertEqual([totals["day"] for totals in aggregates["day_totals"]], [day["day"] for day in logs])
+        for day, totals in zip(logs, aggregates["day_totals"]):
+            self.assertEqual(sum(totals.values()) - totals["day"], 24 * 60)
+        timeline = aggregates["timeline"]
+        self.assertEqual(len(timeline), sum(len(day["remarks"]) for day in logs))
+        self.assertEqual(timeline, sorted(timeline, key=lambda item: (item["day"], item["minute"])))
+        self.assertIn("eld_limit", [item["type"] for item in timeline])
+
+    def test_timeline_memo_size_follows_settings(self):
+        timeline_memo.clear()
+        route = {"distance_miles": 900, "polyline": _polyline_for_miles(900)}
+        with override_settings(HOS_TIMELINE_MEMO_SIZE=0):
+            generate_hos_logs(route, [{"type": "pickup", "mile": 0}, {"type": "dropoff", "mile": 900}])
+            self.assertEqual(timeline_memo.stats()["size"], 0)
+            self.assertEqual(timeline_memo.stats()["maxsize"], 0)
+
+        self.assertEqual(timeline_memo.stats()["maxsize"], settings.HOS_TIMELINE_MEMO_SIZE)
+
+    def test_memoized_timeline_is_reused_with_per_request_coordinates(self):
+        timeline_memo.clear()
+        east = {"distance_miles": 1300, "polyline": _polyline_for_miles(1300)}
+        north = {"distance_miles": 1300, "polyline": [[lng, 10.0] for lng, _ in _polyline_for_miles(1300)]}
+
+        def stops_for(route, label):
+            first, last = route["polyline"][0], route["polyline"][-1]
+            return [
+                {"type": "pickup", "lng": first[0], "lat": first[1], "mile": 0, "label": label},
+                {"type": "dropoff", "lng": last[0], "lat": last[1], "mile": 1300, "label": "Las Vegas"},
+            ]
+
+        # Streaming without memoize does not buffer or store the timeline.
+        streamed = list(iter_hos_logs(east, stops_for(east, "Barstow"), memoize=False))
+        self.assertEqual(timeline_memo.stats()["size"], 0)
+
+        first = generate_hos_logs(east, stops_for(east, "Barstow"))
+        self.assertEqual(streamed, first)
+        second = generate_hos_logs(north, stops_for(north, "Denver"))
+
+        self.assertEqual(timeline_memo.stats()["hits"], 1)
+        self.assertEqual(timeline_memo.stats()["size"], 1)
+        self.assertEqual([day["events"] for day in first], [day["events"] for day in second])
+        self.assertEqual(first[0]["remarks"][0]["label"], "Barstow")
+        self.assertEqual(second[0]["remarks"][0]["label"], "Denver")
+        eld_lats = [
+            remark["lat"]
+            for logs in (first, second)
+            for day in logs
+            for remark in day["remarks"]
+            if remark["stop_type"] == "eld_limit"
+        ]
+        self.assertEqual(eld_lats[0], 0.0)
+        self.assertEqual(eld_lats[-1], 10.0)
+
+    def test_start_state_offsets_day_one_and_carries_used_clocks(self):
+        route = self._route(1300)
+        stops = plan_stops(dict(route, polyline=_polyline_for_miles(1300)), {"label": "A"}, {"label": "B"})
+
+        logs = generate_hos_logs(route, stops, start=(600, 180, 240))
+
+        first_day = logs[0]["events"]
+        self.assertEqual(first_day[0], {"status": "off_duty", "start_minute": 0, "end_minute": 600})
+        self.assertEqual(logs[0]["remarks"][0]["minute"], 600)
+        driving = sum(e["end_minute"] - e["start_minute"] for e in first_day if e["status"] == "driving")
+        self.assertEqual(driving, 11 * 60 - 180)
+        for day in logs:
+            self._assert_day_is_24h(day)
+        self.assertNotEqual(logs, generate_hos_logs(route, stops))
+
+    def test_departure_search_matches_exhaustive_evaluation(self):
+        route = {"distance_miles": 2400, "polyline": _polyline_for_miles(2400, step_miles=20)}
+        stops = plan_stops(route, {"label": "A"}, {"label": "B"})
+        minutes = departure_minutes(step=60)
+        clocks = [(0, 0), (300, 420)]
+
+        def outcome(minute, clock):
+            logs = generate_hos_logs(route, stops, start=(minute, *clock))
+            last = [e for e in logs[-1]["events"] if e["status"] != "off_duty"][-1]
+            arrival = (len(logs) - 1) * 1440 + last["end_minute"]
+            return len(logs), arrival, minute, clock
+
+        exhaustive = [outcome(minute, clock) for minute in minutes for clock in clocks]
+        for objective, key in (
+            ("days", lambda o: (o[0], o[1] - o[2], o[1], o[2])),
+            ("arrival", lambda o: (o[1], o[0], o[1] - o[2], o[2])),
+        ):
+            result = search_departures(route, stops, minutes, clocks, objective)
+            days, arrival, minute, clock = min(exhaustive, key=key)
+            best = result["best"]
+            self.assertEqual((best["total_days"], best["arrival"]), (days, arrival))
+            self.assertEqual((best["departure_minute"], best["driving_minutes_used"]), (minute, clock[0]))
+            self.assertEqual(result["evaluated"] + result["pruned"], len(minutes) * len(clocks))
+            self.assertGreater(result["pruned"], 0)
+
+    def test_chained_loads_match_one_continuous_simulation(self):
+        trips = []
+        for miles in (900, 300, 1500):
+            route = {"distance_miles": miles, "polyline": _polyline_for_miles(miles, step_miles=20)}
+            trips.append((route, plan_stops(route, {"label": "A"}, {"label": "B"})))
+
+        schedule = DriverSchedule(hos_clock(minute=420, cycle_used_minutes=50 * 60))
+        ops = ()
+        with patch("utils.hos_schedule.iter_hos_logs", wraps=iter_hos_logs) as mock_iter_hos_logs:
+            for idx, (route, stops) in enumerate(trips):
+                days_before = [dict(day) for day in schedule.days[:-1]]
+                schedule.append_load(route, stops, rest_minutes=120 * idx)
+                self.assertEqual(schedule.days[:len(days_before)], days_before)
+                ops += ((("off_duty", 120 * idx),) if idx else ()) + _duty_ops(route, stops)[0]
+        self.assertEqual(mock_iter_hos_logs.call_count, 3)
+
+        continuous = [[list(event) for event in day[1]] for day in _simulate(ops, (420, 0, 0))]
+        chained = [
+            [[event["status"], event["start_minute"], event["end_minute"]] for event in day["events"]]
+            for day in schedule.days
+        ]
+        self.assertEqual(chained, continuous)
+        for day in schedule.days:
+            self._assert_day_is_24h(day)
+
+        clock = schedule.clock
+        self.assertEqual(clock["day"], schedule.days[-1]["day"])
+        self.assertEqual(clock["cycle_used_minutes"], sum(clock["prior_on_duty_minutes"]) + clock["shift_minutes"])
+        self.assertTrue(schedule.loads[-1]["cycle_limit_exceeded"])
+        self.assertFalse(schedule.loads[0]["cycle_limit_exceeded"])
+
 
 class SummaryMetricsTests(TestCase):
+    def test_compute_summary_metrics_uses_engine_driving_total_without_rescan(self):
+        summary = compute_summary_metrics(None, 10, driving_minutes=480)
+
+        self.assertEqual(summary["driving_hours"], 8.0)
+        self.assertEqual(summary["cycle_remaining_hours_after"], 52.0)
+
+    @patch("apps.trips.views._build_timeline_stops")
+    def test_plan_view_consumes_engine_timeline(self, mock_build_timeline_stops):
+        response = APIClient().post(
+            "/api/trips/plan",
+            {"pickup_location": "Barstow, CA", "dropoff_location": "Las Vegas, NV", "cycle_used_hours": 0},
+            format="json",
+        )
+
+        self.assertEqual(response.status_code, 200)
+        mock_build_timeline_stops.assert_not_called()
+        self.assertEqual(
+            [stop["type"] for stop in response.json()["timeline_stops"]],
+            ["pickup", "break", "dropoff"],
+        )
+
     def test_compute_summary_metrics_non_compliant_when_cycle_exceeds_70(self):
         days = [
             {
@@ -431,3 +1204,660 @@ class SummaryMetricsTests(TestCase):
         self.assertEqual(summary["hos_reasons"], [])
         self.assertEqual(summary["cycle_remaining_hours_before"], 60.0)
         self.assertEqual(summary["cycle_remaining_hours_after"], 52.0)
+
+    def test_cycle_sweep_matches_per_value_summary_metrics(self):
+        values = [round(step * 0.25, 2) for step in range(281)]
+        driving_minutes = 1234
+
+        sweep = cycle_sweep(driving_minutes, values)
+
+        for idx, cycle_used in enumerate(values):
+            metrics = compute_summary_metrics([], cycle_used, driving_minutes=driving_minutes)
+            self.assertEqual(sweep["hos_compliant"][idx], metrics["hos_compliant"])
+            self.assertEqual(sweep["cycle_remaining_hours_before"][idx], metrics["cycle_remaining_hours_before"])
+            self.assertEqual(sweep["cycle_remaining_hours_after"][idx], metrics["cycle_remaining_hours_after"])
+
+    def test_cycle_sweep_endpoint_simulates_once(self):
+        client = APIClient()
+        with patch("apps.trips.views.iter_hos_logs", wraps=iter_hos_logs) as mock_iter_hos_logs:
+            response = client.post(
+                "/api/trips/plan/cycle-sweep",
+                {
+                    "pickup_location": "Barstow, CA",
+                    "dropoff_location": "Las Vegas, NV",
+                    "cycle_used_from": 50,
+                    "cycle_used_to": 70,
+                    "cycle_used_step": 0.5,
+                },
+                format="json",
+            )
+
+        self.assertEqual(response.status_code, 200)
+        mock_iter_hos_logs.assert_called_once()
+        body = response.json()
+        sweep = body["sweep"]
+        self.assertEqual(len(sweep["cycle_used_hours"]), 41)
+        self.assertEqual(sweep["cycle_used_hours"][-1], 70)
+        feasible = [value for value, ok in zip(sweep["cycle_used_hours"], sweep["hos_compliant"]) if ok]
+        self.assertEqual(max(feasible), math.floor(body["max_cycle_used_hours"] * 2) / 2)
+        self.assertFalse(sweep["hos_compliant"][-1])
+
+        bad = client.post("/api/trips/plan/cycle-sweep", {"cycle_used_hours": [10, 71]}, format="json")
+        self.assertEqual(bad.status_code, 400)
+
+
+class AssignmentTests(TestCase):
+    def test_min_cost_assignment_matches_brute_force(self):
+        cost = [
+            [7, 3, 9, 4, 8],
+            [2, 6, 5, 9, 1],
+            [8, 4, 3, 2, 7],
+            [5, 9, 6, 3, 4],
+        ]
+        assigned = min_cost_assignment(cost)
+
+        best = min(sum(row[col] for row, col in zip(cost, cols)) for cols in itertools.permutations(range(5), 4))
+        self.assertEqual(len(set(assigned)), 4)
+        self.assertEqual(sum(cost[row][col] for row, col in enumerate(assigned)), best)
+
+    def test_assignment_endpoint_skips_pairs_that_fail_hos_screen(self):
+        def driver(driver_id, lng, cycle_used_hours=0):
+            return {"id": driver_id, "location": {"lng": lng, "lat": 35.0}, "cycle_used_hours": cycle_used_hours}
+
+        def load(load_id, lng):
+            return {
+                "id": load_id,
+                "pickup_location": {"lng": lng, "lat": 35.0},
+                "dropoff_location": {"lng": lng + 8, "lat": 35.0},
+            }
+
+        response = APIClient().post(
+            "/api/trips/assignments",
+            {
+                "drivers": [driver("near-a", -100.1), driver("near-b", -90.1), driver("tired", -100.0, 69)],
+                "loads": [load("a", -100.0), load("b", -90.0)],
+            },
+            format="json",
+        )
+
+        self.assertEqual(response.status_code, 200)
+        body = response.json()
+        pairs = {(item["driver_id"], item["load_id"]) for item in body["assignments"]}
+        self.assertEqual(pairs, {("near-a", "a"), ("near-b", "b")})
+        self.assertEqual(body["unassigned_drivers"], ["tired"])
+        self.assertEqual((body["pairs_screened"], body["pairs_feasible"]), (6, 4))
+        for item in body["assignments"]:
+            self.assertLess(item["deadhead_miles"], 10)
+            self.assertGreater(item["driving_hours"], 8)
+
+        bad = APIClient().post("/api/trips/assignments", {"drivers": [], "loads": []}, format="json")
+        self.assertEqual(bad.status_code, 400)
+
+
+def _eld_csv(rows):
+    lines = ["driver_id,status,start,end"]
+    start = 0
+    for driver, status, minutes in rows:
+        if status is None:
+            start += minutes
+            continue
+        lines.append(f"{driver},{status},{start * 60},{(start + minutes) * 60}")
+        start += minutes
+    return lines
+
+
+class EldAuditTests(TestCase):
+    def test_detects_each_rule_once_per_episode(self):
+        day = [("on_duty", 60), ("driving", 240), ("off_duty", 30), ("driving", 420), ("sleeper", 600)]
+        lines = _eld_csv(
+            [("compliant", status, minutes) for status, minutes in day * 2]
+            + [("long_day", "on_duty", 60), ("long_day", "driving", 720), ("long_day", "off_duty", 600)]
+            + [("no_break", "driving", 300), ("no_break", "on_duty", 20), ("no_break", "driving", 300)]
+            + [("no_break", "off_duty", 600)]
+            + [("late", "on_duty", 600), ("late", "driving", 300), ("late", "off_duty", 600)]
+        )
+        lines.append("compliant,teleporting,0,60")
+
+        reports, rejected = audit_eld_csv(lines, chunk_rows=3)
+        reports = {report["driver_id"]: report for report in reports}
+
+        self.assertEqual(rejected, 1)
+        self.assertEqual(reports["compliant"]["violations"], [])
+        self.assertEqual(reports["compliant"]["duty_minutes"]["driving"], 1320)
+        self.assertEqual(
+            [(v["rule"], v["excess_minutes"]) for v in reports["long_day"]["violations"]],
+            [("driving_11h", 60), ("break_30m", 240)],
+        )
+        self.assertEqual([v["rule"] for v in reports["no_break"]["violations"]], ["break_30m"])
+        self.assertEqual(reports["no_break"]["violations"][0]["excess_minutes"], 120)
+        self.assertEqual(reports["late"]["violation_counts"]["window_14h"], 1)
+        self.assertEqual(reports["late"]["violations"][0]["excess_minutes"], 60)
+
+    def test_cycle_limit_counts_on_duty_in_rolling_eight_days_until_restart(self):
+        shift = [("on_duty", 120), ("driving", 240), ("off_duty", 30), ("driving", 240), ("off_duty", 600)]
+        rows = [("driver", status, minutes) for status, minutes in shift * 7]
+        rows += [("driver", None, 12 * 60), ("driver", "on_duty", 60)]
+        rows += [("driver", status, minutes) for status, minutes in shift * 2]
+        reports, _ = audit_eld_csv(_eld_csv(rows))
+        report = next(reports)
+
+        self.assertEqual(report["violation_counts"]["cycle_70h"], 1)
+        # 70 hours by day 7, then one more hour and two more 10-hour shifts.
+        self.assertEqual(report["violations"][0]["excess_minutes"], 60 + 2 * 600)
+
+        rows = [("driver", status, minutes) for status, minutes in shift * 7]
+        rows += [("driver", None, 34 * 60)]
+        rows += [("driver", status, minutes) for status, minutes in shift * 2]
+        self.assertEqual(next(audit_eld_csv(_eld_csv(rows))[0])["violation_counts"]["cycle_70h"], 0)
+
+    def test_command_writes_one_report_line_per_driver(self):
+        path = os.path.join(_geometry_dir.name, "eld.csv")
+        with open(path, "w", encoding="utf-8") as handle:
+            handle.write("\n".join(_eld_csv([("a", "driving", 700), ("b", "driving", 60)])))
+        output = io.StringIO()
+
+        call_command("audit_eld_logs", path, "--violations-only", stdout=output, stderr=io.StringIO())
+
+        lines = output.getvalue().splitlines()
+        self.assertEqual(len(lines), 1)
+        self.assertEqual(json.loads(lines[0])["driver_id"], "a")
+
+
+class SyntheticRouteTests(TestCase):
+    pickup = {"label": "Los Angeles, CA", "lng": -118.2437, "lat": 34.0522}
+    dropoff = {"label": "New York, NY", "lng": -74.0060, "lat": 40.7128}
+
+    def test_synthetic_route_connects_real_endpoints_with_requested_density(self):
+        route = get_synthetic_route(self.pickup, self.dropoff, num_points=5000, road_factor=1.0)
+
+        self.assertEqual(len(route["polyline"]), 5000)
+        self.assertEqual(route["polyline"][0], [self.pickup["lng"], self.pickup["lat"]])
+        self.assertEqual(route["polyline"][-1], [self.dropoff["lng"], self.dropoff["lat"]])
+        self.assertAlmostEqual(route["distance_miles"], 2445.6, delta=5)
+
+    def test_synthetic_route_length_matches_road_factor(self):
+        route = get_synthetic_route(self.pickup, self.dropoff, points_per_mile=2, road_factor=1.25)
+        polyline = route["polyline"]
+        polyline_miles = sum(_haversine_miles(a, b) for a, b in zip(polyline, polyline[1:]))
+
+        self.assertGreater(len(polyline), 4000)
+        self.assertAlmostEqual(polyline_miles / route["distance_miles"], 1.0, delta=0.01)
+
+    def test_get_route_uses_synthetic_backend_when_configured(self):
+        with patch.dict("os.environ", {"ROUTE_BACKEND": "synthetic", "SYNTHETIC_ROUTE_POINTS_PER_MILE": "0.5"}):
+            route = get_route(self.pickup, self.dropoff)
+
+        self.assertGreater(route["distance_miles"], 2445)
+        self.assertGreater(len(route["polyline"]), 1000)
+
+
+class OrsStreamParseTests(TestCase):
+    def _geojson_body(self, coordinates):
+        return json.dumps(
+            {
+                "type": "FeatureCollection",
+                "bbox": [-118.2, 34.0, -115.1, 36.1],
+                "features": [
+                    {
+                        "type": "Feature",
+                        "properties": {
+                            "segments": [{"steps": [{"instruction": "Head \"north\" on I-15", "name": "Caf\u00e9"}]}],
+                            "summary": {"distance": 701686.3, "duration": 27000.0},
+                            "way_points": [0, len(coordinates) - 1],
+                        },
+                        "geometry": {"coordinates": coordinates, "type": "LineString"},
+                    }
+                ],
+                "metadata": {"query": {"coordinates": [[0, 0], [1, 1]]}, "cached": True, "engine": None},
+            },
+            indent=1,
+        ).encode("utf-8")
+
+    def test_geojson_coordinates_are_parsed_into_packed_buffer_across_chunks(self):
+        coordinates = _polyline_for_miles(2500, step_miles=5)
+        body = self._geojson_body(coordinates)
+
+        for chunk_size in (1, 7, 4096):
+            routes = parse_ors_directions(io.BytesIO(body), chunk_size=chunk_size)
+            self.assertEqual(len(routes), 1)
+            self.assertEqual(routes[0]["distance"], 701686.3)
+            self.assertEqual(routes[0]["duration"], 27000.0)
+            self.assertIsInstance(routes[0]["coordinates"], PackedPolyline)
+            self.assertEqual(routes[0]["coordinates"].tolist(), coordinates)
+
+    def test_encoded_route_geometry_is_decoded_incrementally(self):
+        body = json.dumps(
+            {
+                "routes": [
+                    {
+                        "summary": {"distance": 1000.0, "duration": 60.0},
+                        "geometry": "_p~iF~ps|U_ulLnnqC_mqNvxq`@",
+                        "way_points": [0, 2],
+                    }
+                ]
+            }
+        ).encode("utf-8")
+
+        routes = parse_ors_directions(io.BytesIO(body), chunk_size=3)
+
+        self.assertEqual(
+            routes[0]["coordinates"].tolist(),
+            [[-120.2, 38.5], [-120.95, 40.7], [-126.453, 43.252]],
+        )
+
+    @patch("utils.route_service.request.urlopen")
+    def test_get_route_streams_ors_response_into_plan(self, mock_urlopen):
+        coordinates = _polyline_for_miles(436, step_miles=2)
+        mock_urlopen.return_value = io.BytesIO(self._geojson_body(coordinates))
+        pickup = {"label": "A", "lng": coordinates[0][0], "lat": coordinates[0][1]}
+        dropoff = {"label": "B", "lng": coordinates[-1][0], "lat": coordinates[-1][1]}
+
+        with patch.dict("os.environ", {"ORS_API_KEY": "test-key", "ROUTE_BACKEND": "ors"}):
+            route = get_route(pickup, dropoff)
+        stops = plan_stops(route, pickup, dropoff)
+
+        self.assertEqual(route["distance_miles"], 436.01)
+        self.assertEqual(len(route["polyline"]), len(coordinates))
+        self.assertEqual([stop["type"] for stop in stops], ["pickup", "break", "dropoff"])
+        self.assertEqual(json.loads(json.dumps(route["polyline"].tolist())), coordinates)
+
+    @patch("utils.route_service.request.urlopen")
+    def test_alternative_routes_come_from_one_request_and_are_ranked_by_hos_outcome(self, mock_urlopen):
+        lanes = [_polyline_for_miles(miles, step_miles=5) for miles in (1300, 700, 1250)]
+        body = json.loads(self._geojson_body(lanes[0]))
+        body["features"] = [
+            {**body["features"][0], "geometry": {"type": "LineString", "coordinates": coordinates}}
+            for coordinates in lanes
+        ]
+        for feature, miles in zip(body["features"], (1300, 700, 1250)):
+            feature["properties"] = {**feature["properties"], "summary": {"distance": miles * 1609.344, "duration": 1}}
+        mock_urlopen.return_value = io.BytesIO(json.dumps(body).encode("utf-8"))
+        pickup = {"label": "A", "lng": 0.0, "lat": 0.0}
+        dropoff = {"label": "B", "lng": lanes[0][-1][0], "lat": 0.0}
+
+        with patch.dict("os.environ", {"ORS_API_KEY": "test-key", "ROUTE_BACKEND": "ors"}):
+            response = APIClient().post(
+                "/api/trips/plan/alternatives",
+                {"pickup_location": pickup, "dropoff_location": dropoff, "cycle_used_hours": 10},
+                format="json",
+            )
+
+        self.assertEqual(mock_urlopen.call_count, 1)
+        sent = json.loads(mock_urlopen.call_args.args[0].data)
+        self.assertEqual(sent["alternative_routes"]["target_count"], 3)
+        self.assertEqual(response.status_code, 200)
+        alternatives = response.json()["alternatives"]
+        self.assertEqual([item["route_index"] for item in alternatives], [1, 2, 0])
+        self.assertEqual([item["rank"] for item in alternatives], [1, 2, 3])
+        self.assertEqual(alternatives[0]["summary"]["total_miles"], 700)
+        self.assertLessEqual(alternatives[0]["summary"]["total_days"], alternatives[1]["summary"]["total_days"])
+        self.assertEqual(len(alternatives[2]["route"]["polyline"]), len(lanes[0]))
+
+
+    @patch("utils.route_service.request.urlopen")
+    def test_rejected_alternatives_request_is_retried_as_a_single_route(self, mock_urlopen):
+        coordinates = _polyline_for_miles(790, step_miles=5)
+        rejected = error.HTTPError("https://ors.test", 400, "Bad Request", None, io.BytesIO(b"{}"))
+        mock_urlopen.side_effect = [rejected, io.BytesIO(self._geojson_body(coordinates))]
+        pickup = {"label": "Chicago", "lng": 0.0, "lat": 0.0}
+        dropoff = {"label": "New York", "lng": coordinates[-1][0], "lat": 0.0}
+
+        with patch.dict("os.environ", {"ORS_API_KEY": "test-key", "ROUTE_BACKEND": "ors"}):
+            response = APIClient().post(
+                "/api/trips/plan/alternatives",
+                {"pickup_location": pickup, "dropoff_location": dropoff, "cycle_used_hours": 10},
+                format="json",
+            )
+
+        self.assertEqual(mock_urlopen.call_count, 2)
+        self.assertIn("alternative_routes", json.loads(mock_urlopen.call_args_list[0].args[0].data))
+        self.assertNotIn("alternative_routes", json.loads(mock_urlopen.call_args_list[1].args[0].data))
+        self.assertEqual(response.status_code, 200)
+        alternatives = response.json()["alternatives"]
+        self.assertEqual(len(alternatives), 1)
+        self.assertEqual(alternatives[0]["summary"]["total_miles"], 436.01)
+        self.assertEqual(len(alternatives[0]["route"]["polyline"]), len(coordinates))
+
+        mock_urlopen.side_effect = error.URLError("unreachable")
+        with patch.dict("os.environ", {"ORS_API_KEY": "test-key", "ROUTE_BACKEND": "ors"}):
+            response = APIClient().post(
+                "/api/trips/plan/alternatives",
+                {"pickup_location": pickup, "dropoff_location": dropoff, "cycle_used_hours": 10},
+                format="json",
+            )
+
+        self.assertEqual(response.status_code, 502)
+
+
+    @patch("apps.trips.views.get_route_alternatives")
+    def test_alternatives_count_must_be_an_integer(self, mock_alternatives):
+        pickup, dropoff = {"label": "A", "lng": 0.0, "lat": 0.0}, {"label": "B", "lng": 1.0, "lat": 0.0}
+        client = APIClient()
+        for count in (2.5, "2.5", "two", True, 0, 4):
+            response = client.post(
+                "/api/trips/plan/alternatives",
+                {"pickup_location": pickup, "dropoff_location": dropoff, "alternatives": count},
+                format="json",
+            )
+            self.assertEqual(response.status_code, 400, count)
+            self.assertIn("alternatives", response.json())
+        mock_alternatives.assert_not_called()
+
+
+class GeometryStoreTests(TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmpdir.cleanup)
+        self.path = os.path.join(self.tmpdir.name, "routes.bin")
+
+    def test_appended_geometry_is_read_back_from_mmap(self):
+        polyline = _polyline_for_miles(2200, step_miles=7)
+        store = GeometryStore(self.path)
+        first = store.append(polyline)
+        second = store.append(polyline[:5], typecode="f")
+
+        reopened = GeometryStore(self.path)
+        geometry = reopened.read(first)
+        compact = reopened.read(second)
+
+        self.assertIsInstance(geometry.coords, memoryview)
+        self.assertEqual(geometry.tolist(), polyline)
+        self.assertEqual(len(compact), 5)
+        self.assertAlmostEqual(compact[-1][0], polyline[4][0], places=5)
+        self.assertAlmostEqual(
+            geometry.cumulative_miles[-1],
+            sum(_haversine_miles(a, b) for a, b in zip(polyline, polyline[1:])),
+        )
+
+    def test_plan_stops_and_hos_logs_use_mapped_geometry_directly(self):
+        polyline = _polyline_for_miles(2200, step_miles=7)
+        store = GeometryStore(self.path)
+        mapped = store.read(store.append(polyline))
+        list_route = {"distance_miles": 2200, "duration_hours": 44.0, "polyline": polyline}
+        mapped_route = dict(list_route, polyline=mapped)
+        pickup = {"label": "pickup", "lng": polyline[0][0], "lat": polyline[0][1]}
+        dropoff = {"label": "dropoff", "lng": polyline[-1][0], "lat": polyline[-1][1]}
+
+        expected = plan_stops(list_route, pickup, dropoff)
+        stops = plan_stops(mapped_route, pickup, dropoff)
+
+        self.assertEqual([stop["mile"] for stop in stops], [stop["mile"] for stop in expected])
+        for stop, expected_stop in zip(stops, expected):
+            self.assertAlmostEqual(stop["lng"], expected_stop["lng"], places=9)
+        for mile in (0, 3.5, 400, 1999.99, 5000):
+            point = get_point_at_distance(mapped, mile)
+            expected_point = get_point_at_distance(polyline, mile)
+            self.assertAlmostEqual(point[0], expected_point[0], places=9)
+
+        logs = generate_hos_logs(mapped_route, stops)
+        limit_remark = next(
+            remark for day in logs for remark in day["remarks"] if remark["stop_type"] == "eld_limit"
+        )
+        self.assertIsNotNone(limit_remark["lng"])
+
+
+class RouteProjectionTests(TestCase):
+    def test_segment_index_matches_linear_scan(self):
+        route = get_synthetic_route({"lng": -118.24, "lat": 34.05}, {"lng": -74.0, "lat": 40.71}, points_per_mile=0.5)
+        polyline = PackedPolyline.from_points(route["polyline"])
+        index = SegmentIndex(polyline)
+        coords = polyline.coords
+
+        def linear(lng, lat):
+            scale = math.cos(math.radians(lat))
+            best = None
+            for idx in range(len(polyline) - 1):
+                ax, ay = coords[2 * idx] * scale, coords[2 * idx + 1]
+                dx, dy = coords[2 * idx + 2] * scale - ax, coords[2 * idx + 3] - ay
+                length2 = dx * dx + dy * dy
+                t = max(0.0, min(1.0, ((lng * scale - ax) * dx + (lat - ay) * dy) / length2)) if length2 else 0.0
+                dist = math.hypot(lng * scale - ax - t * dx, lat - ay - t * dy) * MILES_PER_DEGREE
+                if best is None or dist < best:
+                    best = dist
+            return best if best <= 10 else None
+
+        for step in range(0, len(polyline), 37):
+            for d_lng, d_lat in ((0.0, 0.0), (0.05, -0.08), (-0.12, 0.1), (0.4, 0.4)):
+                lng, lat = polyline[step][0] + d_lng, polyline[step][1] + d_lat
+                projected = index.project(lng, lat)
+                expected = linear(lng, lat)
+                if expected is None:
+                    self.assertIsNone(projected)
+                else:
+                    self.assertAlmostEqual(projected[1], expected, places=9)
+
+        route_mile, offset = index.project(*polyline[len(polyline) // 2])
+        self.assertAlmostEqual(route_mile, polyline.cumulative_miles[len(polyline) // 2], places=6)
+        self.assertAlmostEqual(offset, 0.0, places=9)
+
+    def test_geohash_cells_cover_polyline_and_radius(self):
+        self.assertEqual(encode(-5.6, 42.6, 5), "ezs42")
+        self.assertEqual(encode(10.40744, 57.64911, 11), "u4pruydqqvj")
+
+        route = get_synthetic_route({"lng": -118.24, "lat": 34.05}, {"lng": -74.0, "lat": 40.71}, points_per_mile=0.02)
+        polyline = route["polyline"]
+        cells = polyline_cells(polyline, 4)
+        for idx in range(len(polyline) - 1):
+            (lng1, lat1), (lng2, lat2) = polyline[idx][:2], polyline[idx + 1][:2]
+            for step in range(51):
+                t = step / 50
+                self.assertIn(encode(lng1 + (lng2 - lng1) * t, lat1 + (lat2 - lat1) * t, 4), cells)
+
+        width, height = cell_degrees(4)
+        around = radius_cells(-97.0, 40.0, 30, 4)
+        for d_lng, d_lat in itertools.product((-0.55, 0.0, 0.55), (-0.43, 0.0, 0.43)):
+            self.assertIn(encode(-97.0 + d_lng, 40.0 + d_lat, 4), around)
+        self.assertLessEqual(len(around), (2 * 0.56 / width + 2) * (2 * 0.44 / height + 2))
+
+
+class PlanJobTests(TestCase):
+    payload = {
+        "current_location": "Los Angeles, CA",
+        "pickup_location": "Barstow, CA",
+        "dropoff_location": "Las Vegas, NV",
+        "cycle_used_hours": 12,
+    }
+
+    def setUp(self):
+        self.client = APIClient()
+
+    def test_async_plan_returns_job_and_worker_publishes_result(self):
+        response = self.client.post("/api/trips/plan?async=1", self.payload, format="json")
+
+        self.assertEqual(response.status_code, 202)
+        job_id = response.json()["job_id"]
+        self.assertTrue(response.json()["status_url"].endswith(f"/api/trips/jobs/{job_id}"))
+        self.assertEqual(self.client.get(f"/api/trips/jobs/{job_id}").json()["status"], "queued")
+
+        job = claim_next_job("test-worker")
+        self.assertEqual(str(job.pk), job_id)
+        self.assertIsNone(claim_next_job("other-worker"))
+        run_plan_job(job)
+
+        body = self.client.get(f"/api/trips/jobs/{job_id}").json()
+        self.assertEqual(body["status"], "succeeded")
+        self.assertEqual(body["result"]["summary"]["total_days"], 1)
+        self.assertTrue(body["result"]["route"]["polyline"])
+        self.assertIsNotNone(body["expires_at"])
+
+    def test_async_batch_enqueues_one_job_per_trip(self):
+        response = self.client.post("/api/trips/plan?async=1", {"trips": [self.payload, self.payload]}, format="json")
+
+        self.assertEqual(response.status_code, 202)
+        self.assertEqual(len(response.json()["jobs"]), 2)
+        self.assertEqual(PlanJob.objects.filter(status=PlanJob.Status.QUEUED).count(), 2)
+
+    @patch("apps.trips.views.get_route", side_effect=RuntimeError("ORS down"))
+    def test_failed_job_reports_error_and_expired_jobs_are_purged(self, mock_get_route):
+        job = PlanJob.objects.create(payload=self.payload)
+        run_plan_job(claim_next_job("test-worker"))
+
+        body = self.client.get(f"/api/trips/jobs/{job.pk}").json()
+        self.assertEqual(body["status"], "failed")
+        self.assertIn("ORS down", body["error"])
+
+        PlanJob.objects.filter(pk=job.pk).update(expires_at=timezone.now() - timedelta(seconds=1))
+        self.assertEqual(self.client.get(f"/api/trips/jobs/{job.pk}").status_code, 404)
+        self.assertEqual(purge_expired_jobs(), (1, 0))
+
+    def test_stale_jobs_are_requeued_until_max_attempts(self):
+        stale = timezone.now() - timedelta(seconds=3600)
+        running = {"payload": self.payload, "status": PlanJob.Status.RUNNING, "started_at": stale}
+        retry = PlanJob.objects.create(attempts=1, **running)
+        crashing = PlanJob.objects.create(attempts=3, **running)
+
+        with override_settings(PLAN_JOB_MAX_ATTEMPTS=3):
+            self.assertEqual(purge_expired_jobs(), (0, 1))
+
+        retry.refresh_from_db()
+        crashing.refresh_from_db()
+        self.assertEqual(retry.status, PlanJob.Status.QUEUED)
+        self.assertEqual(crashing.status, PlanJob.Status.FAILED)
+        self.assertIn("giving up", crashing.error)
+        self.assertIsNotNone(crashing.expires_at)
+
+    def test_worker_survives_errors_claiming_jobs(self):
+        stop_event = threading.Event()
+        calls = []
+
+        def claim(worker_id):
+            calls.append(worker_id)
+            if len(calls) == 1:
+                raise RuntimeError("database is locked")
+            stop_event.set()
+            return None
+
+        with patch("apps.trips.jobs.claim_next_job", side_effect=claim), patch.object(stop_event, "wait") as wait:
+            with self.assertLogs("apps.trips.jobs", level="ERROR"):
+                _worker_loop("test-worker", 0.01, stop_event, drain=False)
+
+        self.assertEqual(len(calls), 2)
+        self.assertEqual(wait.call_args_list[0].args, (1.0,))
+
+
+class AdmissionGateTests(TestCase):
+    def test_gate_sheds_when_queue_is_full_and_when_queue_wait_times_out(self):
+        gate = AdmissionGate(max_concurrent=1, max_queue=1, queue_timeout=0.01, retry_after=3)
+        gate.acquire()
+
+        with self.assertRaises(PlanQueueTimeout) as timeout:
+            gate.acquire()
+        self.assertEqual(timeout.exception.wait, 3)
+
+        gate.waiting = 1
+        with self.assertRaises(Throttled):
+            gate.acquire()
+        gate.waiting = 0
+
+        snapshot = gate.snapshot()
+        self.assertEqual(snapshot["active"], 1)
+        self.assertEqual(snapshot["rejected_timeout_total"], 1)
+        self.assertEqual(snapshot["rejected_queue_full_total"], 1)
+
+    def test_release_admits_queued_request(self):
+        gate = AdmissionGate(max_concurrent=1, max_queue=1, queue_timeout=5, retry_after=1)
+        gate.acquire()
+        admitted = threading.Event()
+
+        def waiter():
+            gate.acquire()
+            admitted.set()
+
+        thread = threading.Thread(target=waiter)
+        thread.start()
+        while gate.snapshot()["queue_depth"] == 0:
+            time.sleep(0.001)
+        gate.release()
+        thread.join(timeout=5)
+
+        self.assertTrue(admitted.is_set())
+        self.assertEqual(gate.snapshot()["admitted_total"], 2)
+
+    def test_queued_requests_are_admitted_in_arrival_order(self):
+        gate = AdmissionGate(max_concurrent=1, max_queue=5, queue_timeout=5, retry_after=1)
+        gate.acquire()
+        admitted = []
+        threads = []
+        for idx in range(4):
+            thread = threading.Thread(target=lambda idx=idx: (gate.acquire(), admitted.append(idx), gate.release()))
+            thread.start()
+            threads.append(thread)
+            while gate.snapshot()["queue_depth"] <= idx:
+                time.sleep(0.001)
+
+        gate.release()
+        for thread in threads:
+            thread.join(timeout=5)
+
+        self.assertEqual(admitted, [0, 1, 2, 3])
+        self.assertEqual(gate.snapshot()["active"], 0)
+
+    def test_saturated_plan_endpoint_rejects_with_retry_after(self):
+        gate = AdmissionGate(max_concurrent=1, max_queue=0, queue_timeout=0, retry_after=7)
+        gate.acquire()
+        client = APIClient()
+
+        with patch("apps.trips.views.plan_admission_gate", return_value=gate):
+            response = client.post("/api/trips/plan", {"pickup_location": "A"}, format="json")
+            metrics = client.get("/api/trips/metrics").json()
+
+        self.assertEqual(response.status_code, 429)
+        self.assertEqual(response["Retry-After"], "7")
+        self.assertEqual(metrics["plan_admission"]["rejected_queue_full_total"], 1)
+        self.assertEqual(client.get("/health").status_code, 200)
+
+
+def _parse_sse(body):
+    events = []
+    for block in body.decode("utf-8").strip().split("\n\n"):
+        fields = dict(line.split(": ", 1) for line in block.splitlines())
+        events.append((fields["event"], json.loads(fields["data"])))
+    return events
+
+
+class PlanTripStreamTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+
+    @patch("apps.trips.views.get_route")
+    def test_stream_emits_route_then_stops_then_each_day(self, mock_get_route):
+        mock_get_route.return_value = {
+            "distance_miles": 1300.0,
+            "duration_hours": 26.0,
+            "polyline": _polyline_for_miles(1300),
+        }
+
+        response = self.client.post(
+            "/api/trips/plan/stream",
+            {"pickup_location": "A", "dropoff_location": "B", "cycle_used_hours": 10},
+            format="json",
+            HTTP_ACCEPT="text/event-stream",
+        )
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response["Content-Type"], "text/event-stream")
+        events = _parse_sse(b"".join(response.streaming_content))
+        names = [name for name, _ in events]
+        self.assertEqual(names[:2], ["route", "stops"])
+        self.assertEqual(names[-2:], ["summary", "done"])
+        day_events = [data for name, data in events if name == "log"]
+        self.assertEqual([day["day"] for day in day_events], [1, 2, 3])
+        self.assertEqual(events[-2][1]["summary"]["total_days"], 3)
+        self.assertEqual(events[0][1]["distance_miles"], 1300.0)
+
+    def test_stream_accepts_event_source_query_and_releases_gate(self):
+        gate = AdmissionGate(max_concurrent=1, max_queue=0, queue_timeout=0, retry_after=1)
+        location = json.dumps({"label": "Barstow, CA", "lng": -117.0173, "lat": 34.8958})
+
+        with patch("apps.trips.views.plan_admission_gate", return_value=gate):
+            response = self.client.get(
+                "/api/trips/plan/stream",
+                {"pickup_location": location, "dropoff_location": "Las Vegas, NV"},
+                HTTP_ACCEPT="text/event-stream",
+            )
+            self.assertEqual(gate.snapshot()["active"], 1)
+            events = _parse_sse(b"".join(response.streaming_content))
+            response.close()
+
+        self.assertEqual(events[-1][0], "done")
+        self.assertEqual(gate.snapshot()["active"], 0)
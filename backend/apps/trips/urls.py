@@ -1,7 +1,43 @@
 from django.urls import path
 
-from .views import PlanTripView
+from .views import (
+    PlanAlternativesView,
+    PlanAssignmentsView,
+    PlanChainView,
+    PlanCycleSweepView,
+    PlanDeparturesView,
+    PlanJobView,
+    PlanMetricsView,
+    PlanTripStreamView,
+    PlanTripView,
+    TripAnalyticsView,
+    TripDayLogSheetView,
+    TripDayLogView,
+    TripExportView,
+    TripLogsPdfView,
+    TripLogsView,
+    TripPingsView,
+    TripPlanView,
+    TripsNearbyView,
+)
 
 urlpatterns = [
     path("plan", PlanTripView.as_view(), name="plan-trip"),
+    path("plan/stream", PlanTripStreamView.as_view(), name="plan-trip-stream"),
+    path("plan/alternatives", PlanAlternativesView.as_view(), name="plan-alternatives"),
+    path("plan/chain", PlanChainView.as_view(), name="plan-chain"),
+    path("plan/cycle-sweep", PlanCycleSweepView.as_view(), name="plan-cycle-sweep"),
+    path("plan/departures", PlanDeparturesView.as_view(), name="plan-departures"),
+    path("assignments", PlanAssignmentsView.as_view(), name="plan-assignments"),
+    path("jobs/<uuid:job_id>", PlanJobView.as_view(), name="plan-job"),
+    path("metrics", PlanMetricsView.as_view(), name="plan-metrics"),
+    path("analytics", TripAnalyticsView.as_view(), name="trip-analytics"),
+    path("export/<slug:kind>.<slug:export_format>", TripExportView.as_view(), name="trip-export"),
+    path("nearby", TripsNearbyView.as_view(), name="trips-nearby"),
+    path("<uuid:trip_id>", TripPlanView.as_view(), name="trip-plan"),
+    path("<uuid:trip_id>/logs", TripLogsView.as_view(), name="trip-logs"),
+    path("<uuid:trip_id>/logs.pdf", TripLogsPdfView.as_view(), name="trip-logs-pdf"),
+    path("<uuid:trip_id>/logs/<int:day>", TripDayLogView.as_view(), name="trip-day-log"),
+    path("<uuid:trip_id>/logs/<int:day>.svg", TripDayLogSheetView.as_view(), name="trip-day-log-sheet"),
+    path("<uuid:trip_id>/pings", TripPingsView.as_view(), name="trip-pings"),
 ]
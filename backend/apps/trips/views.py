@@ -1,9 +1,73 @@
+import base64
+import io
+import json
+import math
+from xml.sax.saxutils import escape
+
+from datetime import datetime, timedelta
+
+from django.conf import settings
+from django.http import HttpResponseNotModified, StreamingHttpResponse
+from django.db.models import Q
+from django.urls import reverse
+from django.utils import timezone
+from django.utils.dateparse import parse_date, parse_datetime
+from django.utils.http import parse_etags, urlencode
+from rest_framework import status
+from rest_framework.exceptions import APIException, ValidationError
+from rest_framework.negotiation import BaseContentNegotiation
+from rest_framework.renderers import BaseRenderer, JSONRenderer
 from rest_framework.response import Response
+from rest_framework.utils.encoders import JSONEncoder
 from rest_framework.views import APIView
 
-from utils.hos_engine import generate_hos_logs
-from utils.route_service import get_route
-from utils.stop_planner import plan_stops
+from apps.logs.models import DailyLog
+from apps.trips.admission import plan_admission_gate
+from apps.trips.corridors import trips_near
+from apps.trips.exports import EXPORT_COLUMNS, EXPORT_FORMATS, export_plans, iter_export
+from apps.trips.jobs import enqueue_plan_jobs
+from apps.trips.models import PlanJob, TripDayRollup, TripLaneRollup, TripPlan
+from apps.trips.pings import ingest_pings, iter_request_pings, trip_progress
+from apps.trips.plans import (
+    content_etag,
+    daily_log_payload,
+    log_sheet_svg,
+    save_trip_plan,
+    trip_plan_payload,
+)
+from apps.trips.rollups import rollup_payload
+from utils.assignment import assign_loads
+from utils.eld_pdf import PDF_LAYOUT_VERSION, iter_log_sheets_pdf
+from utils.departure_search import MAX_CANDIDATES, OBJECTIVES, departure_minutes, search_departures
+from utils.eld_svg import LAYOUT_VERSION, THEMES
+from utils.fuel_planner import load_stations, plan_fuel_stops
+from utils.hos_engine import (
+    CYCLE_LIMIT_HOURS,
+    MINUTES_PER_DAY,
+    generate_hos_logs,
+    iter_hos_logs,
+    start_state,
+    timeline_memo,
+    timeline_stop,
+)
+from utils.hos_schedule import DriverSchedule, hos_clock
+from utils.route_service import ORS_MAX_ALTERNATIVES, RouteUnavailable, get_route, get_route_alternatives
+from utils.stop_planner import load_stop_rules, plan_stops
+
+PDF_EXPORT_CHUNK_DAYS = 8
+MAX_CYCLE_SWEEP_POINTS = 10000
+MAX_ASSIGNMENT_SIDE = 500
+MAX_CHAINED_LOADS = 50
+MAX_NEARBY_RADIUS_MILES = 100
+MAX_NEARBY_RESULTS = 500
+ANALYTICS_PAGE_SIZE = 100
+MAX_ANALYTICS_PAGE_SIZE = 1000
+
+
+class RoutingUnavailable(APIException):
+    status_code = 502
+    default_detail = "Routes could not be fetched for this lane, retry shortly."
+    default_code = "routing_unavailable"
 
 
 def _to_float(value):
@@ -29,14 +93,9 @@ def _normalize_location(location):
     return {"label": "", "lng": None, "lat": None}
 
 
-def compute_summary_metrics(days, cycle_used_hours):
-    days = days or []
-    cycle_used = _to_float(cycle_used_hours)
-    if cycle_used is None:
-        cycle_used = 0.0
-
+def _driving_minutes_from_days(days):
     driving_minutes = 0
-    for day in days:
+    for day in days or []:
         for event in day.get("events", []):
             status = str(event.get("status", "")).strip().lower()
             if status != "driving":
@@ -47,45 +106,53 @@ def compute_summary_metrics(days, cycle_used_hours):
             if start_minute is None or end_minute is None or end_minute <= start_minute:
                 continue
             driving_minutes += end_minute - start_minute
+    return driving_minutes
+
+
+def compute_summary_metrics(days, cycle_used_hours, driving_minutes=None):
+    cycle_used = _to_float(cycle_used_hours)
+    if cycle_used is None:
+        cycle_used = 0.0
+
+    if driving_minutes is None:
+        driving_minutes = _driving_minutes_from_days(days)
 
     driving_hours_raw = driving_minutes / 60.0
     driving_hours = round(driving_hours_raw, 2)
     total_cycle_after = cycle_used + driving_hours_raw
 
-    hos_compliant = total_cycle_after <= 70.0
+    hos_compliant = total_cycle_after <= CYCLE_LIMIT_HOURS
     hos_reasons = [] if hos_compliant else ["Insufficient cycle hours remaining"]
 
     return {
         "driving_hours": driving_hours,
         "hos_compliant": hos_compliant,
         "hos_reasons": hos_reasons,
-        "cycle_remaining_hours_before": round(70.0 - cycle_used, 2),
-        "cycle_remaining_hours_after": round(70.0 - total_cycle_after, 2),
+        "cycle_remaining_hours_before": round(CYCLE_LIMIT_HOURS - cycle_used, 2),
+        "cycle_remaining_hours_after": round(CYCLE_LIMIT_HOURS - total_cycle_after, 2),
+    }
+
+
+def cycle_sweep(driving_minutes, cycle_values):
+    # compute_summary_metrics for many cycle_used_hours values at once: the
+    # plan's driving hours are fixed, so every value is a column operation.
+    driving_hours_raw = driving_minutes / 60.0
+    after = [cycle_used + driving_hours_raw for cycle_used in cycle_values]
+    return {
+        "cycle_used_hours": list(cycle_values),
+        "hos_compliant": [total <= CYCLE_LIMIT_HOURS for total in after],
+        "cycle_remaining_hours_before": [round(CYCLE_LIMIT_HOURS - cycle_used, 2) for cycle_used in cycle_values],
+        "cycle_remaining_hours_after": [round(CYCLE_LIMIT_HOURS - total, 2) for total in after],
     }
 
 
 def _build_timeline_stops(logs):
-    timeline_stops = []
-
-    for day in logs or []:
-        day_number = day.get("day")
-        for remark in day.get("remarks", []):
-            stop_type = str(remark.get("stop_type", "")).lower() or "stop"
-            timeline_stops.append(
-                {
-                    "type": stop_type,
-                    "reason": remark.get("reason"),
-                    "label": remark.get("label"),
-                    "eld_required": (stop_type == "eld_limit") or bool(remark.get("eld_required")),
-                    "day": day_number,
-                    "minute": remark.get("minute"),
-                    "start_minute": remark.get("start_minute"),
-                    "end_minute": remark.get("end_minute"),
-                    "mile": remark.get("mile"),
-                    "lng": remark.get("lng"),
-                    "lat": remark.get("lat"),
-                }
-            )
+    # Post-hoc fallback for day lists that did not come with engine aggregates.
+    timeline_stops = [
+        timeline_stop(day.get("day"), remark)
+        for day in logs or []
+        for remark in day.get("remarks", [])
+    ]
 
     timeline_stops.sort(
         key=lambda item: (
@@ -97,39 +164,979 @@ def _build_timeline_stops(logs):
     return timeline_stops
 
 
+def _fuel_plan(data, route_data):
+    # Optional `fuel_planning` object (tank_range_miles, mpg,
+    # start_fuel_fraction): returns (fuel stops, summary), or (None, None) to
+    # keep the fixed fuel interval.
+    options = data.get("fuel_planning")
+    if not options:
+        return None, None
+    options = options if isinstance(options, dict) else {}
+    tank_range_miles = _to_float(options.get("tank_range_miles", settings.FUEL_TANK_RANGE_MILES))
+    mpg = _to_float(options.get("mpg", settings.FUEL_MPG))
+    start_fuel_fraction = _to_float(options.get("start_fuel_fraction", 1))
+    if tank_range_miles is None or tank_range_miles <= 0 or mpg is None or mpg <= 0:
+        raise ValidationError({"fuel_planning": "tank_range_miles and mpg must be positive numbers."})
+    if start_fuel_fraction is None or not 0 <= start_fuel_fraction <= 1:
+        raise ValidationError({"fuel_planning": "start_fuel_fraction must be between 0 and 1."})
+    try:
+        stations = load_stations(settings.FUEL_STATIONS_PATH)
+    except OSError as exc:
+        raise ValidationError({"fuel_planning": "Fuel station prices are not available."}) from exc
+    try:
+        return plan_fuel_stops(
+            route_data, stations, tank_range_miles, mpg, start_fuel_fraction, settings.FUEL_CORRIDOR_MILES
+        )
+    except ValueError as exc:
+        raise ValidationError({"fuel_planning": str(exc)}) from exc
+
+
+def _stop_rules(data):
+    # Per-carrier stop rules from STOP_RULES_PATH; defaults when absent.
+    try:
+        return load_stop_rules(settings.STOP_RULES_PATH, data.get("carrier"))
+    except (OSError, ValueError) as exc:
+        raise ValidationError({"carrier": f"Stop rules could not be loaded: {exc}"}) from exc
+
+
+def _driver_id(data):
+    driver_id = str(data.get("driver_id") or "").strip()
+    if len(driver_id) > 64:
+        raise ValidationError({"driver_id": "Must be at most 64 characters."})
+    return driver_id
+
+
+def plan_trip(data):
+    driver_id = _driver_id(data)
+    current_location = _normalize_location(data.get("current_location"))
+    pickup_location = _normalize_location(data.get("pickup_location"))
+    dropoff_location = _normalize_location(data.get("dropoff_location"))
+    cycle_used_hours = data.get("cycle_used_hours")
+
+    route_data = get_route(
+        pickup_location,
+        dropoff_location,
+    )
+    fuel_stops, fuel_summary = _fuel_plan(data, route_data)
+    stops = plan_stops(
+        route_data, pickup_location, dropoff_location, fuel_stops=fuel_stops, rules=_stop_rules(data)
+    )
+    aggregates = {}
+    logs = generate_hos_logs(route_data, stops, aggregates=aggregates)
+    timeline_stops, summary_metrics = _timeline_and_metrics(logs, aggregates, cycle_used_hours)
+
+    result = {
+        "route": _route_payload(route_data),
+        "summary": _summary_payload(route_data, len(logs), summary_metrics, fuel_summary),
+        "stops": stops,
+        "timeline_stops": timeline_stops,
+        "logs": logs,
+    }
+    plan = save_trip_plan(
+        {
+            "current_location": current_location,
+            "pickup_location": pickup_location,
+            "dropoff_location": dropoff_location,
+            "cycle_used_hours": cycle_used_hours,
+            "driver_id": driver_id,
+        },
+        result,
+    )
+    return {"trip_id": str(plan.pk), **result}
+
+
+def _minutes_field(data, name, default, low, high):
+    value = data.get(name, default)
+    minutes = _to_float(value)
+    if minutes is None or not low <= minutes <= high:
+        raise ValidationError({name: f"Must be a number of minutes between {low} and {high}."})
+    return int(minutes)
+
+
+def _starting_clocks(data):
+    # [{"driving_hours_used": h, "shift_hours_used": h}, ...] as (driving,
+    # shift) minute pairs; defaults to fresh clocks.
+    clocks = data.get("starting_clocks") or [{}]
+    if not isinstance(clocks, list):
+        raise ValidationError({"starting_clocks": "Must be a list of clock objects."})
+    parsed = []
+    for clock in clocks:
+        clock = clock if isinstance(clock, dict) else {}
+        driving = _to_float(clock.get("driving_hours_used", 0))
+        shift = _to_float(clock.get("shift_hours_used", driving))
+        try:
+            _, driving, shift = start_state(0, round((driving or 0) * 60), round((shift or 0) * 60))
+        except ValueError as exc:
+            raise ValidationError({"starting_clocks": str(exc)}) from exc
+        parsed.append((driving, shift))
+    return parsed
+
+
+def plan_departures(data):
+    # One route, stop plan and duty-op signature; only the departure minute
+    # and starting clocks vary between the simulated candidates.
+    objective = data.get("objective", "days")
+    if objective not in OBJECTIVES:
+        raise ValidationError({"objective": f"Must be one of: {', '.join(OBJECTIVES)}."})
+    step = _minutes_field(data, "step_minutes", 15, 1, MINUTES_PER_DAY)
+    earliest = _minutes_field(data, "earliest_minute", 0, 0, MINUTES_PER_DAY - 1)
+    latest = _minutes_field(data, "latest_minute", MINUTES_PER_DAY, earliest + 1, MINUTES_PER_DAY)
+    minutes = departure_minutes(earliest, latest, step)
+    clocks = _starting_clocks(data)
+    if len(minutes) * len(clocks) > MAX_CANDIDATES:
+        raise ValidationError({"detail": f"At most {MAX_CANDIDATES} departure/clock candidates per search."})
+
+    pickup_location = _normalize_location(data.get("pickup_location"))
+    dropoff_location = _normalize_location(data.get("dropoff_location"))
+    cycle_used_hours = data.get("cycle_used_hours")
+
+    route_data = get_route(pickup_location, dropoff_location)
+    stops = plan_stops(route_data, pickup_location, dropoff_location, rules=_stop_rules(data))
+    search = search_departures(route_data, stops, minutes, clocks, objective)
+    best = search["best"]
+
+    aggregates = {}
+    start = (best["departure_minute"], best["driving_minutes_used"], best["shift_minutes_used"])
+    logs = generate_hos_logs(route_data, stops, aggregates=aggregates, start=start)
+    timeline_stops, summary_metrics = _timeline_and_metrics(logs, aggregates, cycle_used_hours)
+    return {
+        "objective": objective,
+        "evaluated": search["evaluated"],
+        "pruned": search["pruned"],
+        "departure": best,
+        "alternatives": search["ranked"][1:],
+        "route": _route_payload(route_data),
+        "summary": _summary_payload(route_data, len(logs), summary_metrics),
+        "stops": stops,
+        "timeline_stops": timeline_stops,
+        "logs": logs,
+    }
+
+
+def _arrival_minute(logs):
+    # Minutes from day 1 midnight to the end of the last on-duty or driving event.
+    for event in reversed(logs[-1]["events"] if logs else []):
+        if event["status"] != "off_duty":
+            return (len(logs) - 1) * MINUTES_PER_DAY + event["end_minute"]
+    return 0
+
+
+def _evaluate_alternative(route_index, route_data, pickup_location, dropoff_location, cycle_used_hours, rules=None):
+    stops = plan_stops(route_data, pickup_location, dropoff_location, rules=rules)
+    aggregates = {}
+    logs = generate_hos_logs(route_data, stops, aggregates=aggregates)
+    _, summary_metrics = _timeline_and_metrics(logs, aggregates, cycle_used_hours)
+    arrival = _arrival_minute(logs)
+    payload = {
+        "route_index": route_index,
+        "route": _route_payload(route_data),
+        "duration_hours": route_data.get("duration_hours"),
+        "summary": _summary_payload(route_data, len(logs), summary_metrics),
+        "stop_count": sum(1 for stop in stops if stop.get("type") not in ("pickup", "dropoff")),
+        "arrival_day": (arrival - 1) // MINUTES_PER_DAY + 1 if arrival else 1,
+        "arrival_minute": (arrival - 1) % MINUTES_PER_DAY + 1 if arrival else 0,
+        "stops": stops,
+    }
+    return (len(logs), arrival, payload["stop_count"], route_index), payload
+
+
+def plan_alternatives(data):
+    # One ORS request for up to `alternatives` routes (recommended first); each
+    # gets its own stop plan and HOS simulation, and they are ranked by log
+    # days, then arrival, then planned stops.
+    count = data.get("alternatives", ORS_MAX_ALTERNATIVES)
+    try:
+        count = int(count) if not isinstance(count, (bool, float)) else 0
+    except (TypeError, ValueError):
+        count = 0
+    if not 1 <= count <= ORS_MAX_ALTERNATIVES:
+        raise ValidationError({"alternatives": f"Must be an integer between 1 and {ORS_MAX_ALTERNATIVES}."})
+
+    pickup_location = _normalize_location(data.get("pickup_location"))
+    dropoff_location = _normalize_location(data.get("dropoff_location"))
+    cycle_used_hours = data.get("cycle_used_hours")
+    for name, location in (("pickup_location", pickup_location), ("dropoff_location", dropoff_location)):
+        if location["lng"] is None or location["lat"] is None:
+            raise ValidationError({name: "Alternatives need lng and lat coordinates."})
+
+    try:
+        routes = get_route_alternatives(pickup_location, dropoff_location, count=count)
+    except RouteUnavailable as exc:
+        raise RoutingUnavailable() from exc
+    rules = _stop_rules(data)
+    evaluated = sorted(
+        (
+            _evaluate_alternative(route_index, route_data, pickup_location, dropoff_location, cycle_used_hours, rules)
+            for route_index, route_data in enumerate(routes)
+        ),
+        key=lambda ranked: ranked[0],
+    )
+    return {"alternatives": [{"rank": rank, **payload} for rank, (_, payload) in enumerate(evaluated, start=1)]}
+
+
+def _cycle_values(data):
+    # Explicit `cycle_used_hours` list, or a `cycle_used_from`/`to`/`step` range.
+    values = data.get("cycle_used_hours")
+    if values is not None:
+        if not isinstance(values, list) or not values:
+            raise ValidationError({"cycle_used_hours": "Must be a non-empty list of hours."})
+        parsed = [_to_float(value) for value in values]
+        if any(value is None or not 0 <= value <= CYCLE_LIMIT_HOURS for value in parsed):
+            raise ValidationError({"cycle_used_hours": f"Each value must be between 0 and {CYCLE_LIMIT_HOURS:g}."})
+    else:
+        low = _to_float(data.get("cycle_used_from", 0))
+        high = _to_float(data.get("cycle_used_to", CYCLE_LIMIT_HOURS))
+        step = _to_float(data.get("cycle_used_step", 1))
+        if low is None or high is None or not 0 <= low <= high <= CYCLE_LIMIT_HOURS:
+            raise ValidationError({"cycle_used_from": f"Range must lie within 0-{CYCLE_LIMIT_HOURS:g} hours."})
+        if step is None or step <= 0:
+            raise ValidationError({"cycle_used_step": "Must be a positive number of hours."})
+        count = int((high - low) / step + 1e-9) + 1
+        if count > MAX_CYCLE_SWEEP_POINTS:
+            raise ValidationError({"cycle_used_step": f"At most {MAX_CYCLE_SWEEP_POINTS} sweep points."})
+        parsed = [round(low + idx * step, 6) for idx in range(count)]
+    if len(parsed) > MAX_CYCLE_SWEEP_POINTS:
+        raise ValidationError({"cycle_used_hours": f"At most {MAX_CYCLE_SWEEP_POINTS} sweep points."})
+    return parsed
+
+
+def plan_cycle_sweep(data):
+    # Route, stops and HOS simulation once; every cycle value reuses them.
+    cycle_values = _cycle_values(data)
+    pickup_location = _normalize_location(data.get("pickup_location"))
+    dropoff_location = _normalize_location(data.get("dropoff_location"))
+
+    route_data = get_route(pickup_location, dropoff_location)
+    stops = plan_stops(route_data, pickup_location, dropoff_location, rules=_stop_rules(data))
+    aggregates = {}
+    for _ in iter_hos_logs(route_data, stops, aggregates=aggregates):
+        pass
+
+    driving_minutes = aggregates["driving_minutes"]
+    return {
+        "total_days": aggregates["days"],
+        "total_miles": route_data["distance_miles"],
+        "driving_hours": round(driving_minutes / 60.0, 2),
+        # Largest cycle_used_hours (to the hundredth) that is still compliant.
+        "max_cycle_used_hours": math.floor((CYCLE_LIMIT_HOURS - driving_minutes / 60.0) * 100) / 100,
+        "sweep": cycle_sweep(driving_minutes, cycle_values),
+    }
+
+
+def _coordinate(location, name):
+    location = _normalize_location(location) or {}
+    if location.get("lng") is None or location.get("lat") is None:
+        raise ValidationError({name: "Each entry needs lng/lat coordinates."})
+    return location["lng"], location["lat"]
+
+
+def _assignment_drivers(data):
+    drivers = data.get("drivers")
+    if not isinstance(drivers, list) or not 0 < len(drivers) <= MAX_ASSIGNMENT_SIDE:
+        raise ValidationError({"drivers": f"Must be a list of 1-{MAX_ASSIGNMENT_SIDE} drivers."})
+    parsed = []
+    for idx, driver in enumerate(drivers):
+        driver = driver if isinstance(driver, dict) else {}
+        driving = _to_float(driver.get("driving_hours_used", 0)) or 0
+        shift = _to_float(driver.get("shift_hours_used", driving)) or 0
+        cycle = _to_float(driver.get("cycle_used_hours", 0))
+        if cycle is None or not 0 <= cycle <= CYCLE_LIMIT_HOURS:
+            raise ValidationError({"drivers": f"cycle_used_hours must be between 0 and {CYCLE_LIMIT_HOURS:g}."})
+        try:
+            clock = start_state(driver.get("minute_of_day", 0) or 0, round(driving * 60), round(shift * 60))
+        except ValueError as exc:
+            raise ValidationError({"drivers": str(exc)}) from exc
+        parsed.append(
+            {
+                "id": driver.get("id", idx),
+                "location": _coordinate(driver.get("location"), "drivers"),
+                "clock": clock + (round(cycle * 60),),
+            }
+        )
+    return parsed
+
+
+def _assignment_loads(data):
+    loads = data.get("loads")
+    if not isinstance(loads, list) or not 0 < len(loads) <= MAX_ASSIGNMENT_SIDE:
+        raise ValidationError({"loads": f"Must be a list of 1-{MAX_ASSIGNMENT_SIDE} loads."})
+    parsed = []
+    for idx, load in enumerate(loads):
+        load = load if isinstance(load, dict) else {}
+        window = load.get("deliver_within_hours")
+        if window is not None:
+            window = _to_float(window)
+            if window is None or window <= 0:
+                raise ValidationError({"loads": "deliver_within_hours must be a positive number of hours."})
+            window = window * 60
+        parsed.append(
+            {
+                "id": load.get("id", idx),
+                "pickup": _coordinate(load.get("pickup_location"), "loads"),
+                "dropoff": _coordinate(load.get("dropoff_location"), "loads"),
+                "deliver_within_minutes": window,
+            }
+        )
+    return parsed
+
+
+def plan_assignments(data):
+    drivers = _assignment_drivers(data)
+    loads = _assignment_loads(data)
+    cost_per_hour = _to_float(data.get("cost_per_hour", 0))
+    if cost_per_hour is None or cost_per_hour < 0:
+        raise ValidationError({"cost_per_hour": "Must be a non-negative number."})
+    return assign_loads(
+        drivers, loads, cost_per_hour=cost_per_hour, workers=settings.ASSIGNMENT_WORKERS, rules=_stop_rules(data)
+    )
+
+
+def _schedule_clock(data):
+    # Takes the `clock` returned by a previous chain request as-is, so a
+    # driver's week can be planned one call at a time.
+    clock = data.get("clock") or {}
+    if not isinstance(clock, dict):
+        raise ValidationError({"clock": "Must be a clock object."})
+    fields = ("day", "minute", "driving_minutes", "shift_minutes", "prior_on_duty_minutes", "cycle_used_minutes")
+    try:
+        return hos_clock(**{name: clock[name] for name in fields if clock.get(name) is not None})
+    except (TypeError, ValueError) as exc:
+        raise ValidationError({"clock": str(exc)}) from exc
+
+
+def plan_chain(data):
+    loads = data.get("loads")
+    if not isinstance(loads, list) or not 0 < len(loads) <= MAX_CHAINED_LOADS:
+        raise ValidationError({"loads": f"Must be a list of 1-{MAX_CHAINED_LOADS} loads."})
+    schedule = DriverSchedule(_schedule_clock(data))
+    rules = _stop_rules(data)
+    summaries = []
+    for load in loads:
+        load = load if isinstance(load, dict) else {}
+        rest_hours = _to_float(load.get("rest_hours", 0))
+        if rest_hours is None or rest_hours < 0:
+            raise ValidationError({"loads": "rest_hours must be a non-negative number."})
+        pickup_location = _normalize_location(load.get("pickup_location"))
+        dropoff_location = _normalize_location(load.get("dropoff_location"))
+        route_data = get_route(pickup_location, dropoff_location)
+        stops = plan_stops(route_data, pickup_location, dropoff_location, rules=rules)
+        summary = schedule.append_load(route_data, stops, round(rest_hours * 60), label=load.get("label"))
+        summaries.append({**summary, "total_miles": route_data["distance_miles"]})
+    return {"loads": summaries, "logs": schedule.days, "clock": schedule.clock}
+
+
+def _timeline_and_metrics(logs, aggregates, cycle_used_hours):
+    # The engine accumulates totals and an ordered timeline while simulating;
+    # rescanning the logs is only needed when those aggregates are absent.
+    if "timeline" in aggregates:
+        timeline_stops = aggregates["timeline"]
+    else:
+        timeline_stops = _build_timeline_stops(logs)
+    summary_metrics = compute_summary_metrics(
+        logs, cycle_used_hours, driving_minutes=aggregates.get("driving_minutes")
+    )
+    return timeline_stops, summary_metrics
+
+
+def _route_payload(route_data):
+    return {
+        "distance_miles": route_data["distance_miles"],
+        "polyline": route_data["polyline"],
+    }
+
+
+def _summary_payload(route_data, total_days, summary_metrics, fuel_summary=None):
+    summary = {
+        "total_days": total_days,
+        "total_miles": route_data["distance_miles"],
+        "driving_hours": summary_metrics["driving_hours"],
+        "hos_compliant": summary_metrics["hos_compliant"],
+        "hos_reasons": summary_metrics["hos_reasons"],
+        "cycle_remaining_hours_before": summary_metrics["cycle_remaining_hours_before"],
+        "cycle_remaining_hours_after": summary_metrics["cycle_remaining_hours_after"],
+    }
+    if fuel_summary is not None:
+        summary["fuel_plan"] = fuel_summary
+    return summary
+
+
+def _sse_event(event, data):
+    payload = json.dumps(data, cls=JSONEncoder, separators=(",", ":"))
+    return f"event: {event}\ndata: {payload}\n\n"
+
+
+def iter_plan_events(data):
+    # Same pipeline as plan_trip, emitted stage by stage: the route first so the
+    # map can render, then stops, then one `log` event per day, then the summary.
+    try:
+        pickup_location = _normalize_location(data.get("pickup_location"))
+        dropoff_location = _normalize_location(data.get("dropoff_location"))
+        cycle_used_hours = data.get("cycle_used_hours")
+
+        route_data = get_route(pickup_location, dropoff_location)
+        yield _sse_event("route", _route_payload(route_data))
+
+        fuel_stops, fuel_summary = _fuel_plan(data, route_data)
+        stops = plan_stops(
+            route_data, pickup_location, dropoff_location, fuel_stops=fuel_stops, rules=_stop_rules(data)
+        )
+        yield _sse_event("stops", {"stops": stops})
+
+        # Days are sent as the engine closes them and are not retained; only
+        # the running totals and timeline stops are kept for the summary.
+        aggregates = {}
+        for day in iter_hos_logs(route_data, stops, aggregates, memoize=False):
+            yield _sse_event("log", day)
+
+        summary_metrics = compute_summary_metrics(
+            None, cycle_used_hours, driving_minutes=aggregates["driving_minutes"]
+        )
+        yield _sse_event(
+            "summary",
+            {
+                "summary": _summary_payload(route_data, aggregates["days"], summary_metrics, fuel_summary),
+                "timeline_stops": aggregates["timeline"],
+            },
+        )
+        yield _sse_event("done", {})
+    except Exception as exc:  # noqa: BLE001 - headers are already sent, report in-band
+        yield _sse_event("error", {"detail": f"{type(exc).__name__}: {exc}"})
+
+
+class EventStreamRenderer(BaseRenderer):
+    # Lets EventSource clients (Accept: text/event-stream) pass content
+    # negotiation; errors raised before streaming become a single error event.
+    media_type = "text/event-stream"
+    format = "sse"
+    charset = "utf-8"
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        return _sse_event("error", data).encode(self.charset)
+
+
+class SvgRenderer(BaseRenderer):
+    # Ready-made log sheets; an error detail becomes the <title> of an empty SVG.
+    media_type = "image/svg+xml"
+    format = "svg"
+    charset = "utf-8"
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b""
+        if isinstance(data, str):
+            return data.encode(self.charset)
+        detail = escape(json.dumps(data, cls=JSONEncoder))
+        return f'<svg xmlns="http://www.w3.org/2000/svg"><title>{detail}</title></svg>'.encode(self.charset)
+
+
+class _GatedStream:
+    # Releases the admission slot when the response is closed, including when
+    # the client disconnects before the generator was ever started.
+
+    def __init__(self, events, gate):
+        self.events = events
+        self.gate = gate
+        self.released = False
+
+    def __iter__(self):
+        return iter(self.events)
+
+    def close(self):
+        try:
+            self.events.close()
+        finally:
+            if not self.released:
+                self.released = True
+                self.gate.release()
+
+
+def _is_truthy(value):
+    return str(value or "").strip().lower() in {"1", "true", "yes", "on"}
+
+
+def _stream_request_data(request):
+    if request.method == "POST":
+        return request.data
+
+    # EventSource can only issue GETs; location objects may be JSON-encoded.
+    data = {}
+    for key, value in request.query_params.items():
+        if key.endswith("_location") and value.strip().startswith("{"):
+            try:
+                value = json.loads(value)
+            except ValueError:
+                pass
+        data[key] = value
+    return data
+
+
+def _day_param(request, name):
+    value = request.query_params.get(name)
+    if value is None or not value.strip():
+        return None
+    try:
+        day = int(value)
+    except ValueError:
+        day = 0
+    if day < 1:
+        raise ValidationError({name: "Must be a positive integer."})
+    return day
+
+
+def _logs_url(request, trip_id, from_day, to_day):
+    url = reverse("trip-logs", args=[trip_id])
+    return request.build_absolute_uri(f"{url}?from_day={from_day}&to_day={to_day}")
+
+
+def _next_logs_url(request, trip_id, to_day, total_days, page_size):
+    if to_day >= total_days:
+        return None
+    return _logs_url(request, trip_id, to_day + 1, min(total_days, to_day + page_size))
+
+
+def _first_days_payload(request, result, log_days):
+    # Summary plus the first days only; the viewer pages the rest from the
+    # stored plan through `next`, and `plan_url` has route, stops and timeline.
+    trip_id = result["trip_id"]
+    total_days = len(result["logs"])
+    return {
+        "trip_id": trip_id,
+        "summary": result["summary"],
+        "logs": result["logs"][:log_days],
+        "plan_url": request.build_absolute_uri(reverse("trip-plan", args=[trip_id])),
+        "next": _next_logs_url(request, trip_id, min(log_days, total_days), total_days, log_days),
+    }
+
+
 class PlanTripView(APIView):
     def post(self, request):
-        current_location = _normalize_location(request.data.get("current_location"))
-        pickup_location = _normalize_location(request.data.get("pickup_location"))
-        dropoff_location = _normalize_location(request.data.get("dropoff_location"))
-        cycle_used_hours = request.data.get("cycle_used_hours")
-
-        route_data = get_route(
-            pickup_location,
-            dropoff_location,
+        if _is_truthy(request.query_params.get("async")):
+            return _enqueue_plan_jobs(request)
+        log_days = _day_param(request, "log_days")
+
+        # Only the synchronous pipeline is gated; enqueueing and health checks
+        # stay cheap and keep a worker thread available under overload.
+        gate = plan_admission_gate()
+        gate.acquire()
+        try:
+            result = plan_trip(request.data)
+        finally:
+            gate.release()
+
+        if log_days is not None:
+            result = _first_days_payload(request, result, log_days)
+        return Response(result)
+
+
+def _enqueue_plan_jobs(request):
+    trips = request.data.get("trips")
+    if trips is not None:
+        if not isinstance(trips, list) or not trips or not all(isinstance(trip, dict) for trip in trips):
+            return Response(
+                {"detail": "trips must be a non-empty list of plan requests"},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+        jobs = enqueue_plan_jobs(trips)
+        return Response(
+            {"jobs": [_job_reference(request, job) for job in jobs]},
+            status=status.HTTP_202_ACCEPTED,
+        )
+
+    job = enqueue_plan_jobs([request.data])[0]
+    return Response(_job_reference(request, job), status=status.HTTP_202_ACCEPTED)
+
+
+def _job_reference(request, job):
+    return {
+        "job_id": str(job.pk),
+        "status": job.status,
+        "status_url": request.build_absolute_uri(reverse("plan-job", args=[job.pk])),
+    }
+
+
+class PlanTripStreamView(APIView):
+    renderer_classes = [JSONRenderer, EventStreamRenderer]
+
+    def get(self, request):
+        return self._stream(request)
+
+    def post(self, request):
+        return self._stream(request)
+
+    def _stream(self, request):
+        data = _stream_request_data(request)
+        gate = plan_admission_gate()
+        gate.acquire()
+        response = StreamingHttpResponse(
+            _GatedStream(iter_plan_events(data), gate),
+            content_type="text/event-stream",
+        )
+        response["Cache-Control"] = "no-cache"
+        response["X-Accel-Buffering"] = "no"
+        return response
+
+
+class PlanDeparturesView(APIView):
+    def post(self, request):
+        gate = plan_admission_gate()
+        gate.acquire()
+        try:
+            return Response(plan_departures(request.data))
+        finally:
+            gate.release()
+
+
+class PlanAlternativesView(APIView):
+    def post(self, request):
+        gate = plan_admission_gate()
+        gate.acquire()
+        try:
+            return Response(plan_alternatives(request.data))
+        finally:
+            gate.release()
+
+
+class PlanCycleSweepView(APIView):
+    def post(self, request):
+        gate = plan_admission_gate()
+        gate.acquire()
+        try:
+            return Response(plan_cycle_sweep(request.data))
+        finally:
+            gate.release()
+
+
+class PlanChainView(APIView):
+    def post(self, request):
+        gate = plan_admission_gate()
+        gate.acquire()
+        try:
+            return Response(plan_chain(request.data))
+        finally:
+            gate.release()
+
+
+class PlanAssignmentsView(APIView):
+    def post(self, request):
+        gate = plan_admission_gate()
+        gate.acquire()
+        try:
+            return Response(plan_assignments(request.data))
+        finally:
+            gate.release()
+
+
+def _if_none_match(request, etag):
+    header = request.headers.get("If-None-Match")
+    if not header:
+        return False
+    # If-None-Match uses the weak comparison (RFC 9110 13.1.2).
+    candidates = parse_etags(header)
+    return "*" in candidates or any(candidate.removeprefix("W/") == etag for candidate in candidates)
+
+
+def _conditional_response(request, content_hash, build_body):
+    # A matching If-None-Match is answered from the stored hash alone; the
+    # body is only loaded and serialized when the client's copy is stale.
+    etag = content_etag(content_hash)
+    if _if_none_match(request, etag):
+        response = Response(status=status.HTTP_304_NOT_MODIFIED)
+    else:
+        response = Response(build_body())
+    response["ETag"] = etag
+    response["Cache-Control"] = settings.TRIP_PLAN_CACHE_CONTROL
+    return response
+
+
+class TripPlanView(APIView):
+    def get(self, request, trip_id):
+        content_hash = TripPlan.objects.filter(pk=trip_id).values_list("content_hash", flat=True).first()
+        if content_hash is None:
+            return Response({"detail": "Trip not found"}, status=status.HTTP_404_NOT_FOUND)
+        return _conditional_response(
+            request, content_hash, lambda: trip_plan_payload(TripPlan.objects.get(pk=trip_id))
         )
-        stops = plan_stops(route_data, pickup_location, dropoff_location)
-        logs = generate_hos_logs(route_data, stops)
-        timeline_stops = _build_timeline_stops(logs)
-        summary_metrics = compute_summary_metrics(logs, cycle_used_hours)
 
+
+def _day_range(request, total_days):
+    from_day = _day_param(request, "from_day") or 1
+    to_day = _day_param(request, "to_day") or total_days
+    if to_day < from_day:
+        raise ValidationError({"to_day": "Must not be before from_day."})
+    return from_day, min(to_day, total_days)
+
+
+class TripLogsView(APIView):
+    def get(self, request, trip_id):
+        plan = TripPlan.objects.filter(pk=trip_id).values("content_hash", "total_days").first()
+        if plan is None:
+            return Response({"detail": "Trip not found"}, status=status.HTTP_404_NOT_FOUND)
+
+        total_days = plan["total_days"]
+        from_day, to_day = _day_range(request, total_days)
+
+        def page():
+            logs = DailyLog.objects.filter(trip_id=trip_id, day__gte=from_day, day__lte=to_day).order_by("day")
+            return {
+                "trip_id": str(trip_id),
+                "total_days": total_days,
+                "from_day": from_day,
+                "to_day": to_day,
+                "logs": [daily_log_payload(log) for log in logs],
+                "next": _next_logs_url(request, trip_id, to_day, total_days, to_day - from_day + 1),
+            }
+
+        # A page is a fixed slice of an immutable plan, so the plan hash plus
+        # the range identifies it.
+        return _conditional_response(request, f"{plan['content_hash']}:{from_day}-{to_day}", page)
+
+
+class TripDayLogView(APIView):
+    def get(self, request, trip_id, day):
+        logs = DailyLog.objects.filter(trip_id=trip_id, day=day)
+        content_hash = logs.values_list("content_hash", flat=True).first()
+        if content_hash is None:
+            return Response({"detail": "Log day not found"}, status=status.HTTP_404_NOT_FOUND)
+        return _conditional_response(request, content_hash, lambda: daily_log_payload(logs.get()))
+
+
+class TripDayLogSheetView(APIView):
+    renderer_classes = [SvgRenderer]
+
+    def get(self, request, trip_id, day):
+        theme = request.query_params.get("theme", "light")
+        if theme not in THEMES:
+            raise ValidationError({"theme": f"Must be one of: {', '.join(THEMES)}."})
+
+        logs = DailyLog.objects.filter(trip_id=trip_id, day=day)
+        content_hash = logs.values_list("content_hash", flat=True).first()
+        if content_hash is None:
+            return Response({"detail": "Log day not found"}, status=status.HTTP_404_NOT_FOUND)
+        return _conditional_response(
+            request,
+            f"{content_hash}:svg{LAYOUT_VERSION}:{theme}",
+            lambda: log_sheet_svg(content_hash, theme, logs.get),
+        )
+
+
+class _FirstRendererNegotiation(BaseContentNegotiation):
+    # Downloads ignore Accept: errors are always JSON and the file itself is a
+    # plain Django response that bypasses the renderers.
+    def select_parser(self, request, parsers):
+        return parsers[0] if parsers else None
+
+    def select_renderer(self, request, renderers, format_suffix=None):
+        return renderers[0], renderers[0].media_type
+
+
+class TripLogsPdfView(APIView):
+    content_negotiation_class = _FirstRendererNegotiation
+
+    def get(self, request, trip_id):
+        plan = TripPlan.objects.filter(pk=trip_id).values("content_hash", "total_days").first()
+        if plan is None:
+            return Response({"detail": "Trip not found"}, status=status.HTTP_404_NOT_FOUND)
+        from_day, to_day = _day_range(request, plan["total_days"])
+
+        etag = content_etag(f"{plan['content_hash']}:pdf{PDF_LAYOUT_VERSION}:{from_day}-{to_day}")
+        if _if_none_match(request, etag):
+            response = HttpResponseNotModified()
+        else:
+            # Rows are fetched in small chunks and each page is streamed as soon
+            # as it is drawn, so memory does not grow with the trip length.
+            logs = (
+                DailyLog.objects.filter(trip_id=trip_id, day__gte=from_day, day__lte=to_day)
+                .order_by("day")
+                .iterator(chunk_size=PDF_EXPORT_CHUNK_DAYS)
+            )
+            response = StreamingHttpResponse(
+                iter_log_sheets_pdf((daily_log_payload(log) for log in logs), title=f"Trip {trip_id}"),
+                content_type="application/pdf",
+            )
+            response["Content-Disposition"] = f'attachment; filename="trip-{trip_id}-logs.pdf"'
+        response["ETag"] = etag
+        response["Cache-Control"] = settings.TRIP_PLAN_CACHE_CONTROL
+        return response
+
+
+class TripExportView(APIView):
+    content_negotiation_class = _FirstRendererNegotiation
+
+    def get(self, request, kind, export_format):
+        if kind not in EXPORT_COLUMNS or export_format not in EXPORT_FORMATS:
+            return Response({"detail": "Unknown export"}, status=status.HTTP_404_NOT_FOUND)
+        from_date = _date_param(request, "from")
+        to_date = _date_param(request, "to")
+        if from_date is not None and to_date is not None and to_date < from_date:
+            raise ValidationError({"to": "Must not be before from."})
+        plans = export_plans(TripPlan.objects.all(), from_date, to_date, request.query_params.get("driver"))
+
+        response = StreamingHttpResponse(
+            iter_export(kind, export_format, plans), content_type=EXPORT_FORMATS[export_format]
+        )
+        response["Content-Disposition"] = f'attachment; filename="{kind}.{export_format}"'
+        response["Cache-Control"] = "no-store"
+        return response
+
+
+class TripPingsView(APIView):
+    def post(self, request, trip_id):
+        plan = TripPlan.objects.filter(pk=trip_id).only("id", "distance_miles", "geometry_offset").first()
+        if plan is None:
+            return Response({"detail": "Trip not found"}, status=status.HTTP_404_NOT_FOUND)
+
+        # The body is read from the raw stream in chunks rather than through
+        # the parsers, so batch size is bounded by PING_BATCH_MAX_PINGS and not
+        # by DATA_UPLOAD_MAX_MEMORY_SIZE.
+        pings = iter_request_pings(request.content_type, request.stream or io.BytesIO())
+        return Response(ingest_pings(plan, pings), status=status.HTTP_201_CREATED)
+
+    def get(self, request, trip_id):
+        plan = TripPlan.objects.filter(pk=trip_id).only("id", "distance_miles").first()
+        if plan is None:
+            return Response({"detail": "Trip not found"}, status=status.HTTP_404_NOT_FOUND)
+        return Response(trip_progress(plan))
+
+
+def _float_param(request, name, low, high):
+    value = _to_float(request.query_params.get(name))
+    if value is None or not math.isfinite(value) or not low <= value <= high:
+        raise ValidationError({name: f"Must be a number between {low} and {high}."})
+    return value
+
+
+def _datetime_param(request, name):
+    value = (request.query_params.get(name) or "").strip()
+    if not value:
+        return None
+    try:
+        moment = parse_datetime(value)
+        if moment is None:
+            day = parse_date(value)
+            moment = None if day is None else datetime(day.year, day.month, day.day)
+    except ValueError:
+        moment = None
+    if moment is None:
+        raise ValidationError({name: "Must be an ISO 8601 date or datetime."})
+    if timezone.is_naive(moment):
+        moment = timezone.make_aware(moment, timezone.get_default_timezone())
+    return moment
+
+
+class TripsNearbyView(APIView):
+    def get(self, request):
+        lng = _float_param(request, "lng", -180, 180)
+        lat = _float_param(request, "lat", -90, 90)
+        radius_miles = _float_param(request, "radius_miles", 0, MAX_NEARBY_RADIUS_MILES)
+        since = _datetime_param(request, "since")
+        if since is None:
+            since = timezone.now() - timedelta(days=settings.TRIP_NEARBY_ACTIVE_DAYS)
+        until = _datetime_param(request, "until")
+        limit = _day_param(request, "limit") or MAX_NEARBY_RESULTS
+
+        # Candidates come from the corridor cell index; only those have their
+        # route geometry loaded for the exact distance check.
+        result = trips_near(lng, lat, radius_miles, since, until, min(limit, MAX_NEARBY_RESULTS))
+        return Response({"lng": lng, "lat": lat, "radius_miles": radius_miles, "since": since, **result})
+
+
+def _date_param(request, name):
+    value = (request.query_params.get(name) or "").strip()
+    if not value:
+        return None
+    try:
+        day = parse_date(value)
+    except ValueError:
+        day = None
+    if day is None:
+        raise ValidationError({name: "Must be a date (YYYY-MM-DD)."})
+    return day
+
+
+def _analytics_cursor(row):
+    key = [row.day.isoformat(), getattr(row, "lane", "")]
+    return base64.urlsafe_b64encode(json.dumps(key).encode("utf-8")).decode("ascii").rstrip("=")
+
+
+def _parse_analytics_cursor(value):
+    try:
+        day, lane = json.loads(base64.urlsafe_b64decode(value + "=" * (-len(value) % 4)))
+        day = parse_date(day)
+    except (ValueError, TypeError):
+        day = None
+    if day is None or not isinstance(lane, str):
+        raise ValidationError({"cursor": "Invalid cursor."})
+    return day, lane
+
+
+class TripAnalyticsView(APIView):
+    def get(self, request):
+        by = request.query_params.get("by", "day")
+        if by not in ("day", "lane"):
+            raise ValidationError({"by": "Must be one of: day, lane."})
+        from_date = _date_param(request, "from")
+        to_date = _date_param(request, "to")
+        limit = min(_day_param(request, "limit") or ANALYTICS_PAGE_SIZE, MAX_ANALYTICS_PAGE_SIZE)
+
+        # Keyset pagination on the rollup's unique key, so every page is one
+        # index range scan however deep the client pages.
+        rows = TripDayRollup.objects.all() if by == "day" else TripLaneRollup.objects.all()
+        if from_date is not None:
+            rows = rows.filter(day__gte=from_date)
+        if to_date is not None:
+            rows = rows.filter(day__lte=to_date)
+        lane = request.query_params.get("lane")
+        if by == "lane" and lane:
+            rows = rows.filter(lane=lane)
+        cursor = request.query_params.get("cursor")
+        if cursor:
+            day, after_lane = _parse_analytics_cursor(cursor)
+            if by == "day":
+                rows = rows.filter(day__gt=day)
+            else:
+                rows = rows.filter(Q(day__gt=day) | Q(day=day, lane__gt=after_lane))
+        ordering = ("day",) if by == "day" else ("day", "lane")
+        page = list(rows.order_by(*ordering)[:limit + 1])
+
+        next_url = None
+        if len(page) > limit:
+            page = page[:limit]
+            params = {key: value for key, value in request.query_params.items() if key != "cursor"}
+            params["cursor"] = _analytics_cursor(page[-1])
+            next_url = request.build_absolute_uri(f"{reverse('trip-analytics')}?{urlencode(params)}")
+        return Response({"by": by, "results": [rollup_payload(row) for row in page], "next": next_url})
+
+
+class PlanJobView(APIView):
+    def get(self, request, job_id):
+        job = PlanJob.objects.unexpired().filter(pk=job_id).first()
+        if job is None:
+            return Response({"detail": "Job not found or expired"}, status=status.HTTP_404_NOT_FOUND)
+
+        body = {
+            "job_id": str(job.pk),
+            "status": job.status,
+            "created_at": job.created_at,
+            "started_at": job.started_at,
+            "finished_at": job.finished_at,
+            "expires_at": job.expires_at,
+        }
+        if job.status == PlanJob.Status.SUCCEEDED:
+            body["result"] = job.result
+        elif job.status == PlanJob.Status.FAILED:
+            body["error"] = job.error
+        return Response(body)
+
+
+class PlanMetricsView(APIView):
+    def get(self, request):
         return Response(
             {
-                "route": {
-                    "distance_miles": route_data["distance_miles"],
-                    "polyline": route_data["polyline"],
-                },
-                "summary": {
-                    "total_days": len(logs),
-                    "total_miles": route_data["distance_miles"],
-                    "driving_hours": summary_metrics["driving_hours"],
-                    "hos_compliant": summary_metrics["hos_compliant"],
-                    "hos_reasons": summary_metrics["hos_reasons"],
-                    "cycle_remaining_hours_before": summary_metrics["cycle_remaining_hours_before"],
-                    "cycle_remaining_hours_after": summary_metrics["cycle_remaining_hours_after"],
+                "plan_admission": plan_admission_gate().snapshot(),
+                "plan_jobs": {
+                    "queued": PlanJob.objects.filter(status=PlanJob.Status.QUEUED).count(),
+                    "running": PlanJob.objects.filter(status=PlanJob.Status.RUNNING).count(),
                 },
-                "stops": stops,
-                "timeline_stops": timeline_stops,
-                "logs": logs,
+                "hos_timeline_memo": timeline_memo.stats(),
             }
         )
@@ -0,0 +1,57 @@
+"""Benchmark load-to-driver assignment: lane miles, HOS pair screening, solve.
+
+Scatters drivers (random clocks and cycle hours) and loads across the
+central US and times one assign_loads call per size and worker count.
+
+Usage (from backend/):
+    python benchmarks/bench_assignment.py --sizes 50 100 --workers 1 4
+"""
+import argparse
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.assignment import assign_loads  # noqa: E402
+
+
+def _instance(size, seed=11):
+    rng = random.Random(seed)
+
+    def point():
+        return rng.uniform(-104.0, -82.0), rng.uniform(30.0, 44.0)
+
+    drivers = [
+        {"id": f"D{idx}", "location": point(), "clock": (rng.randrange(1440), 0, 0, rng.randrange(0, 60 * 60))}
+        for idx in range(size)
+    ]
+    loads = [
+        {"id": f"L{idx}", "pickup": point(), "dropoff": point(), "deliver_within_minutes": None}
+        for idx in range(size)
+    ]
+    return drivers, loads
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[50, 100])
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, os.cpu_count() or 1])
+    args = parser.parse_args()
+
+    print(f"{'size':>6}{'workers':>9}{'seconds':>9}{'feasible':>10}{'assigned':>10}{'cost':>12}")
+    for size in args.sizes:
+        for workers in args.workers:
+            drivers, loads = _instance(size)
+            started = time.perf_counter()
+            result = assign_loads(drivers, loads, cost_per_hour=25.0, workers=workers)
+            elapsed = time.perf_counter() - started
+            print(
+                f"{size:>6}{workers:>9}{elapsed:>9.2f}{result['pairs_feasible']:>10}"
+                f"{len(result['assignments']):>10}{result['total_cost']:>12.2f}"
+            )
+
+
+if __name__ == "__main__":
+    main()
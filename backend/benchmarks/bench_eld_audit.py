@@ -0,0 +1,70 @@
+"""Benchmark the ELD CSV audit: CSV parsing into columns, then the rule passes.
+
+Generates a synthetic fleet export (one row per duty-status change, ~8 rows
+per driver-day) in memory and reports rows/sec for each phase.
+
+Usage (from backend/):
+    python benchmarks/bench_eld_audit.py --drivers 100 1000 --days 30
+"""
+import argparse
+import io
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.eld_audit import audit_driver, collect_driver_columns, iter_duty_chunks  # noqa: E402
+
+EPOCH = 1_788_000_000
+
+
+def _export(drivers, days, seed=5):
+    rng = random.Random(seed)
+    buffer = io.StringIO()
+    buffer.write("driver_id,status,start,end\n")
+    for driver in range(drivers):
+        minute = rng.randrange(720)
+        for _ in range(days):
+            shift = [
+                ("on_duty", 60),
+                ("driving", rng.choice([240, 300, 330])),
+                ("off_duty", 30),
+                ("driving", rng.choice([240, 300, 360])),
+                ("on_duty", 45),
+                ("sleeper", rng.choice([540, 600, 660])),
+            ]
+            for status, minutes in shift:
+                start = EPOCH + minute * 60
+                buffer.write(f"D{driver:05d},{status},{start},{start + minutes * 60}\n")
+                minute += minutes
+    buffer.seek(0)
+    return buffer
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--drivers", type=int, nargs="+", default=[100, 1000])
+    parser.add_argument("--days", type=int, default=30)
+    args = parser.parse_args()
+
+    print(f"{'drivers':>8}{'rows':>10}{'parse s':>9}{'audit s':>9}{'rows/s':>10}{'violations':>12}")
+    for drivers in args.drivers:
+        export = _export(drivers, args.days)
+
+        started = time.perf_counter()
+        columns, _ = collect_driver_columns(iter_duty_chunks(export))
+        parsed = time.perf_counter()
+        violations = sum(len(audit_driver(driver)["violations"]) for driver in columns.values())
+        finished = time.perf_counter()
+
+        rows = sum(len(driver.status) for driver in columns.values())
+        print(
+            f"{drivers:>8}{rows:>10}{parsed - started:>9.2f}{finished - parsed:>9.2f}"
+            f"{rows / (finished - started):>10.0f}{violations:>12}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,56 @@
+"""Benchmark fuel planning: corridor projection of truck stops, then the
+cheapest-purchase pass.
+
+Builds a synthetic cross-country lane, scatters stations around it (half in
+the corridor, half far away) and times plan_fuel_stops per station count.
+
+Usage (from backend/):
+    python benchmarks/bench_fuel_planner.py --stations 1000 10000 --miles 2800
+"""
+import argparse
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.fuel_planner import plan_fuel_stops  # noqa: E402
+from utils.route_service import get_synthetic_route  # noqa: E402
+
+
+def _stations(polyline, count, seed=7):
+    rng = random.Random(seed)
+    stations = []
+    for idx in range(count):
+        lng, lat = rng.choice(polyline)
+        spread = 0.03 if idx % 2 else 3.0
+        stations.append(
+            (f"S{idx}", lng + rng.uniform(-spread, spread), lat + rng.uniform(-spread, spread), rng.uniform(3.2, 4.8))
+        )
+    return stations
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--stations", type=int, nargs="+", default=[1000, 10000])
+    parser.add_argument("--miles", type=float, default=2800)
+    args = parser.parse_args()
+
+    span = args.miles / 1.2 / 69.0
+    route = get_synthetic_route({"lng": -118.0, "lat": 36.0}, {"lng": -118.0 + span * 1.25, "lat": 36.0})
+    print(f"route {route['distance_miles']:.0f} miles, {len(route['polyline'])} points")
+    print(f"{'stations':>9}{'corridor':>10}{'purchases':>11}{'seconds':>9}{'cost':>10}")
+    for count in args.stations:
+        stations = _stations(route["polyline"], count)
+        started = time.perf_counter()
+        _, summary = plan_fuel_stops(route, stations, tank_range_miles=1000, mpg=6.5, start_fuel_fraction=0.5)
+        elapsed = time.perf_counter() - started
+        print(
+            f"{count:>9}{summary['stations_in_corridor']:>10}{summary['purchases']:>11}"
+            f"{elapsed:>9.2f}{summary['fuel_cost']:>10.2f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
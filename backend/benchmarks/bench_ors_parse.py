@@ -0,0 +1,89 @@
+"""Compare peak memory of the buffered and streaming ORS response parsers.
+
+Usage (from backend/):
+    python benchmarks/bench_ors_parse.py --points 50000 200000
+"""
+import argparse
+import io
+import json
+import os
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.ors_stream import parse_ors_directions  # noqa: E402
+from utils.route_service import get_synthetic_route  # noqa: E402
+
+PICKUP = {"lng": -118.2437, "lat": 34.0522}
+DROPOFF = {"lng": -74.0060, "lat": 40.7128}
+
+
+def _geojson_body(points):
+    route = get_synthetic_route(PICKUP, DROPOFF, num_points=points)
+    coordinates = [[round(lng, 6), round(lat, 6)] for lng, lat in route["polyline"]]
+    body = {
+        "type": "FeatureCollection",
+        "features": [
+            {
+                "type": "Feature",
+                "properties": {
+                    "segments": [{"distance": route["distance_miles"] * 1609.344, "duration": 1.0, "steps": []}],
+                    "summary": {"distance": route["distance_miles"] * 1609.344, "duration": route["duration_hours"] * 3600},
+                    "way_points": [0, points - 1],
+                },
+                "geometry": {"coordinates": coordinates, "type": "LineString"},
+            }
+        ],
+        "metadata": {"attribution": "synthetic"},
+    }
+    return json.dumps(body).encode("utf-8")
+
+
+def _buffered_parse(stream):
+    # The pre-streaming get_route path: whole body string -> dict -> coordinate list.
+    raw = stream.read().decode("utf-8")
+    data = json.loads(raw)
+    feature = data["features"][0]
+    summary = feature["properties"]["summary"]
+    return summary["distance"], feature["geometry"]["coordinates"]
+
+
+def _streaming_parse(stream):
+    route = parse_ors_directions(stream)[0]
+    return route["distance"], route["coordinates"]
+
+
+def _measure(parser, body):
+    started = time.perf_counter()
+    parser(io.BytesIO(body))
+    elapsed = time.perf_counter() - started
+
+    stream = io.BytesIO(body)
+    tracemalloc.start()
+    result = parser(stream)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del result
+    return elapsed, peak
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--points", type=int, nargs="+", default=[50_000, 200_000])
+    args = parser.parse_args()
+
+    print(f"{'points':>9}{'body MB':>10}{'buffered MB':>13}{'stream MB':>11}{'buffered s':>12}{'stream s':>10}")
+    for points in args.points:
+        body = _geojson_body(points)
+        buffered_s, buffered_peak = _measure(_buffered_parse, body)
+        stream_s, stream_peak = _measure(_streaming_parse, body)
+        print(
+            f"{points:>9}{len(body) / 1e6:>10.2f}{buffered_peak / 1e6:>13.2f}"
+            f"{stream_peak / 1e6:>11.2f}{buffered_s:>12.3f}{stream_s:>10.3f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,89 @@
+"""Benchmark the streaming log-sheet PDF export: bytes/sec and peak RSS.
+
+Each case runs in a fresh interpreter so peak RSS is per case. `stream`
+consumes pages as they are produced (what the export endpoint does);
+`buffer` joins the whole document in memory for comparison.
+
+Usage (from backend/):
+    python benchmarks/bench_pdf_export.py --days 14 140 1400
+"""
+import argparse
+import itertools
+import os
+import resource
+import subprocess
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.eld_pdf import iter_log_sheets_pdf  # noqa: E402
+from utils.hos_engine import generate_hos_logs  # noqa: E402
+from utils.route_service import get_synthetic_route  # noqa: E402
+from utils.stop_planner import plan_stops  # noqa: E402
+
+PICKUP = {"label": "Los Angeles, CA", "lng": -118.2437, "lat": 34.0522}
+DROPOFF = {"label": "New York, NY", "lng": -74.0060, "lat": 40.7128}
+
+
+def _days(count):
+    # Cycles one real multi-day plan so the input itself stays small.
+    route = get_synthetic_route(PICKUP, DROPOFF, points_per_mile=0.2)
+    template = generate_hos_logs(route, plan_stops(route, PICKUP, DROPOFF))
+    for number, day in zip(range(1, count + 1), itertools.cycle(template)):
+        yield {**day, "day": number}
+
+
+def _peak_rss_mb():
+    # ru_maxrss is KiB on Linux and bytes on macOS.
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+
+def _run_case(days, mode):
+    baseline_mb = _peak_rss_mb()
+    started = time.perf_counter()
+    total = 0
+    with open(os.devnull, "wb") as sink:
+        chunks = iter_log_sheets_pdf(_days(days), title="Benchmark trip")
+        if mode == "buffer":
+            document = b"".join(chunks)
+            total = len(document)
+            sink.write(document)
+        else:
+            for chunk in chunks:
+                total += len(chunk)
+                sink.write(chunk)
+    elapsed = time.perf_counter() - started
+    print(f"{days} {mode} {total} {elapsed:.6f} {baseline_mb:.1f} {_peak_rss_mb():.1f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--days", type=int, nargs="+", default=[14, 140, 1400])
+    parser.add_argument("--modes", nargs="+", choices=["stream", "buffer"], default=["stream", "buffer"])
+    parser.add_argument("--case", nargs=2, metavar=("DAYS", "MODE"), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.case:
+        _run_case(int(args.case[0]), args.case[1])
+        return
+
+    print(f"{'days':>6}{'mode':>8}{'MB out':>9}{'seconds':>9}{'MB/s':>8}{'pages/s':>9}{'base RSS':>10}{'peak RSS':>10}")
+    for days in args.days:
+        for mode in args.modes:
+            output = subprocess.run(
+                [sys.executable, os.path.abspath(__file__), "--case", str(days), mode],
+                check=True,
+                capture_output=True,
+                text=True,
+            ).stdout.split()
+            total, elapsed, base_mb, peak_mb = int(output[2]), float(output[3]), float(output[4]), float(output[5])
+            print(
+                f"{days:>6}{mode:>8}{total / 1e6:>9.2f}{elapsed:>9.3f}{total / 1e6 / elapsed:>8.2f}"
+                f"{days / elapsed:>9.0f}{base_mb:>10.1f}{peak_mb:>10.1f}"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,75 @@
+"""Benchmark GPS ping projection: grid segment index vs a linear segment scan.
+
+Pings are scattered around a synthetic LA -> NY route (up to ~2 miles off it)
+and projected onto the polyline, as POST /api/trips/<id>/pings does.
+
+Usage (from backend/):
+    python benchmarks/bench_ping_projection.py --pings 20000 --points-per-mile 0.2 1 4
+"""
+import argparse
+import math
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.route_geometry import PackedPolyline  # noqa: E402
+from utils.route_projection import MILES_PER_DEGREE, SegmentIndex  # noqa: E402
+from utils.route_service import get_synthetic_route  # noqa: E402
+
+PICKUP = {"label": "Los Angeles, CA", "lng": -118.2437, "lat": 34.0522}
+DROPOFF = {"label": "New York, NY", "lng": -74.0060, "lat": 40.7128}
+LINEAR_SAMPLE = 500
+
+
+def _pings(polyline, count, seed=7):
+    rng = random.Random(seed)
+    jitter = 2 / MILES_PER_DEGREE
+    for _ in range(count):
+        lng, lat = polyline[rng.randrange(len(polyline))]
+        yield lng + rng.uniform(-jitter, jitter), lat + rng.uniform(-jitter, jitter)
+
+
+def _linear_project(index, lng, lat):
+    best = index._nearest_in(lng, lat, math.cos(math.radians(lat)), range(index.segment_count), (math.inf, -1, 0.0))
+    return best[1]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--pings", type=int, default=20000)
+    parser.add_argument("--points-per-mile", type=float, nargs="+", default=[0.2, 1.0, 4.0])
+    args = parser.parse_args()
+
+    print(f"{'vertices':>9}{'cells':>8}{'build ms':>10}{'index pings/s':>15}{'linear pings/s':>16}{'speedup':>9}")
+    for points_per_mile in args.points_per_mile:
+        route = get_synthetic_route(PICKUP, DROPOFF, points_per_mile=points_per_mile)
+        polyline = PackedPolyline.from_points(route["polyline"])
+        polyline.cumulative_miles
+
+        started = time.perf_counter()
+        index = SegmentIndex(polyline)
+        build_ms = (time.perf_counter() - started) * 1000
+
+        pings = list(_pings(polyline, args.pings))
+        started = time.perf_counter()
+        for lng, lat in pings:
+            index.project(lng, lat)
+        indexed_rate = len(pings) / (time.perf_counter() - started)
+
+        sample = pings[:LINEAR_SAMPLE]
+        started = time.perf_counter()
+        for lng, lat in sample:
+            _linear_project(index, lng, lat)
+        linear_rate = len(sample) / (time.perf_counter() - started)
+
+        print(
+            f"{len(polyline):>9}{len(index.cells):>8}{build_ms:>10.1f}{indexed_rate:>15.0f}"
+            f"{linear_rate:>16.0f}{indexed_rate / linear_rate:>8.0f}x"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,60 @@
+"""Benchmark plan_stops/generate_hos_logs on synthetic lanes.
+
+Usage (from backend/):
+    python benchmarks/bench_planning.py --points 10000 100000
+"""
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.hos_engine import generate_hos_logs, timeline_memo  # noqa: E402
+from utils.route_service import get_synthetic_route  # noqa: E402
+from utils.stop_planner import plan_stops  # noqa: E402
+
+LANES = {
+    "la-lv": ({"label": "Los Angeles, CA", "lng": -118.2437, "lat": 34.0522}, {"label": "Las Vegas, NV", "lng": -115.1398, "lat": 36.1699}),
+    "la-chi": ({"label": "Los Angeles, CA", "lng": -118.2437, "lat": 34.0522}, {"label": "Chicago, IL", "lng": -87.6298, "lat": 41.8781}),
+    "la-nyc": ({"label": "Los Angeles, CA", "lng": -118.2437, "lat": 34.0522}, {"label": "New York, NY", "lng": -74.0060, "lat": 40.7128}),
+}
+
+
+def _timed(func, *args, repeat=3):
+    best = None
+    result = None
+    for _ in range(repeat):
+        started = time.perf_counter()
+        result = func(*args)
+        elapsed = time.perf_counter() - started
+        best = elapsed if best is None else min(best, elapsed)
+    return best, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--points", type=int, nargs="+", default=[10_000, 100_000])
+    parser.add_argument("--road-factor", type=float, default=1.2)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    print(f"{'lane':<8}{'points':>9}{'miles':>10}{'route s':>10}{'stops s':>10}{'hos cold':>10}{'hos memo':>10}{'days':>6}")
+    for lane, (pickup, dropoff) in LANES.items():
+        for points in args.points:
+            route_s, route = _timed(
+                lambda: get_synthetic_route(pickup, dropoff, road_factor=args.road_factor, num_points=points),
+                repeat=args.repeat,
+            )
+            stops_s, stops = _timed(plan_stops, route, pickup, dropoff, repeat=args.repeat)
+            timeline_memo.clear()
+            cold_s, _ = _timed(generate_hos_logs, route, stops, repeat=1)
+            hos_s, logs = _timed(generate_hos_logs, route, stops, repeat=args.repeat)
+            print(
+                f"{lane:<8}{points:>9}{route['distance_miles']:>10.1f}"
+                f"{route_s:>10.4f}{stops_s:>10.4f}{cold_s:>10.4f}{hos_s:>10.4f}{len(logs):>6}"
+            )
+
+
+if __name__ == "__main__":
+    main()
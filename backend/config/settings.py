@@ -159,3 +159,67 @@ if extra_cors_origins:
     CORS_ALLOWED_ORIGINS = list(dict.fromkeys(CORS_ALLOWED_ORIGINS + extra_cors_origins))
 
 CSRF_TRUSTED_ORIGINS = _split_env_list("CSRF_TRUSTED_ORIGINS")
+
+
+# Async trip planning jobs (see apps/trips/jobs.py and `manage.py run_plan_workers`)
+
+PLAN_JOB_WORKERS = int(os.getenv("PLAN_JOB_WORKERS", "2"))
+PLAN_JOB_POLL_SECONDS = float(os.getenv("PLAN_JOB_POLL_SECONDS", "1.0"))
+PLAN_JOB_RESULT_TTL_SECONDS = int(os.getenv("PLAN_JOB_RESULT_TTL_SECONDS", "3600"))
+PLAN_JOB_STALE_SECONDS = int(os.getenv("PLAN_JOB_STALE_SECONDS", "900"))
+PLAN_JOB_MAX_ATTEMPTS = int(os.getenv("PLAN_JOB_MAX_ATTEMPTS", "3"))
+
+# Admission control for synchronous POST /api/trips/plan (per process). Keep
+# PLAN_MAX_CONCURRENT below the server's worker threads so health checks and
+# async enqueues always find a free thread.
+
+PLAN_MAX_CONCURRENT = int(os.getenv("PLAN_MAX_CONCURRENT", "4"))
+PLAN_MAX_QUEUE = int(os.getenv("PLAN_MAX_QUEUE", "8"))
+PLAN_QUEUE_TIMEOUT_SECONDS = float(os.getenv("PLAN_QUEUE_TIMEOUT_SECONDS", "2.0"))
+PLAN_RETRY_AFTER_SECONDS = int(os.getenv("PLAN_RETRY_AFTER_SECONDS", "5"))
+
+# Stored trip plans: polylines go to an append-only geometry file, served with
+# ETags; clients revalidate on every poll and get 304 when nothing changed.
+# Rendered log-sheet SVGs are kept in the default cache by day content hash.
+
+ROUTE_GEOMETRY_STORE_PATH = os.getenv("ROUTE_GEOMETRY_STORE_PATH", str(BASE_DIR / "var" / "route_geometry.bin"))
+TRIP_PLAN_CACHE_CONTROL = os.getenv("TRIP_PLAN_CACHE_CONTROL", "private, no-cache")
+ELD_SVG_CACHE_SECONDS = int(os.getenv("ELD_SVG_CACHE_SECONDS", "86400"))
+
+# GPS ping ingestion (POST /api/trips/<id>/pings). Pings farther than
+# PING_MAX_OFFSET_MILES from the planned route are stored as off-route.
+
+PING_MAX_OFFSET_MILES = float(os.getenv("PING_MAX_OFFSET_MILES", "10"))
+PING_BATCH_MAX_PINGS = int(os.getenv("PING_BATCH_MAX_PINGS", "100000"))
+
+# Memoized HOS duty timelines (utils/hos_engine.py), shared per process so
+# repeat lanes skip the simulation; 0 disables.
+
+HOS_TIMELINE_MEMO_SIZE = int(os.getenv("HOS_TIMELINE_MEMO_SIZE", "1024"))
+
+# Load-to-driver assignment (POST /api/trips/assignments). Pair screening runs
+# in a process pool; 0 uses one worker per CPU, 1 screens in-process.
+
+ASSIGNMENT_WORKERS = int(os.getenv("ASSIGNMENT_WORKERS", "0"))
+
+# Fuel planning mode (`fuel_planning` on plan requests): a local truck-stop
+# price CSV (name, lng, lat, price) and default truck parameters.
+
+FUEL_STATIONS_PATH = os.getenv("FUEL_STATIONS_PATH", str(BASE_DIR / "var" / "fuel_stations.csv"))
+FUEL_CORRIDOR_MILES = float(os.getenv("FUEL_CORRIDOR_MILES", "5"))
+FUEL_TANK_RANGE_MILES = float(os.getenv("FUEL_TANK_RANGE_MILES", "1000"))
+FUEL_MPG = float(os.getenv("FUEL_MPG", "6.5"))
+
+# Stop rules for plan requests: a JSON file {"default": [...], "carriers":
+# {"<carrier>": [...]}} (see utils/stop_planner.py). Without it, breaks every
+# 400 miles and fuel every 1000 miles.
+
+STOP_RULES_PATH = os.getenv("STOP_RULES_PATH", str(BASE_DIR / "var" / "stop_rules.json"))
+
+# Corridor index for "trips near a point" (GET /api/trips/nearby): stored plans
+# are indexed by the geohash cells their polyline crosses. Precision 4 cells
+# are about 24 x 12 miles; without `since`, only plans created in the last
+# TRIP_NEARBY_ACTIVE_DAYS are searched.
+
+TRIP_CORRIDOR_GEOHASH_PRECISION = int(os.getenv("TRIP_CORRIDOR_GEOHASH_PRECISION", "4"))
+TRIP_NEARBY_ACTIVE_DAYS = int(os.getenv("TRIP_NEARBY_ACTIVE_DAYS", "14"))
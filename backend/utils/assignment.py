@@ -0,0 +1,214 @@
+import math
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from itertools import repeat
+
+from utils.departure_search import _outcome
+from utils.hos_engine import CYCLE_LIMIT_HOURS, MINUTES_PER_DAY, _duty_ops, _simulate
+from utils.route_projection import MILES_PER_DEGREE
+from utils.route_service import SYNTHETIC_ROAD_FACTOR
+from utils.stop_planner import _haversine_miles, plan_stops
+
+
+# Load-to-driver assignment: lane miles estimated from great-circle distance,
+# an HOS screen per (driver, load) pair on the compact simulation, then an
+# optimal min-cost assignment (Hungarian algorithm) over the feasible pairs.
+PARALLEL_MIN_PAIRS = 400
+
+_executor = None
+_executor_workers = 0
+_executor_lock = threading.Lock()
+
+
+def lane_miles(origin, destination, road_factor=SYNTHETIC_ROAD_FACTOR):
+    # Road miles estimated like the synthetic route backend: great-circle
+    # distance times a road factor, not a routed distance.
+    return round(_haversine_miles(origin, destination) * road_factor, 2)
+
+
+def _mile_line(miles):
+    # Straight equator polyline whose haversine length is `miles`, so
+    # plan_stops places breaks and fuel by mile without real geometry.
+    return [[0.0, 0.0], [miles / MILES_PER_DEGREE, 0.0]]
+
+
+def screen_pair(deadhead_miles, loaded_miles, clock, deliver_within_minutes=None, rules=None):
+    # Simulates the driver's deadhead then loaded run from their clock state
+    # (minute, driving, shift, cycle minutes used). Returns (days, arrival,
+    # elapsed, driving minutes), or None when the 70-hour cycle or the
+    # delivery window rules the pair out.
+    start, cycle_minutes = clock[:3], clock[3]
+    total = deadhead_miles + loaded_miles
+    route = {"distance_miles": total, "polyline": _mile_line(total)}
+    stops = plan_stops(route, {"label": "Pickup"}, {"label": "Dropoff"}, rules=rules)
+    if deadhead_miles > 0:
+        stops[0] = {**stops[0], "type": "start"}
+        position = next(idx for idx, stop in enumerate(stops) if stop["mile"] >= deadhead_miles)
+        stops.insert(position, {"type": "pickup", "mile": deadhead_miles, "label": "Pickup"})
+
+    ops, _ = _duty_ops(route, stops)
+    driving_minutes = sum(op[1] for op in ops if op[0] == "driving")
+    if cycle_minutes + driving_minutes > CYCLE_LIMIT_HOURS * 60:
+        return None
+    total_days, arrival = _outcome(_simulate(ops, start), "arrival", None)
+    elapsed = arrival - start[0]
+    if deliver_within_minutes is not None and elapsed > deliver_within_minutes:
+        return None
+    return total_days, arrival, elapsed, driving_minutes
+
+
+def _screen_rows(rows, loads, rules=None):
+    # rows: [(clock, deadhead miles per load)]; loads: [(loaded miles, window)].
+    return [
+        [
+            screen_pair(deadhead, loaded, clock, window, rules)
+            for deadhead, (loaded, window) in zip(deadheads, loads)
+        ]
+        for clock, deadheads in rows
+    ]
+
+
+def _process_pool(workers):
+    # One spawned pool per process, reused across requests; spawned workers
+    # only import utils, not Django.
+    global _executor, _executor_workers
+    with _executor_lock:
+        if _executor is None or _executor_workers != workers:
+            if _executor is not None:
+                _executor.shutdown(wait=False)
+            _executor = ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn"))
+            _executor_workers = workers
+        return _executor
+
+
+def screen_matrix(clocks, deadhead, loads, workers=None, rules=None):
+    # HOS outcomes for every (driver, load) pair. Rows are split into one chunk
+    # per worker when the matrix is big enough to amortize the process pool.
+    workers = workers or os.cpu_count() or 1
+    rows = list(zip(clocks, deadhead))
+    if workers <= 1 or len(rows) * len(loads) < PARALLEL_MIN_PAIRS:
+        return _screen_rows(rows, loads, rules)
+
+    size = math.ceil(len(rows) / workers)
+    chunks = [rows[idx:idx + size] for idx in range(0, len(rows), size)]
+    pool = _process_pool(workers)
+    screened = pool.map(_screen_rows, chunks, repeat(loads), repeat(rules))
+    return [row for chunk in screened for row in chunk]
+
+
+def min_cost_assignment(cost):
+    # Hungarian algorithm with potentials, O(n^2 m) for n rows <= m columns.
+    # Returns the column assigned to each row.
+    n = len(cost)
+    m = len(cost[0]) if n else 0
+    u = [0.0] * (n + 1)
+    v = [0.0] * (m + 1)
+    match = [0] * (m + 1)
+    way = [0] * (m + 1)
+    for row in range(1, n + 1):
+        match[0] = row
+        col = 0
+        min_slack = [math.inf] * (m + 1)
+        used = [False] * (m + 1)
+        while match[col]:
+            used[col] = True
+            current = match[col]
+            costs = cost[current - 1]
+            offset = u[current]
+            delta = math.inf
+            next_col = 0
+            for j in range(1, m + 1):
+                if used[j]:
+                    continue
+                slack = costs[j - 1] - offset - v[j]
+                if slack < min_slack[j]:
+                    min_slack[j] = slack
+                    way[j] = col
+                if min_slack[j] < delta:
+                    delta = min_slack[j]
+                    next_col = j
+            for j in range(m + 1):
+                if used[j]:
+                    u[match[j]] += delta
+                    v[j] -= delta
+                else:
+                    min_slack[j] -= delta
+            col = next_col
+        while col:
+            previous = way[col]
+            match[col] = match[previous]
+            col = previous
+
+    assigned = [-1] * n
+    for col in range(1, m + 1):
+        if match[col]:
+            assigned[match[col] - 1] = col - 1
+    return assigned
+
+
+def assign_loads(drivers, loads, cost_per_hour=0.0, workers=None, rules=None):
+    # drivers: [{"id", "location": (lng, lat), "clock": (minute, driving,
+    # shift, cycle minutes used)}]; loads: [{"id", "pickup", "dropoff",
+    # "deliver_within_minutes"}]. Cost is deadhead miles plus cost_per_hour
+    # for every hour from the driver's start to delivery.
+    loaded = [lane_miles(load["pickup"], load["dropoff"]) for load in loads]
+    deadhead = [[lane_miles(driver["location"], load["pickup"]) for load in loads] for driver in drivers]
+    outcomes = screen_matrix(
+        [driver["clock"] for driver in drivers],
+        deadhead,
+        [(miles, load.get("deliver_within_minutes")) for miles, load in zip(loaded, loads)],
+        workers=workers,
+        rules=rules,
+    )
+
+    cost = [
+        [
+            None if outcome is None else deadhead[i][j] + cost_per_hour * outcome[2] / 60
+            for j, outcome in enumerate(row)
+        ]
+        for i, row in enumerate(outcomes)
+    ]
+    # Infeasible pairs cost more than any full set of feasible ones, so the
+    # solver maximizes feasible matches first and only then minimizes cost.
+    blocked = 1 + sum(value for row in cost for value in row if value is not None)
+    matrix = [[blocked if value is None else value for value in row] for row in cost]
+
+    transpose = len(drivers) > len(loads)
+    if transpose:
+        matrix = [list(column) for column in zip(*matrix)]
+    assigned = min_cost_assignment(matrix) if matrix and matrix[0] else []
+    pairs = [(col, row) for row, col in enumerate(assigned)] if transpose else list(enumerate(assigned))
+
+    assignments = []
+    for i, j in pairs:
+        if j < 0 or cost[i][j] is None:
+            continue
+        total_days, arrival, elapsed, driving_minutes = outcomes[i][j]
+        assignments.append(
+            {
+                "driver_id": drivers[i]["id"],
+                "load_id": loads[j]["id"],
+                "deadhead_miles": deadhead[i][j],
+                "loaded_miles": loaded[j],
+                "cost": round(cost[i][j], 2),
+                "total_days": total_days,
+                "arrival_day": (arrival - 1) // MINUTES_PER_DAY + 1,
+                "arrival_minute": (arrival - 1) % MINUTES_PER_DAY + 1,
+                "elapsed_hours": round(elapsed / 60, 2),
+                "driving_hours": round(driving_minutes / 60, 2),
+            }
+        )
+
+    assignments.sort(key=lambda item: str(item["driver_id"]))
+    matched_drivers = {item["driver_id"] for item in assignments}
+    matched_loads = {item["load_id"] for item in assignments}
+    return {
+        "assignments": assignments,
+        "total_cost": round(sum(item["cost"] for item in assignments), 2),
+        "unassigned_drivers": [driver["id"] for driver in drivers if driver["id"] not in matched_drivers],
+        "unassigned_loads": [load["id"] for load in loads if load["id"] not in matched_loads],
+        "pairs_screened": len(drivers) * len(loads),
+        "pairs_feasible": sum(value is not None for row in cost for value in row),
+    }
@@ -0,0 +1,87 @@
+from utils.hos_engine import MINUTES_PER_DAY, _duty_ops, _simulate, start_state
+
+
+OBJECTIVES = ("days", "arrival")
+DEFAULT_STEP_MINUTES = 15
+MAX_CANDIDATES = 5000
+
+
+def _rank_key(objective):
+    # Fewest log days, then least time on the road; or earliest arrival.
+    if objective == "days":
+        return lambda c: (c["total_days"], c["elapsed_minutes"], c["arrival"], c["departure_minute"])
+    return lambda c: (c["arrival"], c["total_days"], c["elapsed_minutes"], c["departure_minute"])
+
+
+def _outcome(days, objective, best):
+    # Consumes compact days from _simulate and returns (total_days, arrival),
+    # with arrival in minutes from day 1 midnight to the end of the last duty
+    # event. Returns None as soon as the candidate cannot beat `best`: every
+    # trip ends with on-duty time, so a day that starts after the best arrival
+    # (or a day past the best day count) rules it out.
+    total_days = 0
+    arrival = 0
+    for day_number, events, _, _ in days:
+        total_days = day_number
+        day_start = (day_number - 1) * MINUTES_PER_DAY
+        if best is not None:
+            if objective == "days" and day_number > best["total_days"]:
+                return None
+            if objective == "arrival" and day_start > best["arrival"]:
+                return None
+        for status, _, end in events:
+            if status != "off_duty":
+                arrival = day_start + end
+    return total_days, arrival
+
+
+def search_departures(route, stops, departure_minutes, clocks=((0, 0),), objective="days", keep=5):
+    # Evaluates every departure minute x starting clock (driving, shift minutes
+    # used) against one duty-op signature and returns the best schedules.
+    if objective not in OBJECTIVES:
+        raise ValueError(f"Objective must be one of: {', '.join(OBJECTIVES)}.")
+    ops, _ = _duty_ops(route or {}, stops or [])
+    # Candidates are bounded by the best schedule so far rather than by
+    # comparing clocks: with calendar-day resets, more hours already used can
+    # end day 1 sooner and still arrive earlier.
+    clocks = list(dict.fromkeys((int(driving), int(shift)) for driving, shift in clocks))
+    rank = _rank_key(objective)
+
+    completed = []
+    best = None
+    pruned = 0
+    for minute in departure_minutes:
+        for driving, shift in clocks:
+            start = start_state(minute, driving, shift)
+            outcome = _outcome(_simulate(ops, start), objective, best)
+            if outcome is None:
+                pruned += 1
+                continue
+            total_days, arrival = outcome
+            arrival_day, arrival_minute = divmod(arrival - 1, MINUTES_PER_DAY)
+            candidate = {
+                "departure_minute": start[0],
+                "driving_minutes_used": start[1],
+                "shift_minutes_used": start[2],
+                "total_days": total_days,
+                "arrival": arrival,
+                "arrival_day": arrival_day + 1,
+                "arrival_minute": arrival_minute + 1,
+                "elapsed_minutes": arrival - start[0],
+            }
+            completed.append(candidate)
+            if best is None or rank(candidate) < rank(best):
+                best = candidate
+
+    completed.sort(key=rank)
+    return {
+        "objective": objective,
+        "evaluated": len(completed),
+        "pruned": pruned,
+        "best": best,
+        "ranked": completed[:keep],
+    }
+
+
+def departure_minutes(earliest=0, latest=MINUTES_PER_DAY, step=DEFAULT_STEP_MINUTES):
+    return list(range(int(earliest), min(int(latest), MINUTES_PER_DAY), int(step)))
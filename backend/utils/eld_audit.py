@@ -0,0 +1,279 @@
+import csv
+import math
+from array import array
+from bisect import bisect_right
+from datetime import datetime, timezone
+from itertools import accumulate, compress
+
+from utils.hos_engine import MAX_DRIVING_MINUTES_PER_DAY, MAX_SHIFT_MINUTES_PER_DAY, MINUTES_PER_DAY
+
+
+# Audits recorded duty-status rows against the rules hos_engine plans with.
+# Rows are read in chunks into per-driver columns (start/end epoch minutes and
+# a status code), and each rule is a handful of whole-column passes:
+# prefix sums, prefix maxima and reset-carrying scans via itertools.accumulate,
+# instead of a per-row state machine.
+OFF_DUTY, SLEEPER, DRIVING, ON_DUTY = range(4)
+STATUS_NAMES = ("off_duty", "sleeper", "driving", "on_duty")
+STATUS_CODES = {
+    "off_duty": OFF_DUTY,
+    "off": OFF_DUTY,
+    "offduty": OFF_DUTY,
+    "1": OFF_DUTY,
+    "sleeper": SLEEPER,
+    "sleeper_berth": SLEEPER,
+    "sb": SLEEPER,
+    "2": SLEEPER,
+    "driving": DRIVING,
+    "drive": DRIVING,
+    "d": DRIVING,
+    "3": DRIVING,
+    "on_duty": ON_DUTY,
+    "on": ON_DUTY,
+    "on_duty_not_driving": ON_DUTY,
+    "4": ON_DUTY,
+}
+
+SHIFT_RESET_MINUTES = 10 * 60
+CYCLE_RESET_MINUTES = 34 * 60
+BREAK_MINUTES = 30
+MAX_DRIVING_WITHOUT_BREAK_MINUTES = 8 * 60
+CYCLE_LIMIT_MINUTES = 70 * 60
+CYCLE_WINDOW_MINUTES = 8 * MINUTES_PER_DAY
+
+RULES = ("driving_11h", "window_14h", "break_30m", "cycle_70h")
+CSV_COLUMNS = ("driver_id", "status", "start", "end")
+DEFAULT_CHUNK_ROWS = 65536
+
+
+def _epoch_minutes(value):
+    value = value.strip()
+    try:
+        return float(value) / 60
+    except ValueError:
+        pass
+    moment = datetime.fromisoformat(value.replace("Z", "+00:00"))
+    if moment.tzinfo is None:
+        moment = moment.replace(tzinfo=timezone.utc)
+    return moment.timestamp() / 60
+
+
+def _iso(minutes):
+    return datetime.fromtimestamp(minutes * 60, tz=timezone.utc).isoformat().replace("+00:00", "Z")
+
+
+def iter_duty_chunks(lines, chunk_rows=DEFAULT_CHUNK_ROWS):
+    # Yields (drivers, status, start, end, rejected) per chunk of CSV rows:
+    # parallel columns with one driver id, status code and start/end in epoch
+    # minutes per accepted row. Columns may come in any order; extras are ignored.
+    reader = csv.reader(lines)
+    header = [name.strip().lower() for name in next(reader, [])]
+    missing = [name for name in CSV_COLUMNS if name not in header]
+    if missing:
+        raise ValueError(f"ELD CSV is missing column(s): {', '.join(missing)}")
+    driver_at, status_at, start_at, end_at = (header.index(name) for name in CSV_COLUMNS)
+    width = max(driver_at, status_at, start_at, end_at) + 1
+
+    def empty():
+        return [], array("B"), array("d"), array("d"), 0
+
+    drivers, status, start, end, rejected = empty()
+    for row in reader:
+        try:
+            if len(row) < width:
+                raise ValueError
+            code = STATUS_CODES[row[status_at].strip().lower().replace(" ", "_")]
+            row_start = _epoch_minutes(row[start_at])
+            row_end = _epoch_minutes(row[end_at])
+            if not row_end > row_start or not math.isfinite(row_end - row_start):
+                raise ValueError
+        except (KeyError, ValueError):
+            rejected += 1
+            continue
+
+        drivers.append(row[driver_at].strip())
+        status.append(code)
+        start.append(row_start)
+        end.append(row_end)
+        if len(drivers) >= chunk_rows:
+            yield drivers, status, start, end, rejected
+            drivers, status, start, end, rejected = empty()
+
+    if drivers or rejected:
+        yield drivers, status, start, end, rejected
+
+
+class DriverColumns:
+    __slots__ = ("status", "start", "end")
+
+    def __init__(self):
+        self.status = array("B")
+        self.start = array("d")
+        self.end = array("d")
+
+
+def collect_driver_columns(chunks):
+    # Exports are usually grouped by driver, so each chunk is appended as
+    # runs of consecutive rows for the same driver.
+    columns = {}
+    rejected = 0
+    for drivers, status, start, end, chunk_rejected in chunks:
+        rejected += chunk_rejected
+        run_starts = [0] + [idx for idx in range(1, len(drivers)) if drivers[idx] != drivers[idx - 1]]
+        for run_start, run_end in zip(run_starts, run_starts[1:] + [len(drivers)]):
+            driver = columns.get(drivers[run_start])
+            if driver is None:
+                driver = columns[drivers[run_start]] = DriverColumns()
+            driver.status.extend(status[run_start:run_end])
+            driver.start.extend(start[run_start:run_end])
+            driver.end.extend(end[run_start:run_end])
+    return columns, rejected
+
+
+def _carry(values):
+    # Forward-fills None with the last value seen.
+    return accumulate(values, lambda previous, value: previous if value is None else value)
+
+
+def _since_reset(amounts, resets):
+    # Running total of `amounts` that restarts at every row flagged in `resets`.
+    totals = list(accumulate(amounts))
+    before = [total - amount for total, amount in zip(totals, amounts)]
+    bases = _carry(base if reset else None for base, reset in zip(before, resets))
+    return [total - base for total, base in zip(totals, bases)]
+
+
+def _gaps(starts, ends):
+    # Time since the previous row ended (rows are sorted by start); the first
+    # row counts as preceded by a full reset.
+    previous_end = accumulate(ends, max)
+    return [math.inf] + [start - end for start, end in zip(starts[1:], previous_end)]
+
+
+def _episodes(rule, flagged, groups, at, values, limit):
+    # One violation per group (shift, driving stretch or cycle excursion),
+    # reported at its first flagged row with the worst value in the group.
+    found = {}
+    for idx in compress(range(len(flagged)), flagged):
+        episode = found.get(groups[idx])
+        if episode is None:
+            found[groups[idx]] = {"rule": rule, "at": at[idx], "worst": values[idx]}
+        else:
+            episode["worst"] = max(episode["worst"], values[idx])
+    return [
+        {
+            "rule": episode["rule"],
+            "at": _iso(episode["at"]),
+            "limit_hours": limit / 60,
+            "excess_minutes": round(episode["worst"] - limit, 1),
+        }
+        for episode in found.values()
+    ]
+
+
+def audit_driver(columns):
+    status, start, end = columns.status, columns.start, columns.end
+    if any(later < earlier for earlier, later in zip(start, start[1:])):
+        order = sorted(range(len(start)), key=start.__getitem__)
+        status = array("B", (status[idx] for idx in order))
+        start = array("d", (start[idx] for idx in order))
+        end = array("d", (end[idx] for idx in order))
+
+    totals = {
+        name: round(sum(e - s for s, e, k in zip(start, end, status) if k == code), 1)
+        for code, name in enumerate(STATUS_NAMES)
+    }
+
+    # Shift and cycle rules only look at work rows; everything between them
+    # (off duty, sleeper, unrecorded time) counts as rest.
+    working = [code in (DRIVING, ON_DUTY) for code in status]
+    work_start = list(compress(start, working))
+    work_end = list(compress(end, working))
+    work_driving = [code == DRIVING for code in compress(status, working)]
+    work_minutes = [e - s for s, e in zip(work_start, work_end)]
+    violations = []
+
+    if work_start:
+        rest_before = _gaps(work_start, work_end)
+        shift_resets = [rest >= SHIFT_RESET_MINUTES for rest in rest_before]
+        shift_ids = list(accumulate(shift_resets))
+        shift_starts = list(_carry(s if reset else None for s, reset in zip(work_start, shift_resets)))
+
+        driven = _since_reset([m if d else 0.0 for m, d in zip(work_minutes, work_driving)], shift_resets)
+        violations += _episodes(
+            "driving_11h",
+            [d and total > MAX_DRIVING_MINUTES_PER_DAY for d, total in zip(work_driving, driven)],
+            shift_ids,
+            work_end,
+            driven,
+            MAX_DRIVING_MINUTES_PER_DAY,
+        )
+
+        elapsed = [e - s for e, s in zip(work_end, shift_starts)]
+        violations += _episodes(
+            "window_14h",
+            [d and span > MAX_SHIFT_MINUTES_PER_DAY for d, span in zip(work_driving, elapsed)],
+            shift_ids,
+            work_end,
+            elapsed,
+            MAX_SHIFT_MINUTES_PER_DAY,
+        )
+
+        # 70 hours on duty in any 8 days, restarted by 34 consecutive hours off.
+        cycle_starts = list(
+            _carry(s if rest >= CYCLE_RESET_MINUTES else None for s, rest in zip(work_start, rest_before))
+        )
+        on_duty_before = [0.0] + list(accumulate(work_minutes))
+        windows = [max(s, e - CYCLE_WINDOW_MINUTES) for s, e in zip(cycle_starts, work_end)]
+        ended_by = list(accumulate(work_end, max))
+        firsts = [bisect_right(ended_by, window) for window in windows]
+        on_duty = [
+            on_duty_before[idx + 1] - on_duty_before[first] - max(0.0, window - work_start[first])
+            for idx, (first, window) in enumerate(zip(firsts, windows))
+        ]
+        over = [total > CYCLE_LIMIT_MINUTES for total in on_duty]
+        violations += _episodes(
+            "cycle_70h",
+            over,
+            list(accumulate(flag and not previous for flag, previous in zip(over, [False] + over))),
+            work_end,
+            on_duty,
+            CYCLE_LIMIT_MINUTES,
+        )
+
+    # The break rule counts driving since the last 30 consecutive minutes
+    # without driving, whatever the duty status of that interruption.
+    drive_start = list(compress(start, (code == DRIVING for code in status)))
+    drive_end = list(compress(end, (code == DRIVING for code in status)))
+    if drive_start:
+        break_resets = [gap >= BREAK_MINUTES for gap in _gaps(drive_start, drive_end)]
+        since_break = _since_reset([e - s for s, e in zip(drive_start, drive_end)], break_resets)
+        violations += _episodes(
+            "break_30m",
+            [total > MAX_DRIVING_WITHOUT_BREAK_MINUTES for total in since_break],
+            list(accumulate(break_resets)),
+            drive_end,
+            since_break,
+            MAX_DRIVING_WITHOUT_BREAK_MINUTES,
+        )
+
+    violations.sort(key=lambda violation: (violation["at"], RULES.index(violation["rule"])))
+    counts = dict.fromkeys(RULES, 0)
+    for violation in violations:
+        counts[violation["rule"]] += 1
+    return {
+        "records": len(status),
+        "first_at": _iso(start[0]) if len(start) else None,
+        "last_at": _iso(max(end)) if len(end) else None,
+        "duty_minutes": totals,
+        "violation_counts": counts,
+        "violations": violations,
+    }
+
+
+def audit_eld_csv(lines, chunk_rows=DEFAULT_CHUNK_ROWS):
+    # Reads the whole export, then returns (reports, rejected_rows); reports
+    # are produced lazily, one per driver in first-seen order.
+    columns, rejected = collect_driver_columns(iter_duty_chunks(lines, chunk_rows))
+    reports = ({"driver_id": driver_id, **audit_driver(driver)} for driver_id, driver in columns.items())
+    return reports, rejected
@@ -0,0 +1,230 @@
+import zlib
+from array import array
+from functools import lru_cache
+
+from utils.eld_svg import (
+    GRID_BOTTOM,
+    LEFT_PAD,
+    PLOT_HEIGHT,
+    PLOT_WIDTH,
+    REMARKS_BOX_H,
+    REMARKS_BOX_TOP,
+    ROW_HEIGHT,
+    STATUS_ROWS,
+    SVG_HEIGHT,
+    THEMES,
+    TOP_PAD,
+    WIDTH,
+    _hour_label,
+    _num,
+    _row_center_y,
+    _x,
+    duty_events,
+    remark_brackets,
+    status_totals,
+    step_commands,
+)
+
+
+# Minimal PDF 1.4 writer for log sheets: one landscape Letter page per day, drawn
+# with the same layout as utils/eld_svg.py. Pages are compressed and emitted as
+# soon as they are drawn; only object offsets are kept until the xref table.
+PDF_LAYOUT_VERSION = 1
+
+PAGE_WIDTH = 792
+PAGE_HEIGHT = 612
+MARGIN = 24
+TITLE_SPACE = 18
+SCALE = min((PAGE_WIDTH - 2 * MARGIN) / WIDTH, (PAGE_HEIGHT - 2 * MARGIN - TITLE_SPACE) / SVG_HEIGHT)
+ORIGIN_X = (PAGE_WIDTH - WIDTH * SCALE) / 2
+ORIGIN_Y = PAGE_HEIGHT - MARGIN - TITLE_SPACE
+
+CATALOG_OBJ = 1
+PAGES_OBJ = 2
+FONT_OBJ = 3
+BOLD_FONT_OBJ = 4
+FIRST_PAGE_OBJ = 5
+
+# Helvetica advance widths (1/1000 em) for printable ASCII, used to anchor
+# right-aligned and centered labels; other characters use the digit width.
+_HELVETICA_WIDTHS = dict(
+    zip(
+        (chr(code) for code in range(32, 127)),
+        (
+            278, 278, 355, 556, 556, 889, 667, 191, 333, 333, 389, 584, 278, 333, 278, 278,
+            556, 556, 556, 556, 556, 556, 556, 556, 556, 556, 278, 278, 584, 584, 584, 556,
+            1015, 667, 667, 722, 722, 667, 611, 778, 722, 278, 500, 667, 556, 833, 722, 778,
+            667, 778, 722, 667, 611, 722, 667, 944, 667, 667, 611, 278, 278, 278, 469, 556,
+            333, 556, 556, 500, 556, 556, 278, 556, 556, 222, 222, 500, 222, 833, 556, 556,
+            556, 556, 333, 500, 278, 556, 500, 722, 500, 500, 500, 334, 260, 334, 584,
+        ),
+    )
+)
+
+
+def _text_width(text, size):
+    return sum(_HELVETICA_WIDTHS.get(char, 556) for char in text) * size / 1000
+
+
+def _rgb(color):
+    color = color.lstrip("#")
+    return " ".join(_num(int(color[idx:idx + 2], 16) / 255) for idx in (0, 2, 4))
+
+
+def _pdf_string(text):
+    # WinAnsiEncoding is cp1252; the result is kept as latin-1 code points
+    # until the content stream is encoded.
+    raw = str(text).encode("cp1252", "replace").decode("latin-1")
+    return "(" + raw.replace("\\", "\\\\").replace("(", "\\(").replace(")", "\\)") + ")"
+
+
+def _line(x1, y1, x2, y2, color, width, cap=0):
+    return f"{_rgb(color)} RG {_num(width)} w {cap} J {_num(x1)} {_num(y1)} m {_num(x2)} {_num(y2)} l S"
+
+
+def _text(x, y, size, text, color, anchor="start", rotated=False, bold=False, y_down=True):
+    # Sheet coordinates are y-down (see _page_content), so the text matrix
+    # flips glyphs back upright; rotated text reads bottom-to-top.
+    width = _text_width(text, size)
+    shift = {"start": 0, "middle": width / 2, "end": width}[anchor]
+    font = "/F2" if bold else "/F1"
+    if rotated:
+        matrix = f"0 {_num(-size)} {_num(-size)} 0 {_num(x)} {_num(y + shift)}"
+    else:
+        matrix = f"{_num(size)} 0 0 {_num(-size if y_down else size)} {_num(x - shift)} {_num(y)}"
+    return f"BT {font} 1 Tf {_rgb(color)} rg {matrix} Tm {_pdf_string(text)} Tj ET"
+
+
+@lru_cache(maxsize=None)
+def _grid_ops():
+    colors = THEMES["light"]
+    ops = [
+        f"{_rgb(colors['strong'])} RG 2.2 w {LEFT_PAD} {TOP_PAD} {PLOT_WIDTH} {PLOT_HEIGHT} re S",
+        f"{_rgb(colors['major'])} RG 1.8 w {LEFT_PAD} {REMARKS_BOX_TOP} {PLOT_WIDTH} {REMARKS_BOX_H} re S",
+    ]
+    for idx in range(97):
+        minute = idx * 15
+        line_x = _x(minute)
+        is_hour = minute % 60 == 0
+        color = colors["major"] if is_hour else colors["minor"]
+        ops.append(_line(line_x, TOP_PAD, line_x, GRID_BOTTOM, color, 2 if is_hour else 0.75))
+        tick_len = REMARKS_BOX_H * (0.85 if is_hour else 0.5)
+        ops.append(_line(line_x, REMARKS_BOX_TOP, line_x, REMARKS_BOX_TOP + tick_len, color, 2 if is_hour else 0.9))
+    for hour in range(25):
+        if _hour_label(hour):
+            ops.append(_text(_x(hour * 60), TOP_PAD - 12, 10, _hour_label(hour), colors["text"], "middle"))
+    for idx, (_, label) in enumerate(STATUS_ROWS):
+        if idx > 0:
+            line_y = TOP_PAD + ROW_HEIGHT * idx
+            ops.append(_line(LEFT_PAD, line_y, LEFT_PAD + PLOT_WIDTH, line_y, colors["major"], 2.2))
+        ops.append(_text(LEFT_PAD - 10, _row_center_y(idx) + 4, 12, label, colors["text"], "end"))
+    ops.append(_text(LEFT_PAD + PLOT_WIDTH + 45, TOP_PAD - 12, 11, "TOTAL HOURS", colors["text"], "middle"))
+    ops.append(
+        _text(LEFT_PAD - 10, REMARKS_BOX_TOP + REMARKS_BOX_H / 2 + 4, 11, "REMARKS", colors["text"], "end", bold=True)
+    )
+    return "\n".join(ops)
+
+
+def _page_content(day, title):
+    colors = THEMES["light"]
+    heading = f"DRIVER'S DAILY LOG (ONE CALENDAR DAY — 24 HOURS) — Day {day.get('day', '')}"
+    heading_y = PAGE_HEIGHT - MARGIN - 6
+    ops = [_text(MARGIN, heading_y, 12, heading, colors["text"], bold=True, y_down=False)]
+    if title:
+        ops.append(_text(PAGE_WIDTH - MARGIN, heading_y, 9, title, colors["text"], "end", y_down=False))
+
+    # Everything below is drawn in the SVG sheet's y-down coordinate space.
+    ops.append(f"q {SCALE:.4f} 0 0 {-SCALE:.4f} {ORIGIN_X:.2f} {ORIGIN_Y:.2f} cm")
+    ops.append(_grid_ops())
+
+    events = duty_events(day)
+    totals = status_totals(events)
+    for idx, (status, _) in enumerate(STATUS_ROWS):
+        ops.append(
+            _text(
+                LEFT_PAD + PLOT_WIDTH + 45, _row_center_y(idx) + 4, 13, f"{totals[status] / 60:.2f}", colors["text"], "middle"
+            )
+        )
+
+    commands = step_commands(events)
+    if commands:
+        path = " ".join(f"{_num(x)} {_num(y)} {'m' if command == 'M' else 'l'}" for command, x, y in commands)
+        ops.append(f"{_rgb(colors['path'])} RG 6.5 w 0 J 0 j {path} S")
+
+    for bracket in remark_brackets(day.get("remarks")):
+        left, right, top, bottom, mid = (bracket[key] for key in ("left", "right", "top", "bottom", "mid"))
+        ops.append(
+            f"{_rgb(colors['path'])} RG 3.3 w 2 J {_num(left)} {_num(top)} m {_num(left)} {_num(bottom)} l "
+            f"{_num(right)} {_num(bottom)} l {_num(right)} {_num(top)} l S"
+        )
+        ops.append(_line(mid, bottom, mid, bottom + 12, colors["path"], 1.5, cap=1))
+        ops.append(_text(mid - 7, bracket["anchor_y"], 10.5, bracket["reason"], colors["text"], "end", rotated=True))
+        ops.append(
+            _text(mid + 7, bracket["anchor_y"], 11.5, bracket["location"], colors["text"], "end", rotated=True, bold=True)
+        )
+    ops.append("Q")
+    return "\n".join(ops).encode("latin-1")
+
+
+class _PdfObjects:
+    # Byte offsets for the xref table, packed 8 bytes per object. Page objects
+    # are emitted in number order; the catalog and page tree use reserved slots.
+    def __init__(self):
+        self.position = 0
+        self.offsets = array("Q", [0] * FIRST_PAGE_OBJ)
+
+    def raw(self, data):
+        self.position += len(data)
+        return data
+
+    def emit(self, number, body):
+        if number < len(self.offsets):
+            self.offsets[number] = self.position
+        else:
+            self.offsets.append(self.position)
+        return self.raw(b"%d 0 obj\n" % number + body + b"\nendobj\n")
+
+
+def iter_log_sheets_pdf(days, title=None):
+    # `days` may be any iterable (e.g. a queryset iterator); each day is drawn,
+    # compressed and yielded before the next one is read.
+    objects = _PdfObjects()
+    yield objects.raw(b"%PDF-1.4\n%\xe2\xe3\xcf\xd3\n")
+    yield objects.emit(FONT_OBJ, b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica /Encoding /WinAnsiEncoding >>")
+    yield objects.emit(
+        BOLD_FONT_OBJ, b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica-Bold /Encoding /WinAnsiEncoding >>"
+    )
+
+    next_obj = FIRST_PAGE_OBJ
+    for day in days:
+        page_obj, content_obj = next_obj, next_obj + 1
+        next_obj += 2
+
+        yield objects.emit(
+            page_obj,
+            (
+                f"<< /Type /Page /Parent {PAGES_OBJ} 0 R /MediaBox [0 0 {PAGE_WIDTH} {PAGE_HEIGHT}] "
+                f"/Resources << /Font << /F1 {FONT_OBJ} 0 R /F2 {BOLD_FONT_OBJ} 0 R >> >> "
+                f"/Contents {content_obj} 0 R >>"
+            ).encode("ascii"),
+        )
+        content = zlib.compress(_page_content(day, title))
+        yield objects.emit(
+            content_obj,
+            b"<< /Length %d /Filter /FlateDecode >>\nstream\n" % len(content) + content + b"\nendstream",
+        )
+
+    page_objs = range(FIRST_PAGE_OBJ, next_obj, 2)
+    kids = " ".join(f"{obj} 0 R" for obj in page_objs)
+    yield objects.emit(PAGES_OBJ, f"<< /Type /Pages /Kids [{kids}] /Count {len(page_objs)} >>".encode("ascii"))
+    yield objects.emit(CATALOG_OBJ, f"<< /Type /Catalog /Pages {PAGES_OBJ} 0 R >>".encode("ascii"))
+
+    xref_at = objects.position
+    size = next_obj
+    entries = [b"0000000000 65535 f \n"]
+    entries.extend(b"%010d 00000 n \n" % objects.offsets[number] for number in range(1, size))
+    yield objects.raw(
+        b"xref\n0 %d\n" % size
+        + b"".join(entries)
+        + b"trailer\n<< /Size %d /Root %d 0 R >>\nstartxref\n%d\n%%%%EOF\n" % (size, CATALOG_OBJ, xref_at)
+    )
@@ -0,0 +1,288 @@
+from functools import lru_cache
+from xml.sax.saxutils import escape
+
+
+# Same layout as frontend/src/components/ELDLogSheet.jsx so a server-rendered
+# sheet is a drop-in for the client-built one. Bump LAYOUT_VERSION whenever the
+# output changes; it is part of every cache key and ETag.
+LAYOUT_VERSION = 1
+
+WIDTH = 1100
+HEIGHT = 460
+LEFT_PAD = 120
+RIGHT_PAD = 90
+TOP_PAD = 50
+BOTTOM_PAD = 40
+MINUTES_PER_DAY = 1440
+
+REMARKS_GAP = 14
+REMARKS_BOX_H = 22
+BRACKET_HANG = 20
+LABEL_AREA_H = 200
+
+PLOT_WIDTH = WIDTH - LEFT_PAD - RIGHT_PAD
+PLOT_HEIGHT = HEIGHT - TOP_PAD - BOTTOM_PAD
+ROW_HEIGHT = PLOT_HEIGHT / 4
+GRID_BOTTOM = TOP_PAD + PLOT_HEIGHT
+REMARKS_BOX_TOP = GRID_BOTTOM + REMARKS_GAP
+REMARKS_BOX_BOTTOM = REMARKS_BOX_TOP + REMARKS_BOX_H
+SVG_HEIGHT = REMARKS_BOX_BOTTOM + BRACKET_HANG + LABEL_AREA_H
+
+STATUS_ROWS = (
+    ("off_duty", "Off Duty"),
+    ("sleeper", "Sleeper Berth"),
+    ("driving", "Driving"),
+    ("on_duty", "On Duty (Not Driving)"),
+)
+STATUS_INDEX = {key: idx for idx, (key, _) in enumerate(STATUS_ROWS)}
+
+THEMES = {
+    "light": {
+        "strong": "#0f172a",
+        "major": "#334155",
+        "minor": "#cbd5e1",
+        "text": "#0f172a",
+        "path": "#2563eb",
+    },
+    "dark": {
+        "strong": "#dbeafe",
+        "major": "#93c5fd",
+        "minor": "rgba(148, 163, 184, 0.55)",
+        "text": "#f8fafc",
+        "path": "#3b82f6",
+    },
+}
+
+
+def _num(value):
+    text = f"{value:.2f}".rstrip("0").rstrip(".")
+    return "0" if text == "-0" else text
+
+
+def _x(minute):
+    return LEFT_PAD + (minute / MINUTES_PER_DAY) * PLOT_WIDTH
+
+
+def _row_center_y(idx):
+    return TOP_PAD + ROW_HEIGHT * (idx + 0.5)
+
+
+def _clamp_minute(value):
+    try:
+        minute = float(value)
+    except (TypeError, ValueError):
+        return 0.0
+    return max(0.0, min(float(MINUTES_PER_DAY), minute))
+
+
+def _status_key(status):
+    status = str(status or "").strip().lower().replace(" ", "_")
+    if status in {"off_duty", "off", "offduty"}:
+        return "off_duty"
+    if status in {"sleeper", "sleeper_berth", "sb"}:
+        return "sleeper"
+    if status in {"driving", "drive"}:
+        return "driving"
+    return "on_duty"
+
+
+def _hour_label(hour):
+    if hour == 0:
+        return "Midnight"
+    if hour == 12:
+        return "Noon"
+    if hour == 24:
+        return ""
+    return str(hour)
+
+
+@lru_cache(maxsize=None)
+def _grid_markup(theme):
+    # Everything that does not depend on the day: border, ticks, hour and
+    # status labels and the remarks box. Built once per theme.
+    colors = THEMES[theme]
+    parts = [
+        f'<rect x="{LEFT_PAD}" y="{TOP_PAD}" width="{PLOT_WIDTH}" height="{PLOT_HEIGHT}" fill="none" '
+        f'stroke="{colors["strong"]}" stroke-width="2.2"/>'
+    ]
+    for idx in range(97):
+        minute = idx * 15
+        line_x = _num(_x(minute))
+        is_hour = minute % 60 == 0
+        parts.append(
+            f'<line x1="{line_x}" y1="{TOP_PAD}" x2="{line_x}" y2="{_num(GRID_BOTTOM)}" '
+            f'stroke="{colors["major"] if is_hour else colors["minor"]}" stroke-width="{2 if is_hour else 0.75}"/>'
+        )
+        tick_len = REMARKS_BOX_H * (0.85 if is_hour else 0.5)
+        parts.append(
+            f'<line x1="{line_x}" y1="{REMARKS_BOX_TOP}" x2="{line_x}" y2="{_num(REMARKS_BOX_TOP + tick_len)}" '
+            f'stroke="{colors["major"] if is_hour else colors["minor"]}" stroke-width="{2 if is_hour else 0.9}"/>'
+        )
+    for hour in range(25):
+        parts.append(
+            f'<text x="{_num(_x(hour * 60))}" y="{TOP_PAD - 12}" font-size="10" text-anchor="middle" '
+            f'fill="{colors["text"]}">{_hour_label(hour)}</text>'
+        )
+    for idx, (_, label) in enumerate(STATUS_ROWS):
+        line_y = _num(TOP_PAD + ROW_HEIGHT * idx)
+        if idx > 0:
+            parts.append(
+                f'<line x1="{LEFT_PAD}" y1="{line_y}" x2="{LEFT_PAD + PLOT_WIDTH}" y2="{line_y}" '
+                f'stroke="{colors["major"]}" stroke-width="2.2"/>'
+            )
+        parts.append(
+            f'<text x="{LEFT_PAD - 10}" y="{_num(_row_center_y(idx) + 4)}" font-size="12" text-anchor="end" '
+            f'fill="{colors["text"]}">{escape(label)}</text>'
+        )
+    parts.append(
+        f'<text x="{LEFT_PAD + PLOT_WIDTH + 45}" y="{TOP_PAD - 12}" font-size="11" text-anchor="middle" '
+        f'fill="{colors["text"]}">TOTAL HOURS</text>'
+    )
+    parts.append(
+        f'<text x="{LEFT_PAD - 10}" y="{_num(REMARKS_BOX_TOP + REMARKS_BOX_H / 2 + 4)}" font-size="11" '
+        f'font-weight="700" text-anchor="end" fill="{colors["text"]}">REMARKS</text>'
+    )
+    parts.append(
+        f'<rect x="{LEFT_PAD}" y="{REMARKS_BOX_TOP}" width="{PLOT_WIDTH}" height="{REMARKS_BOX_H}" fill="none" '
+        f'stroke="{colors["major"]}" stroke-width="1.8"/>'
+    )
+    return "".join(parts)
+
+
+def step_commands(events):
+    # ("M" | "L", x, y) pen moves for the duty-status line; shared with the PDF export.
+    if not events:
+        return []
+    status, start, _ = events[0]
+    commands = [("M", _x(start), _row_center_y(STATUS_INDEX[status]))]
+    for idx, (status, start, end) in enumerate(events):
+        cur_y = _row_center_y(STATUS_INDEX[status])
+        end_x = _x(end)
+        commands.append(("L", end_x, cur_y))
+        if idx + 1 == len(events):
+            break
+
+        next_status, next_start, _ = events[idx + 1]
+        next_y = _row_center_y(STATUS_INDEX[next_status])
+        next_x = _x(next_start)
+        contiguous = next_start == end
+        if contiguous and next_y != cur_y:
+            commands.append(("L", end_x, next_y))
+        if next_x != end_x or (not contiguous and next_y != cur_y):
+            commands.append(("M", next_x, next_y))
+    return commands
+
+
+def remark_brackets(remarks):
+    # Bracket geometry and labels per remark, staggered like the frontend.
+    ordered = sorted(
+        (
+            (
+                _clamp_minute(remark.get("minute")),
+                _clamp_minute(remark.get("start_minute", remark.get("minute"))),
+                remark,
+            )
+            for remark in remarks or []
+        ),
+        key=lambda item: item[0],
+    )
+
+    brackets = []
+    previous_x = None
+    for idx, (_, start, remark) in enumerate(ordered):
+        end = _clamp_minute(remark.get("end_minute", start + 30))
+        left = _x(start)
+        close = previous_x is not None and abs(left - previous_x) < 55
+        level = idx % 2 if close else 0
+        previous_x = left
+
+        right = max(_x(end), left + 18)
+        top = REMARKS_BOX_BOTTOM + level * 22
+        bottom = top + BRACKET_HANG
+        brackets.append(
+            {
+                "left": left,
+                "right": right,
+                "mid": (left + right) / 2,
+                "top": top,
+                "bottom": bottom,
+                "anchor_y": bottom + 12 + 44,
+                "reason": str(remark.get("reason") or "Stop"),
+                "location": str(remark.get("label") or remark.get("abbr") or "LOC"),
+            }
+        )
+    return brackets
+
+
+def _step_path(events):
+    return " ".join(f"{command} {_num(x)} {_num(y)}" for command, x, y in step_commands(events))
+
+
+def _remark_markup(remarks, colors):
+    parts = []
+    for bracket in remark_brackets(remarks):
+        mid = bracket["mid"]
+        bottom = bracket["bottom"]
+        anchor_y = _num(bracket["anchor_y"])
+        reason_x = _num(mid - 7)
+        location_x = _num(mid + 7)
+        l, r, t, b = _num(bracket["left"]), _num(bracket["right"]), _num(bracket["top"]), _num(bottom)
+
+        parts.append(
+            f'<g><path d="M {l} {t} L {l} {b} L {r} {b} L {r} {t}" fill="none" stroke="{colors["path"]}" '
+            f'stroke-width="3.3" stroke-linecap="square"/>'
+            f'<line x1="{_num(mid)}" y1="{b}" x2="{_num(mid)}" y2="{_num(bottom + 12)}" stroke="{colors["path"]}" '
+            f'stroke-width="1.5" stroke-linecap="round"/>'
+            f'<text x="{reason_x}" y="{anchor_y}" text-anchor="end" font-size="10.5" fill="{colors["text"]}" '
+            f'transform="rotate(-90 {reason_x} {anchor_y})">{escape(bracket["reason"])}</text>'
+            f'<text x="{location_x}" y="{anchor_y}" text-anchor="end" font-size="11.5" font-weight="600" '
+            f'fill="{colors["text"]}" transform="rotate(-90 {location_x} {anchor_y})">'
+            f'{escape(bracket["location"])}</text></g>'
+        )
+    return "".join(parts)
+
+
+def duty_events(day):
+    events = []
+    for event in day.get("events") or []:
+        start = _clamp_minute(event.get("start_minute"))
+        end = _clamp_minute(event.get("end_minute"))
+        if end > start:
+            events.append((_status_key(event.get("status")), start, end))
+    events.sort(key=lambda event: event[1])
+    return events
+
+
+def status_totals(events):
+    totals = dict.fromkeys(STATUS_INDEX, 0.0)
+    for status, start, end in events:
+        totals[status] += end - start
+    return totals
+
+
+def render_log_sheet_svg(day, theme="light"):
+    colors = THEMES[theme]
+    events = duty_events(day)
+    totals = status_totals(events)
+
+    parts = [
+        f'<svg xmlns="http://www.w3.org/2000/svg" viewBox="0 0 {WIDTH} {_num(SVG_HEIGHT)}" '
+        f'font-family="Helvetica, Arial, sans-serif">',
+        f'<text x="{LEFT_PAD}" y="18" font-size="14" fill="{colors["text"]}">'
+        f"DRIVER&apos;S DAILY LOG (ONE CALENDAR DAY — 24 HOURS) — Day {escape(str(day.get('day', '')))}</text>",
+        _grid_markup(theme),
+    ]
+    for idx, (status, _) in enumerate(STATUS_ROWS):
+        parts.append(
+            f'<text x="{LEFT_PAD + PLOT_WIDTH + 45}" y="{_num(_row_center_y(idx) + 4)}" font-size="13" '
+            f'text-anchor="middle" fill="{colors["text"]}">{totals[status] / 60:.2f}</text>'
+        )
+    path = _step_path(events)
+    if path:
+        parts.append(
+            f'<path d="{path}" fill="none" stroke="{colors["path"]}" stroke-width="6.5" '
+            f'stroke-linejoin="miter" stroke-linecap="butt"/>'
+        )
+    parts.append(_remark_markup(day.get("remarks"), colors))
+    parts.append("</svg>")
+    return "".join(parts)
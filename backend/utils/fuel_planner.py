@@ -0,0 +1,205 @@
+import csv
+import math
+import os
+import threading
+from collections import deque
+
+from utils.route_projection import MILES_PER_DEGREE, SegmentIndex
+
+
+# Cheapest fuel purchases along a route from a local truck-stop price file
+# (CSV with name, lng, lat, price per gallon). Stations within the corridor are
+# projected to their route mile, then one forward pass picks where to buy and
+# how much: at each station, buy just enough to reach the next cheaper one if
+# it is in range, otherwise fill up and move to the cheapest station in range.
+# "Next cheaper" comes from a monotone stack and "cheapest in range" from a
+# sliding-window monotone queue, so the pass is linear in the station count.
+STATION_COLUMNS = ("name", "lng", "lat", "price")
+DEFAULT_TANK_RANGE_MILES = 1000.0
+DEFAULT_MPG = 6.5
+DEFAULT_CORRIDOR_MILES = 5.0
+
+_station_files = {}
+_station_files_lock = threading.Lock()
+
+
+def _read_stations(path):
+    stations = []
+    rejected = 0
+    with open(path, newline="", encoding="utf-8") as handle:
+        reader = csv.reader(handle)
+        header = [name.strip().lower() for name in next(reader, [])]
+        missing = [name for name in STATION_COLUMNS if name not in header]
+        if missing:
+            raise ValueError(f"Fuel station file is missing column(s): {', '.join(missing)}")
+        name_at, lng_at, lat_at, price_at = (header.index(name) for name in STATION_COLUMNS)
+        for row in reader:
+            try:
+                lng, lat, price = float(row[lng_at]), float(row[lat_at]), float(row[price_at])
+            except (IndexError, ValueError):
+                rejected += 1
+                continue
+            if not (-180 <= lng <= 180 and -90 <= lat <= 90 and math.isfinite(price) and price > 0):
+                rejected += 1
+                continue
+            stations.append((row[name_at].strip(), lng, lat, price))
+    return tuple(stations), rejected
+
+
+def load_stations(path):
+    # Parsed once per file version; the file is replaced when prices change.
+    stat = os.stat(path)
+    key = (stat.st_mtime_ns, stat.st_size)
+    with _station_files_lock:
+        cached = _station_files.get(path)
+        if cached is not None and cached[0] == key:
+            return cached[1]
+    stations = _read_stations(path)[0]
+    with _station_files_lock:
+        _station_files[path] = (key, stations)
+    return stations
+
+
+def corridor_stations(polyline, stations, corridor_miles=DEFAULT_CORRIDOR_MILES):
+    # [(route_mile, offset_miles, station)] sorted by route mile. A bounding
+    # box check drops far-away stations before the grid projection.
+    if not polyline or len(polyline) < 2:
+        return []
+    lngs = [point[0] for point in polyline]
+    lats = [point[1] for point in polyline]
+    lat_margin = corridor_miles / MILES_PER_DEGREE
+    widest = max(abs(min(lats)), abs(max(lats))) + lat_margin
+    lng_margin = lat_margin / max(0.01, math.cos(math.radians(min(widest, 89.0))))
+    min_lng, max_lng = min(lngs) - lng_margin, max(lngs) + lng_margin
+    min_lat, max_lat = min(lats) - lat_margin, max(lats) + lat_margin
+
+    index = None
+    found = []
+    for station in stations:
+        _, lng, lat, _ = station
+        if not (min_lng <= lng <= max_lng and min_lat <= lat <= max_lat):
+            continue
+        if index is None:
+            index = SegmentIndex(polyline)
+        projected = index.project(lng, lat, corridor_miles)
+        if projected is not None:
+            found.append((projected[0], projected[1], station))
+    found.sort(key=lambda item: item[0])
+    return found
+
+
+def _next_cheaper(prices):
+    # Index of the first later station with a lower price; the destination
+    # (index len(prices)) is cheaper than every station.
+    result = [len(prices)] * len(prices)
+    stack = []
+    for idx, price in enumerate(prices):
+        while stack and prices[stack[-1]] > price:
+            result[stack.pop()] = idx
+        stack.append(idx)
+    return result
+
+
+def plan_fuel_purchases(distance_miles, miles, prices, tank_range_miles, start_range_miles=None):
+    # `miles`/`prices` are parallel lists sorted by route mile. Fuel is counted
+    # in miles of range. Returns [(station index, range miles bought)] in
+    # route order; raises ValueError when a gap is longer than the tank range.
+    count = len(miles)
+    full = float(tank_range_miles)
+    fuel = full if start_range_miles is None else min(full, float(start_range_miles))
+    cheaper = _next_cheaper(prices)
+    window = deque()
+    loaded = 0
+    purchases = []
+
+    def position(idx):
+        return distance_miles if idx >= count else miles[idx]
+
+    # Fuel on board gets the truck to the first station (or all the way).
+    if not count or miles[0] > fuel:
+        if distance_miles <= fuel:
+            return purchases
+        raise ValueError("No fuel station within range of the route start.")
+    current = 0
+    fuel -= miles[0]
+
+    while current < count:
+        here = miles[current]
+        target = cheaper[current]
+        if position(target) - here <= full:
+            need = position(target) - here - fuel
+            if need > 0:
+                purchases.append((current, need))
+                fuel += need
+            fuel -= position(target) - here
+            current = target
+            continue
+
+        # No cheaper station in range: fill up, then stop at the cheapest one
+        # within range. Window bounds only move forward.
+        if loaded <= current:
+            loaded = current + 1
+        while window and window[0] <= current:
+            window.popleft()
+        while loaded < count and miles[loaded] - here <= full:
+            while window and prices[window[-1]] >= prices[loaded]:
+                window.pop()
+            window.append(loaded)
+            loaded += 1
+        if not window:
+            raise ValueError(f"Gap after route mile {here:.1f} is longer than the tank range.")
+        if full - fuel > 0:
+            purchases.append((current, full - fuel))
+        following = window[0]
+        fuel = full - (miles[following] - here)
+        current = following
+    return purchases
+
+
+def plan_fuel_stops(
+    route,
+    stations,
+    tank_range_miles=DEFAULT_TANK_RANGE_MILES,
+    mpg=DEFAULT_MPG,
+    start_fuel_fraction=1.0,
+    corridor_miles=DEFAULT_CORRIDOR_MILES,
+):
+    # Returns (fuel stops for plan_stops, summary).
+    polyline = route.get("polyline") or []
+    distance_miles = float(route.get("distance_miles", 0) or 0)
+    # Projected miles follow the polyline, whose length can differ a little
+    # from the route's distance_miles; clamp so no leg is negative or overlong.
+    candidates = [
+        (min(max(mile, 0.0), distance_miles), offset, station)
+        for mile, offset, station in corridor_stations(polyline, stations, corridor_miles)
+    ]
+    miles = [mile for mile, _, _ in candidates]
+    prices = [station[3] for _, _, station in candidates]
+    purchases = plan_fuel_purchases(
+        distance_miles, miles, prices, tank_range_miles, start_range_miles=start_fuel_fraction * tank_range_miles
+    )
+
+    stops = []
+    for idx, range_miles in purchases:
+        mile, offset, (name, lng, lat, price) = candidates[idx]
+        gallons = range_miles / mpg
+        stops.append(
+            {
+                "type": "fuel",
+                "mile": mile,
+                "lng": lng,
+                "lat": lat,
+                "label": name,
+                "price_per_gallon": price,
+                "gallons": round(gallons, 1),
+                "fuel_cost": round(gallons * price, 2),
+                "offset_miles": round(offset, 2),
+            }
+        )
+    summary = {
+        "stations_in_corridor": len(candidates),
+        "purchases": len(stops),
+        "gallons": round(sum(range_miles for _, range_miles in purchases) / mpg, 1),
+        "fuel_cost": round(sum(stop["fuel_cost"] for stop in stops), 2),
+    }
+    return stops, summary
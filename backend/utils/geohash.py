@@ -0,0 +1,93 @@
+import math
+
+from utils.route_projection import MILES_PER_DEGREE
+
+
+# Geohash cells as integer grid coordinates: at precision p the world is split
+# into 2**lng_bits columns and 2**lat_bits rows (lng_bits + lat_bits = 5p,
+# longitude gets the extra bit), and a cell's hash interleaves its column and
+# row bits, longitude first. Working on the grid makes "every cell in this
+# box" a pair of ranges instead of neighbour walks.
+BASE32 = "0123456789bcdefghjkmnpqrstuvwxyz"
+
+
+def _bits(precision):
+    total = 5 * precision
+    return (total + 1) // 2, total // 2
+
+
+def cell_degrees(precision):
+    # (width, height) of one cell in degrees.
+    lng_bits, lat_bits = _bits(precision)
+    return 360.0 / (1 << lng_bits), 180.0 / (1 << lat_bits)
+
+
+def _grid(lng, lat, precision):
+    lng_bits, lat_bits = _bits(precision)
+    width, height = cell_degrees(precision)
+    column = min((1 << lng_bits) - 1, max(0, int((lng + 180.0) // width)))
+    row = min((1 << lat_bits) - 1, max(0, int((lat + 90.0) // height)))
+    return column, row
+
+
+def _hash(column, row, precision):
+    lng_bits, lat_bits = _bits(precision)
+    chars = []
+    value = 0
+    lng_left, lat_left = lng_bits, lat_bits
+    for bit in range(5 * precision):
+        if bit % 2 == 0:
+            lng_left -= 1
+            value = (value << 1) | ((column >> lng_left) & 1)
+        else:
+            lat_left -= 1
+            value = (value << 1) | ((row >> lat_left) & 1)
+        if bit % 5 == 4:
+            chars.append(BASE32[value])
+            value = 0
+    return "".join(chars)
+
+
+def encode(lng, lat, precision):
+    return _hash(*_grid(lng, lat, precision), precision)
+
+
+def box_cells(min_lng, min_lat, max_lng, max_lat, precision):
+    first_column, first_row = _grid(min_lng, min_lat, precision)
+    last_column, last_row = _grid(max_lng, max_lat, precision)
+    return {
+        _hash(column, row, precision)
+        for column in range(first_column, last_column + 1)
+        for row in range(first_row, last_row + 1)
+    }
+
+
+def radius_cells(lng, lat, radius_miles, precision):
+    # Every cell within radius_miles of the point (a bounding box, so a few
+    # corner cells more than the exact disk).
+    lat_margin = radius_miles / MILES_PER_DEGREE
+    widest = min(89.0, abs(lat) + lat_margin)
+    lng_margin = lat_margin / max(0.01, math.cos(math.radians(widest)))
+    return box_cells(lng - lng_margin, lat - lat_margin, lng + lng_margin, lat + lat_margin, precision)
+
+
+def polyline_cells(polyline, precision):
+    # Every cell the polyline passes through. Segments are split into pieces
+    # no longer than a cell, and each piece adds the cells its bounding box
+    # touches, so sparse polylines are covered without gaps.
+    width, height = cell_degrees(precision)
+    cells = set()
+    if len(polyline) == 1:
+        cells.add(encode(polyline[0][0], polyline[0][1], precision))
+    for idx in range(len(polyline) - 1):
+        lng1, lat1 = polyline[idx][0], polyline[idx][1]
+        lng2, lat2 = polyline[idx + 1][0], polyline[idx + 1][1]
+        pieces = max(1, math.ceil(max(abs(lng2 - lng1) / width, abs(lat2 - lat1) / height)))
+        for piece in range(pieces):
+            start, end = piece / pieces, (piece + 1) / pieces
+            a_lng, a_lat = lng1 + (lng2 - lng1) * start, lat1 + (lat2 - lat1) * start
+            b_lng, b_lat = lng1 + (lng2 - lng1) * end, lat1 + (lat2 - lat1) * end
+            cells.update(
+                box_cells(min(a_lng, b_lng), min(a_lat, b_lat), max(a_lng, b_lng), max(a_lat, b_lat), precision)
+            )
+    return cells
@@ -1,3 +1,7 @@
+import threading
+from collections import OrderedDict, deque
+
+from utils.route_geometry import PackedPolyline
 from utils.stop_planner import get_point_at_distance
 
 
@@ -5,6 +9,8 @@ DRIVING_MPH = 50
 MAX_DRIVING_MINUTES_PER_DAY = 11 * 60
 MAX_SHIFT_MINUTES_PER_DAY = 14 * 60
 MINUTES_PER_DAY = 24 * 60
+CYCLE_LIMIT_HOURS = 70.0
+DAY_START = (0, 0, 0)
 
 
 def _to_minutes(hours):
@@ -108,18 +114,148 @@ def _remark_duration_minutes(stop):
     return 30
 
 
-def generate_hos_logs(route, stops):
-    route = route or {}
-    stops = stops or []
+def timeline_stop(day_number, remark):
+    stop_type = str(remark.get("stop_type", "")).lower() or "stop"
+    return {
+        "type": stop_type,
+        "reason": remark.get("reason"),
+        "label": remark.get("label"),
+        "eld_required": (stop_type == "eld_limit") or bool(remark.get("eld_required")),
+        "day": day_number,
+        "minute": remark.get("minute"),
+        "start_minute": remark.get("start_minute"),
+        "end_minute": remark.get("end_minute"),
+        "mile": remark.get("mile"),
+        "lng": remark.get("lng"),
+        "lat": remark.get("lat"),
+    }
+
+
+def _empty_duty_totals():
+    return {"driving_minutes": 0, "on_duty_minutes": 0, "off_duty_minutes": 0}
+
+
+DEFAULT_TIMELINE_MEMO_SIZE = 1024
+
+
+class _TimelineMemo:
+    # Bounded LRU of simulated timelines keyed on the duty-op signature. Values
+    # are tuples of compact days and are never mutated, so they are shared
+    # across requests and threads; coordinates are attached per request.
+
+    def __init__(self, maxsize=DEFAULT_TIMELINE_MEMO_SIZE):
+        self.maxsize = max(0, int(maxsize))
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def resize(self, maxsize):
+        with self._lock:
+            self.maxsize = max(0, int(maxsize))
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def get(self, key):
+        with self._lock:
+            value = self._entries.get(key)
+            if value is None:
+                self.misses += 1
+            else:
+                self._entries.move_to_end(key)
+                self.hits += 1
+            return value
+
+    def put(self, key, value):
+        if not self.maxsize:
+            return
+        with self._lock:
+            self._entries[key] = value
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.hits = 0
+            self.misses = 0
+
+    def stats(self):
+        with self._lock:
+            return {"size": len(self._entries), "maxsize": self.maxsize, "hits": self.hits, "misses": self.misses}
+
+
+# Sized by the caller: the trips app applies HOS_TIMELINE_MEMO_SIZE on startup.
+timeline_memo = _TimelineMemo()
+
+
+def _duty_ops(route, stops):
+    # Reduces a trip to what the simulation actually consumes: remark
+    # durations and whole driving/on-duty/off-duty minutes. Lanes whose stops
+    # round to the same minutes share one signature. `refs` holds the stop
+    # behind each remark op, in order, for rendering.
+    ops = []
+    refs = []
+
+    def remark(stop):
+        if not isinstance(stop, dict):
+            ops.append(("day",))
+            return
+        ops.append(("remark", _remark_duration_minutes(stop)))
+        refs.append(stop)
+
+    remark(stops[0] if stops else {"type": "pickup", "mile": 0})
+    ops.append(("on_duty", 60))
+
+    if len(stops) >= 2:
+        for idx in range(len(stops) - 1):
+            ops.append(("driving", _miles_to_minutes(_segment_miles(stops, idx))))
+
+            next_stop = stops[idx + 1]
+            stop_type = next_stop.get("type")
+            if stop_type == "break":
+                remark(next_stop)
+                ops.append(("off_duty", 30))
+            elif stop_type == "fuel":
+                remark(next_stop)
+                ops.append(("on_duty", 20))
+            elif stop_type == "dropoff":
+                remark(next_stop)
+            elif stop_type == "pickup":
+                # Only when the trip starts elsewhere (e.g. a deadhead leg).
+                remark(next_stop)
+                ops.append(("on_duty", 60))
+            elif next_stop.get("duty_status") in ("on_duty", "off_duty"):
+                # Stops from configured rules (weigh stations, rest areas, ...).
+                remark(next_stop)
+                ops.append((next_stop["duty_status"], _remark_duration_minutes(next_stop)))
+    else:
+        ops.append(("driving", _miles_to_minutes(route.get("distance_miles", 0))))
+
+    if not stops or str(stops[-1].get("type", "")).lower() != "dropoff":
+        remark({"type": "dropoff", "mile": route.get("distance_miles")})
+
+    ops.append(("on_duty", 60))
+    return tuple(ops), refs
 
-    days = []
+
+def _simulate(ops, start=DAY_START):
+    # Yields each compact day as soon as close_day_if_needed finalizes it:
+    # (day, events, remarks, (driving, on_duty, off_duty minutes)), where events
+    # are (status, start, end) and remarks are (start, end, ref, eld_mile).
+    # `ref` indexes the remark-op stops; ELD-limit remarks have ref None.
+    # `start` is (minute of day 1, driving minutes used, shift minutes used).
+    closed_days = deque()
     day_number = 1
     current_minute = 0
     driving_today = 0
     shift_today = 0
     driven_miles_total = 0.0
+    next_ref = 0
     events = []
     remarks = []
+    today_totals = _empty_duty_totals()
 
     def push_event(status, duration):
         nonlocal current_minute, driving_today, shift_today
@@ -132,17 +268,12 @@ def generate_hos_logs(route, stops):
         if actual_duration <= 0:
             return
 
-        if events and events[-1]["status"] == status and events[-1]["end_minute"] == start:
-            events[-1]["end_minute"] = end
+        if events and events[-1][0] == status and events[-1][2] == start:
+            events[-1][2] = end
         else:
-            events.append(
-                {
-                    "status": status,
-                    "start_minute": start,
-                    "end_minute": end,
-                }
-            )
+            events.append([status, start, end])
 
+        today_totals[f"{status}_minutes"] += actual_duration
         if status == "driving":
             driving_today += actual_duration
             shift_today += actual_duration
@@ -152,11 +283,19 @@ def generate_hos_logs(route, stops):
         current_minute = end
 
     def close_day_if_needed():
-        nonlocal day_number, current_minute, driving_today, shift_today, events, remarks
+        nonlocal day_number, current_minute, driving_today, shift_today, events, remarks, today_totals
         if current_minute < MINUTES_PER_DAY:
             push_event("off_duty", MINUTES_PER_DAY - current_minute)
 
-        days.append({"day": day_number, "events": events, "remarks": remarks})
+        closed_days.append(
+            (
+                day_number,
+                tuple(tuple(event) for event in events),
+                tuple(remarks),
+                (today_totals["driving_minutes"], today_totals["on_duty_minutes"], today_totals["off_duty_minutes"]),
+            )
+        )
+        today_totals = _empty_duty_totals()
 
         day_number += 1
         current_minute = 0
@@ -169,53 +308,26 @@ def generate_hos_logs(route, stops):
         if current_minute >= MINUTES_PER_DAY:
             close_day_if_needed()
 
-    def add_stop_remark(stop):
+    def add_stop_remark(duration):
+        nonlocal next_ref
         ensure_current_day()
-        if not isinstance(stop, dict):
-            return
-        stop_type = str(stop.get("type", "")).lower() or "stop"
-        start_minute = current_minute
-        end_minute = min(MINUTES_PER_DAY, start_minute + _remark_duration_minutes(stop))
-
-        remarks.append(
-            {
-                "minute": start_minute,
-                "start_minute": start_minute,
-                "end_minute": end_minute,
-                "abbr": _remark_abbr(stop),
-                "stop_type": stop_type,
-                "reason": _reason_from_stop(stop),
-                "label": stop.get("label"),
-                "mile": stop.get("mile"),
-                "eld_required": bool(stop.get("eld_required")),
-                "lng": stop.get("lng"),
-                "lat": stop.get("lat"),
-            }
-        )
+        remarks.append((current_minute, min(MINUTES_PER_DAY, current_minute + duration), next_ref, None))
+        next_ref += 1
 
     def add_eld_limit_remark(mile):
         ensure_current_day()
-        start_minute = current_minute
-        lng, lat = _point_for_route_mile(route, mile)
-        remarks.append(
-            {
-                "minute": start_minute,
-                "start_minute": start_minute,
-                "end_minute": min(MINUTES_PER_DAY, start_minute + 1),
-                "abbr": "ELD",
-                "stop_type": "eld_limit",
-                "reason": "Daily driving limit",
-                "label": "Daily driving limit",
-                "mile": round(float(mile), 2),
-                "eld_required": True,
-                "lng": lng,
-                "lat": lat,
-            }
-        )
+        remarks.append((current_minute, min(MINUTES_PER_DAY, current_minute + 1), None, mile))
+
+    def drain_closed_days():
+        while closed_days:
+            yield closed_days.popleft()
 
+    # The schedule_* helpers are generators so a day closed mid-segment is
+    # handed to the consumer before the rest of the segment is simulated.
     def schedule_off_duty(minutes):
         remaining = minutes
         while remaining > 0:
+            yield from drain_closed_days()
             if current_minute >= MINUTES_PER_DAY:
                 close_day_if_needed()
                 continue
@@ -229,6 +341,7 @@ def generate_hos_logs(route, stops):
     def schedule_on_duty(minutes):
         remaining = minutes
         while remaining > 0:
+            yield from drain_closed_days()
             if current_minute >= MINUTES_PER_DAY:
                 close_day_if_needed()
                 continue
@@ -251,6 +364,7 @@ def generate_hos_logs(route, stops):
         nonlocal driven_miles_total
         remaining = minutes
         while remaining > 0:
+            yield from drain_closed_days()
             if current_minute >= MINUTES_PER_DAY:
                 close_day_if_needed()
                 continue
@@ -278,40 +392,146 @@ def generate_hos_logs(route, stops):
                     add_eld_limit_remark(driven_miles_total)
                 close_day_if_needed()
 
-    pickup_stop = stops[0] if stops else {"type": "pickup", "mile": 0}
-    add_stop_remark(pickup_stop)
-    schedule_on_duty(60)
+    # Day 1 is logged off duty up to the departure minute; clocks already used
+    # earlier that day only count against the limits.
+    push_event("off_duty", start[0])
+    driving_today, shift_today = start[1], start[2]
+
+    schedulers = {"driving": schedule_driving, "on_duty": schedule_on_duty, "off_duty": schedule_off_duty}
+    for op in ops:
+        kind = op[0]
+        if kind == "remark":
+            add_stop_remark(op[1])
+        elif kind == "day":
+            ensure_current_day()
+        else:
+            yield from schedulers[kind](op[1])
+            yield from drain_closed_days()
 
-    if len(stops) >= 2:
-        for idx in range(len(stops) - 1):
-            miles = _segment_miles(stops, idx)
-            schedule_driving(_miles_to_minutes(miles))
+    close_day_if_needed()
+    yield from drain_closed_days()
+
+
+def _memoized_days(key, days):
+    # Passes days through as they are simulated and stores the timeline only
+    # once it has been consumed to the end.
+    collected = []
+    for day in days:
+        collected.append(day)
+        yield day
+    timeline_memo.put(key, tuple(collected))
+
+
+def _route_locator(route):
+    # Builds the route's cumulative-mile index on first use, so each ELD
+    # coordinate is a bisect instead of a scan of the polyline.
+    indexed = None
+
+    def locate(mile):
+        nonlocal indexed
+        if indexed is None:
+            polyline = route.get("polyline")
+            if polyline and getattr(polyline, "cumulative_miles", None) is None:
+                indexed = {**route, "polyline": PackedPolyline.from_points(polyline)}
+            else:
+                indexed = route
+        return _point_for_route_mile(indexed, mile)
+
+    return locate
+
+
+def _render_remark(locate, refs, remark):
+    start, end, ref, eld_mile = remark
+    if ref is None:
+        lng, lat = locate(eld_mile)
+        return {
+            "minute": start,
+            "start_minute": start,
+            "end_minute": end,
+            "abbr": "ELD",
+            "stop_type": "eld_limit",
+            "reason": "Daily driving limit",
+            "label": "Daily driving limit",
+            "mile": round(float(eld_mile), 2),
+            "eld_required": True,
+            "lng": lng,
+            "lat": lat,
+        }
+
+    stop = refs[ref]
+    return {
+        "minute": start,
+        "start_minute": start,
+        "end_minute": end,
+        "abbr": _remark_abbr(stop),
+        "stop_type": str(stop.get("type", "")).lower() or "stop",
+        "reason": _reason_from_stop(stop),
+        "label": stop.get("label"),
+        "mile": stop.get("mile"),
+        "eld_required": bool(stop.get("eld_required")),
+        "lng": stop.get("lng"),
+        "lat": stop.get("lat"),
+    }
+
+
+def generate_hos_logs(route, stops, aggregates=None, start=DAY_START):
+    return list(iter_hos_logs(route, stops, aggregates, start))
+
+
+def start_state(minute=0, driving_minutes=0, shift_minutes=0):
+    # Validated (minute, driving, shift) tuple for the `start` argument.
+    minute, driving_minutes, shift_minutes = int(minute), int(driving_minutes), int(shift_minutes)
+    if not 0 <= minute < MINUTES_PER_DAY:
+        raise ValueError("Start minute must be within the day.")
+    if not 0 <= driving_minutes <= MAX_DRIVING_MINUTES_PER_DAY:
+        raise ValueError("Driving minutes used must be between 0 and the daily driving limit.")
+    if not driving_minutes <= shift_minutes <= MAX_SHIFT_MINUTES_PER_DAY:
+        raise ValueError("Shift minutes used must cover driving and stay within the shift limit.")
+    return minute, driving_minutes, shift_minutes
+
+
+def iter_hos_logs(route, stops, aggregates=None, start=DAY_START, memoize=True):
+    # Yields each day as soon as the simulation closes it. The duty timeline
+    # depends only on the op signature from _duty_ops, so repeat lanes reuse a
+    # memoized one and only labels, miles and coordinates are rendered here.
+    # Storing a new timeline means holding all of its days until the end, so
+    # streaming callers pass memoize=False: they still reuse memoized
+    # timelines but simulate misses without buffering.
+    # When an `aggregates` dict is passed it is kept current as days are
+    # yielded: days, driving/on-duty/off-duty minutes so far, `day_totals` for
+    # each day and `timeline`, the timeline stops in (day, minute) order.
+    route = route or {}
+    stops = stops or []
 
-            next_stop = stops[idx + 1]
-            stop_type = next_stop.get("type")
-            if stop_type == "break":
-                add_stop_remark(next_stop)
-                schedule_off_duty(30)
-            elif stop_type == "fuel":
-                add_stop_remark(next_stop)
-                schedule_on_duty(20)
-            elif stop_type == "dropoff":
-                add_stop_remark(next_stop)
-    else:
-        schedule_driving(_miles_to_minutes(route.get("distance_miles", 0)))
-
-    if not stops:
-        add_stop_remark(
-            {
-                "type": "dropoff",
-                "mile": route.get("distance_miles"),
-            }
+    totals = aggregates if aggregates is not None else {}
+    totals.update({"days": 0, **_empty_duty_totals(), "day_totals": [], "timeline": []})
+
+    ops, refs = _duty_ops(route, stops)
+    key = ops if start == DAY_START else (ops, start)
+    days = timeline_memo.get(key)
+    if days is None:
+        days = _simulate(ops, start)
+        if memoize:
+            days = _memoized_days(key, days)
+
+    locate = _route_locator(route)
+    for day_number, events, remarks, (driving, on_duty, off_duty) in days:
+        rendered_remarks = [_render_remark(locate, refs, remark) for remark in remarks]
+        totals["days"] += 1
+        totals["driving_minutes"] += driving
+        totals["on_duty_minutes"] += on_duty
+        totals["off_duty_minutes"] += off_duty
+        totals["day_totals"].append(
+            {"day": day_number, "driving_minutes": driving, "on_duty_minutes": on_duty, "off_duty_minutes": off_duty}
         )
-
-    if stops and str(stops[-1].get("type", "")).lower() != "dropoff":
-        add_stop_remark({"type": "dropoff", "mile": route.get("distance_miles")})
-
-    schedule_on_duty(60)
-
-    close_day_if_needed()
-    return days
+        # Remarks are only ever added at the current minute, so appending keeps
+        # the timeline in (day, minute) order without a later sort.
+        totals["timeline"].extend(timeline_stop(day_number, remark) for remark in rendered_remarks)
+
+        yield {
+            "day": day_number,
+            "events": [
+                {"status": status, "start_minute": start, "end_minute": end} for status, start, end in events
+            ],
+            "remarks": rendered_remarks,
+        }
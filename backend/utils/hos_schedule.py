@@ -0,0 +1,180 @@
+from utils.hos_engine import (
+    CYCLE_LIMIT_HOURS,
+    MAX_SHIFT_MINUTES_PER_DAY,
+    MINUTES_PER_DAY,
+    iter_hos_logs,
+    start_state,
+)
+
+
+# Chains back-to-back loads for one driver. The HOS clock between loads is
+# explicit: calendar day, minute of that day, driving and shift minutes used
+# since midnight (the engine's daily clocks) and on-duty minutes for the
+# previous seven days, which together with today give the rolling 70-hour /
+# 8-day cycle. Appending a load simulates only that load from the clock and
+# splices its first day onto the still-open last day of the schedule.
+CYCLE_WINDOW_DAYS = 8
+CYCLE_LIMIT_MINUTES = int(CYCLE_LIMIT_HOURS * 60)
+
+
+def hos_clock(day=1, minute=0, driving_minutes=0, shift_minutes=0, prior_on_duty_minutes=None, cycle_used_minutes=0):
+    # Validated clock dict. `prior_on_duty_minutes` lists on-duty minutes for
+    # the days before `day`, oldest first. Without it, `cycle_used_minutes`
+    # (which includes today) is booked as full shifts on the most recent
+    # days, so it ages out of the window no earlier than it really could.
+    minute, driving_minutes, shift_minutes = start_state(minute, driving_minutes, shift_minutes)
+    day = int(day)
+    if day < 1:
+        raise ValueError("Clock day must be 1 or later.")
+    if prior_on_duty_minutes is None:
+        remaining = max(0, int(cycle_used_minutes) - shift_minutes)
+        prior = []
+        for _ in range(CYCLE_WINDOW_DAYS - 1):
+            prior.insert(0, min(remaining, MAX_SHIFT_MINUTES_PER_DAY))
+            remaining -= prior[0]
+    else:
+        prior = [int(value) for value in prior_on_duty_minutes][-(CYCLE_WINDOW_DAYS - 1):]
+        prior = [0] * (CYCLE_WINDOW_DAYS - 1 - len(prior)) + prior
+    if any(not 0 <= value <= MINUTES_PER_DAY for value in prior):
+        raise ValueError("Prior on-duty minutes must be within a day.")
+    return {
+        "day": day,
+        "minute": minute,
+        "driving_minutes": driving_minutes,
+        "shift_minutes": shift_minutes,
+        "prior_on_duty_minutes": prior,
+        "cycle_used_minutes": sum(prior) + shift_minutes,
+    }
+
+
+def _day_totals(events):
+    totals = {"driving": 0, "on_duty": 0, "off_duty": 0}
+    for event in events:
+        totals[event["status"]] += event["end_minute"] - event["start_minute"]
+    return totals
+
+
+def _splice_events(head, tail, minute):
+    # `head` up to `minute`, then `tail` from `minute`, merging the seam.
+    events = []
+    for event in head:
+        if event["start_minute"] < minute:
+            events.append({**event, "end_minute": min(event["end_minute"], minute)})
+    for event in tail:
+        if event["end_minute"] > minute:
+            event = {**event, "start_minute": max(event["start_minute"], minute)}
+            if events and events[-1]["status"] == event["status"] and events[-1]["end_minute"] == event["start_minute"]:
+                events[-1] = {**events[-1], "end_minute": event["end_minute"]}
+            else:
+                events.append(event)
+    return events
+
+
+def _off_duty_day(day):
+    events = [{"status": "off_duty", "start_minute": 0, "end_minute": MINUTES_PER_DAY}]
+    return {"day": day, "events": events, "remarks": []}
+
+
+class DriverSchedule:
+    # `days` are rendered log days numbered from the clock's day 1; the last
+    # one stays open (its tail is off-duty padding) until the clock moves past
+    # it. `on_duty` maps day number to driving + on-duty minutes, including
+    # the seven days before day 1 from the starting clock.
+
+    def __init__(self, clock=None):
+        clock = clock or hos_clock()
+        self.days = []
+        self.loads = []
+        self.on_duty = {
+            clock["day"] - offset: minutes
+            for offset, minutes in zip(range(CYCLE_WINDOW_DAYS - 1, 0, -1), clock["prior_on_duty_minutes"])
+        }
+        self.on_duty[clock["day"]] = clock["shift_minutes"]
+        self._day = clock["day"]
+        self._minute = clock["minute"]
+        self._driving = clock["driving_minutes"]
+        self._shift = clock["shift_minutes"]
+
+    def cycle_used_minutes(self, day):
+        return sum(self.on_duty.get(day - offset, 0) for offset in range(CYCLE_WINDOW_DAYS))
+
+    @property
+    def clock(self):
+        return {
+            "day": self._day,
+            "minute": self._minute,
+            "driving_minutes": self._driving,
+            "shift_minutes": self._shift,
+            "prior_on_duty_minutes": [
+                self.on_duty.get(self._day - offset, 0) for offset in range(CYCLE_WINDOW_DAYS - 1, 0, -1)
+            ],
+            "cycle_used_minutes": self.cycle_used_minutes(self._day),
+        }
+
+    def _rest(self, minutes):
+        # Off duty between loads. Crossing midnight resets the daily clocks,
+        # as in the engine.
+        minute = self._minute + minutes
+        while minute >= MINUTES_PER_DAY:
+            if not self.days or self.days[-1]["day"] != self._day:
+                self.days.append(_off_duty_day(self._day))
+            minute -= MINUTES_PER_DAY
+            self._day += 1
+            self._driving = self._shift = 0
+            self.on_duty.setdefault(self._day, 0)
+        self._minute = minute
+
+    def append_load(self, route, stops, rest_minutes=0, label=None):
+        # Simulates just this load from the current clock and returns its
+        # summary; earlier days are left untouched apart from the open one.
+        self._rest(int(rest_minutes))
+        first_day = self._day
+        start = (self._minute, self._driving, self._shift)
+        aggregates = {}
+        logs = list(iter_hos_logs(route, stops, aggregates=aggregates, start=start))
+
+        # The load ends with on-duty time; everything after it is padding.
+        worked = [event for event in logs[-1]["events"] if event["status"] != "off_duty"]
+        end_minute = worked[-1]["end_minute"] if worked else start[0]
+
+        # Daily clocks and on-duty per day as the engine counts them: day one
+        # of the load carries the clocks it started with.
+        for idx, log in enumerate(logs):
+            events = _splice_events(log["events"], [], end_minute) if log is logs[-1] else log["events"]
+            totals = _day_totals(events)
+            driving = totals["driving"] + (start[1] if idx == 0 else 0)
+            shift = totals["driving"] + totals["on_duty"] + (start[2] if idx == 0 else 0)
+            log["day"] += first_day - 1
+            self.on_duty[log["day"]] = shift
+
+        last_day = logs[-1]["day"]
+        self._day, self._minute, self._driving, self._shift = last_day, end_minute, driving, shift
+        if end_minute >= MINUTES_PER_DAY:
+            self._day, self._minute, self._driving, self._shift = last_day + 1, 0, 0, 0
+            self.on_duty.setdefault(self._day, 0)
+
+        if self.days and self.days[-1]["day"] == first_day:
+            open_day = self.days.pop()
+            logs[0] = {
+                "day": first_day,
+                "events": _splice_events(open_day["events"], logs[0]["events"], start[0]),
+                "remarks": open_day["remarks"] + logs[0]["remarks"],
+            }
+        self.days.extend(logs)
+
+        peak = max(self.cycle_used_minutes(day) for day in range(first_day, last_day + 1))
+        summary = {
+            "load": len(self.loads) + 1,
+            "label": label,
+            "start_day": first_day,
+            "start_minute": start[0],
+            "end_day": last_day,
+            "end_minute": end_minute,
+            "days_spanned": last_day - first_day + 1,
+            "driving_minutes": aggregates["driving_minutes"],
+            "on_duty_minutes": aggregates["on_duty_minutes"],
+            "cycle_used_minutes": self.cycle_used_minutes(last_day),
+            "cycle_limit_exceeded": peak > CYCLE_LIMIT_MINUTES,
+        }
+        self.loads.append(summary)
+        return summary
@@ -0,0 +1,321 @@
+import codecs
+import json
+import re
+from array import array
+
+from utils.route_geometry import PackedPolyline
+
+
+CHUNK_SIZE = 64 * 1024
+LOOKAHEAD = 256
+
+_NUMBER = re.compile(r"-?(?:0|[1-9]\d*)(?:\.\d+)?(?:[eE][+-]?\d+)?")
+_STRING = re.compile(r'"((?:[^"\\]|\\.)*)"')
+_STRING_BODY = re.compile(r'(?:[^"\\]|\\.)*')
+_STRUCTURAL = re.compile(r'["{}\[\]]')
+_LITERAL = re.compile(r"true|false|null")
+_COORDINATE_ITEM = re.compile(
+    r"\s*\[\s*(-?[0-9.eE+-]+)\s*,\s*(-?[0-9.eE+-]+)\s*(?:,\s*-?[0-9.eE+-]+\s*)?\]\s*([,\]])"
+)
+_WHITESPACE = " \t\n\r"
+
+
+class _JsonReader:
+    # Pull parser over a file-like response body. Only the decoded text that has
+    # not been consumed yet is held in memory, so skipped subtrees and the
+    # coordinate array never exist as a whole string or as Python objects.
+
+    def __init__(self, stream, chunk_size=CHUNK_SIZE):
+        self.stream = stream
+        self.chunk_size = chunk_size
+        self.decoder = codecs.getincrementaldecoder("utf-8")()
+        self.buf = ""
+        self.pos = 0
+        self.eof = False
+
+    def _fill(self):
+        if self.eof:
+            return False
+        chunk = self.stream.read(self.chunk_size)
+        if not chunk:
+            self.eof = True
+            text = self.decoder.decode(b"", final=True)
+        else:
+            text = self.decoder.decode(chunk)
+        self.buf = self.buf[self.pos:] + text
+        self.pos = 0
+        return bool(text) or not self.eof
+
+    def peek(self):
+        while True:
+            buf = self.buf
+            pos = self.pos
+            length = len(buf)
+            while pos < length and buf[pos] in _WHITESPACE:
+                pos += 1
+            self.pos = pos
+            if pos < length:
+                return buf[pos]
+            if not self._fill():
+                return ""
+
+    def expect(self, char):
+        if self.peek() != char:
+            raise ValueError(f"Expected {char!r} at offset {self.pos} of ORS response")
+        self.pos += 1
+
+    def _ensure_lookahead(self):
+        # Scalar tokens are far shorter than LOOKAHEAD, so once this many
+        # characters are buffered a token cannot continue past the buffer end.
+        while len(self.buf) - self.pos < LOOKAHEAD and self._fill():
+            pass
+
+    def _match(self, pattern):
+        self._ensure_lookahead()
+        match = pattern.match(self.buf, self.pos)
+        if match is not None:
+            self.pos = match.end()
+        return match
+
+    def read_number(self):
+        self.peek()
+        match = self._match(_NUMBER)
+        if not match:
+            raise ValueError(f"Expected number at offset {self.pos} of ORS response")
+        return float(match.group(0))
+
+    def read_string(self):
+        self.peek()
+        match = self._match(_STRING)
+        if not match:
+            raise ValueError(f"Expected string at offset {self.pos} of ORS response")
+        raw = match.group(1)
+        if "\\" in raw:
+            return json.loads(f'"{raw}"')
+        return raw
+
+    def _skip_string(self):
+        self.expect('"')
+        while True:
+            match = _STRING_BODY.match(self.buf, self.pos)
+            self.pos = match.end()
+            if self.pos < len(self.buf) and self.buf[self.pos] == '"':
+                self.pos += 1
+                return
+            if not self._fill():
+                raise ValueError("Unterminated string in ORS response")
+
+    def skip_value(self):
+        char = self.peek()
+        if char == '"':
+            self._skip_string()
+            return
+        if char not in "{[":
+            if self._match(_LITERAL) is None:
+                self.read_number()
+            return
+
+        depth = 0
+        while True:
+            match = _STRUCTURAL.search(self.buf, self.pos)
+            if match is None:
+                self.pos = len(self.buf)
+                if not self._fill():
+                    raise ValueError("Unterminated value in ORS response")
+                continue
+
+            token = match.group(0)
+            if token == '"':
+                self.pos = match.start()
+                self._skip_string()
+                continue
+
+            self.pos = match.end()
+            if token in "{[":
+                depth += 1
+            else:
+                depth -= 1
+                if depth == 0:
+                    return
+
+    def iter_object(self):
+        # Yields each key; the caller must consume the value before resuming.
+        self.expect("{")
+        if self.peek() == "}":
+            self.pos += 1
+            return
+        while True:
+            key = self.read_string()
+            self.expect(":")
+            yield key
+            char = self.peek()
+            self.pos += 1
+            if char == "}":
+                return
+            if char != ",":
+                raise ValueError(f"Malformed object at offset {self.pos} of ORS response")
+
+    def iter_array(self):
+        # Yields each index; the caller must consume the item before resuming.
+        self.expect("[")
+        if self.peek() == "]":
+            self.pos += 1
+            return
+        index = 0
+        while True:
+            yield index
+            index += 1
+            char = self.peek()
+            self.pos += 1
+            if char == "]":
+                return
+            if char != ",":
+                raise ValueError(f"Malformed array at offset {self.pos} of ORS response")
+
+    def read_coordinates(self, out):
+        self.expect("[")
+        if self.peek() == "]":
+            self.pos += 1
+            return out
+        append = out.append
+        while True:
+            self._ensure_lookahead()
+            buf = self.buf
+            pos = self.pos
+            limit = len(buf) - LOOKAHEAD
+            while True:
+                match = _COORDINATE_ITEM.match(buf, pos)
+                if match is None:
+                    raise ValueError(f"Malformed coordinate at offset {pos} of ORS response")
+                append(float(match.group(1)))
+                append(float(match.group(2)))
+                pos = match.end()
+                if match.group(3) == "]":
+                    self.pos = pos
+                    return out
+                if pos > limit:
+                    break
+            self.pos = pos
+
+    def read_encoded_polyline(self, out):
+        self.expect('"')
+        decoder = _PolylineDecoder(out)
+        while True:
+            end = self.buf.find('"', self.pos)
+            stop = end if end != -1 else len(self.buf)
+            segment = self.buf[self.pos:stop]
+            if end == -1 and (len(segment) - len(segment.rstrip("\\"))) % 2:
+                # Keep a dangling escape until the next chunk completes it.
+                segment = segment[:-1]
+                stop -= 1
+            decoder.feed(segment.replace("\\\\", "\\") if "\\" in segment else segment)
+            self.pos = stop
+            if end != -1:
+                self.pos += 1
+                return out
+            if not self._fill():
+                raise ValueError("Unterminated geometry in ORS response")
+
+
+class _PolylineDecoder:
+    # Incremental form of the ORS encoded polyline (precision 5); state carries
+    # across chunks so the encoded string is never materialized in full.
+
+    def __init__(self, out):
+        self.out = out
+        self.result = 0
+        self.shift = 0
+        self.lat = 0
+        self.lng = 0
+        self.pending_lat = None
+
+    def feed(self, text):
+        out = self.out
+        result = self.result
+        shift = self.shift
+        for char in text:
+            b = ord(char) - 63
+            result |= (b & 0x1F) << shift
+            shift += 5
+            if b >= 0x20:
+                continue
+
+            delta = ~(result >> 1) if (result & 1) else (result >> 1)
+            result = shift = 0
+            if self.pending_lat is None:
+                self.lat += delta
+                self.pending_lat = self.lat
+            else:
+                self.lng += delta
+                out.append(self.lng / 1e5)
+                out.append(self.pending_lat / 1e5)
+                self.pending_lat = None
+        self.result = result
+        self.shift = shift
+
+
+def _read_summary(reader):
+    summary = {}
+    for key in reader.iter_object():
+        if key in ("distance", "duration"):
+            summary[key] = reader.read_number()
+        else:
+            reader.skip_value()
+    return summary
+
+
+def _read_geometry(reader, coords):
+    char = reader.peek()
+    if char == '"':
+        reader.read_encoded_polyline(coords)
+        return
+    if char != "{":
+        reader.skip_value()
+        return
+    for key in reader.iter_object():
+        if key == "coordinates":
+            reader.read_coordinates(coords)
+        else:
+            reader.skip_value()
+
+
+def _read_route(reader, geojson):
+    summary = None
+    coords = array("d")
+    for key in reader.iter_object():
+        if geojson and key == "properties":
+            for prop_key in reader.iter_object():
+                if prop_key == "summary":
+                    summary = _read_summary(reader)
+                else:
+                    reader.skip_value()
+        elif not geojson and key == "summary":
+            summary = _read_summary(reader)
+        elif key == "geometry":
+            _read_geometry(reader, coords)
+        else:
+            reader.skip_value()
+
+    summary = summary or {}
+    return {
+        "distance": summary.get("distance"),
+        "duration": summary.get("duration"),
+        "coordinates": PackedPolyline(coords),
+    }
+
+
+def parse_ors_directions(stream, max_routes=1, chunk_size=CHUNK_SIZE):
+    # Handles both the JSON ("routes" + encoded geometry) and GeoJSON
+    # ("features" + coordinate arrays) directions formats.
+    reader = _JsonReader(stream, chunk_size=chunk_size)
+    routes = []
+    for key in reader.iter_object():
+        if key not in ("features", "routes"):
+            reader.skip_value()
+            continue
+        for _ in reader.iter_array():
+            if len(routes) < max_routes:
+                routes.append(_read_route(reader, geojson=(key == "features")))
+            else:
+                reader.skip_value()
+    return routes
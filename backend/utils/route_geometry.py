@@ -0,0 +1,195 @@
+import mmap
+import os
+import struct
+import threading
+from array import array
+
+from utils.stop_planner import _haversine_miles
+
+try:
+    import fcntl
+except ImportError:  # pragma: no cover - non-POSIX hosts append without a file lock
+    fcntl = None
+
+
+class PackedPolyline:
+    # [lng, lat] sequence backed by one flat float buffer instead of a list of
+    # two-element lists. Indexing returns plain [lng, lat] lists so stop planning
+    # and the HOS engine can use it wherever a polyline list is accepted.
+    # `coords` may be an array or a memoryview over a memory-mapped store record.
+    __slots__ = ("coords", "_cumulative")
+
+    def __init__(self, coords=None, cumulative=None):
+        self.coords = coords if coords is not None else array("d")
+        self._cumulative = cumulative
+
+    @classmethod
+    def from_points(cls, points):
+        coords = array("d")
+        for point in points:
+            coords.append(float(point[0]))
+            coords.append(float(point[1]))
+        return cls(coords)
+
+    @property
+    def cumulative_miles(self):
+        # Running haversine distance per vertex; lets get_point_at_distance
+        # bisect instead of rescanning the polyline for every stop.
+        if self._cumulative is None:
+            self._cumulative = cumulative_miles(self)
+        return self._cumulative
+
+    def __len__(self):
+        return len(self.coords) // 2
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self[idx] for idx in range(*index.indices(len(self)))]
+
+        size = len(self)
+        if index < 0:
+            index += size
+        if not 0 <= index < size:
+            raise IndexError("polyline index out of range")
+        offset = index * 2
+        return [self.coords[offset], self.coords[offset + 1]]
+
+    def __iter__(self):
+        values = iter(self.coords)
+        for lng, lat in zip(values, values):
+            yield [lng, lat]
+
+    def tolist(self):
+        return list(self)
+
+
+def cumulative_miles(polyline):
+    totals = array("d")
+    accumulated = 0.0
+    previous = None
+    for point in polyline:
+        if previous is not None:
+            accumulated = accumulated + _haversine_miles(previous, point)
+        totals.append(accumulated)
+        previous = point
+    return totals
+
+
+STORE_MAGIC = b"RGEO"
+STORE_VERSION = 1
+_FILE_HEADER = struct.Struct("<4sHxx")
+_RECORD_HEADER = struct.Struct("<4scxxxQ")
+RECORD_MAGIC = b"RREC"
+COORD_TYPECODES = ("d", "f")
+
+
+def _padded(size):
+    return (size + 7) & ~7
+
+
+class GeometryStore:
+    # Append-only binary file of route geometries. Each record holds packed
+    # coordinates (float64 or float32) followed by the float64 cumulative-mile
+    # array; reads return PackedPolyline views over an mmap, with no parsing.
+    #
+    #   file   := header record*
+    #   header := b"RGEO" u16 version, padded to 8 bytes
+    #   record := b"RREC" typecode u64 point_count, coords, cumulative miles
+    #             (each block padded to 8 bytes)
+
+    def __init__(self, path):
+        self.path = os.fspath(path)
+        self._lock = threading.Lock()
+        self._map = None
+
+    def append(self, polyline, typecode="d"):
+        if typecode not in COORD_TYPECODES:
+            raise ValueError(f"Unsupported coordinate typecode: {typecode!r}")
+
+        if isinstance(polyline, PackedPolyline) and getattr(polyline.coords, "typecode", None) == typecode:
+            coords = polyline.coords
+        else:
+            coords = array(typecode)
+            for lng, lat in polyline:
+                coords.append(lng)
+                coords.append(lat)
+        point_count = len(coords) // 2
+        totals = polyline.cumulative_miles if isinstance(polyline, PackedPolyline) else cumulative_miles(polyline)
+
+        coord_bytes = coords.tobytes() if isinstance(coords, array) else bytes(coords)
+        cumulative_bytes = totals.tobytes() if isinstance(totals, array) else bytes(totals)
+        payload = b"".join(
+            [
+                _RECORD_HEADER.pack(RECORD_MAGIC, typecode.encode("ascii"), point_count),
+                coord_bytes,
+                b"\0" * (_padded(len(coord_bytes)) - len(coord_bytes)),
+                cumulative_bytes,
+            ]
+        )
+
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with self._lock, open(self.path, "ab") as handle:
+            if fcntl is not None:
+                fcntl.flock(handle, fcntl.LOCK_EX)
+            try:
+                handle.seek(0, os.SEEK_END)
+                if handle.tell() == 0:
+                    handle.write(_FILE_HEADER.pack(STORE_MAGIC, STORE_VERSION))
+                offset = handle.tell()
+                handle.write(payload)
+                handle.flush()
+            finally:
+                if fcntl is not None:
+                    fcntl.flock(handle, fcntl.LOCK_UN)
+        return offset
+
+    def _mapped(self, end):
+        with self._lock:
+            if self._map is None or len(self._map) < end:
+                with open(self.path, "rb") as handle:
+                    mapped = mmap.mmap(handle.fileno(), 0, access=mmap.ACCESS_READ)
+                magic, version = _FILE_HEADER.unpack_from(mapped, 0)
+                if magic != STORE_MAGIC or version != STORE_VERSION:
+                    raise ValueError(f"{self.path} is not a route geometry store")
+                # Views handed out earlier keep the previous mapping alive.
+                self._map = memoryview(mapped)
+            return self._map
+
+    def reset(self):
+        # Drops the mapping so the next read maps the file again (after it
+        # has been replaced by compaction).
+        with self._lock:
+            self._map = None
+
+    def read(self, offset):
+        mapped = self._mapped(offset + _RECORD_HEADER.size)
+        magic, typecode, point_count = _RECORD_HEADER.unpack_from(mapped, offset)
+        typecode = typecode.decode("ascii")
+        if magic != RECORD_MAGIC or typecode not in COORD_TYPECODES:
+            raise ValueError(f"No route geometry record at offset {offset}")
+
+        coords_start = offset + _RECORD_HEADER.size
+        coords_size = point_count * 2 * struct.calcsize(typecode)
+        cumulative_start = coords_start + _padded(coords_size)
+        cumulative_end = cumulative_start + point_count * 8
+        mapped = self._mapped(cumulative_end)
+
+        coords = mapped[coords_start:coords_start + coords_size].cast(typecode)
+        totals = mapped[cumulative_start:cumulative_end].cast("d")
+        return PackedPolyline(coords, cumulative=totals)
+
+
+_stores = {}
+_stores_lock = threading.Lock()
+
+
+def open_geometry_store(path):
+    # One store (and mapping) per file per process.
+    key = os.path.abspath(os.fspath(path))
+    with _stores_lock:
+        store = _stores.get(key)
+        if store is None:
+            store = _stores[key] = GeometryStore(key)
+        return store
@@ -0,0 +1,111 @@
+import math
+from array import array
+
+from utils.route_geometry import PackedPolyline
+from utils.stop_planner import EARTH_RADIUS_MILES
+
+
+MILES_PER_DEGREE = math.radians(1) * EARTH_RADIUS_MILES
+DEFAULT_MAX_OFFSET_MILES = 10.0
+MIN_CELL_DEGREES = 0.005
+MAX_CELL_DEGREES = 0.5
+
+
+class SegmentIndex:
+    # Uniform lng/lat grid over the polyline's segments. Each cell lists the
+    # segments whose bounding box touches it, so projecting a ping only looks
+    # at the few cells around it instead of scanning every segment.
+
+    def __init__(self, polyline, cell_degrees=None):
+        if not isinstance(polyline, PackedPolyline):
+            polyline = PackedPolyline.from_points(polyline)
+        self.coords = polyline.coords
+        self.cumulative = polyline.cumulative_miles
+        self.segment_count = max(0, len(polyline) - 1)
+
+        coords = self.coords
+        if cell_degrees is None:
+            # About four average segments per cell, within sane bounds.
+            span = sum(
+                abs(coords[2 * idx + 2] - coords[2 * idx]) + abs(coords[2 * idx + 3] - coords[2 * idx + 1])
+                for idx in range(self.segment_count)
+            )
+            average = span / (2 * self.segment_count) if self.segment_count else MAX_CELL_DEGREES
+            cell_degrees = min(MAX_CELL_DEGREES, max(MIN_CELL_DEGREES, average * 4))
+        self.cell_degrees = cell_degrees
+
+        # Ring distances are measured where a degree of longitude is shortest.
+        max_lat = max((abs(coords[idx]) for idx in range(1, len(coords), 2)), default=0.0)
+        self.min_cell_miles = cell_degrees * MILES_PER_DEGREE * max(0.01, math.cos(math.radians(min(max_lat, 89.0))))
+
+        cells = {}
+        for idx in range(self.segment_count):
+            lng1, lat1, lng2, lat2 = coords[2 * idx:2 * idx + 4]
+            for cx in range(self._cell(min(lng1, lng2)), self._cell(max(lng1, lng2)) + 1):
+                for cy in range(self._cell(min(lat1, lat2)), self._cell(max(lat1, lat2)) + 1):
+                    bucket = cells.get((cx, cy))
+                    if bucket is None:
+                        bucket = cells[(cx, cy)] = array("I")
+                    bucket.append(idx)
+        self.cells = cells
+
+    def _cell(self, degrees):
+        return math.floor(degrees / self.cell_degrees)
+
+    def _nearest_in(self, lng, lat, scale, segments, best):
+        # Planar nearest point in a local equirectangular frame at the ping's
+        # latitude; route miles use the segment's haversine length.
+        coords = self.coords
+        best_dist2, best_idx, best_t = best
+        for idx in segments:
+            base = 2 * idx
+            ax = coords[base] * scale
+            ay = coords[base + 1]
+            dx = coords[base + 2] * scale - ax
+            dy = coords[base + 3] - ay
+            px = lng * scale - ax
+            py = lat - ay
+            length2 = dx * dx + dy * dy
+            t = 0.0 if length2 == 0 else max(0.0, min(1.0, (px * dx + py * dy) / length2))
+            ex = px - t * dx
+            ey = py - t * dy
+            dist2 = ex * ex + ey * ey
+            if dist2 < best_dist2:
+                best_dist2, best_idx, best_t = dist2, idx, t
+        return best_dist2, best_idx, best_t
+
+    def project(self, lng, lat, max_offset_miles=DEFAULT_MAX_OFFSET_MILES):
+        # Returns (route_mile, offset_miles), or None when no segment lies
+        # within max_offset_miles of the ping.
+        if not self.segment_count:
+            return None
+
+        scale = math.cos(math.radians(lat))
+        cx, cy = self._cell(lng), self._cell(lat)
+        limit_degrees2 = (max_offset_miles / MILES_PER_DEGREE) ** 2
+        best = (limit_degrees2, -1, 0.0)
+        cells = self.cells
+        max_ring = int(max_offset_miles / self.min_cell_miles) + 1
+        seen = set()
+
+        for ring in range(max_ring + 1):
+            for x in range(cx - ring, cx + ring + 1):
+                edge = x in (cx - ring, cx + ring)
+                for y in range(cy - ring, cy + ring + 1) if edge else (cy - ring, cy + ring):
+                    segments = cells.get((x, y))
+                    if segments is None:
+                        continue
+                    if len(segments) > 1 or ring:
+                        segments = [idx for idx in segments if idx not in seen]
+                        seen.update(segments)
+                    best = self._nearest_in(lng, lat, scale, segments, best)
+            # Unvisited cells are at least `ring` cells away from the ping.
+            if best[1] >= 0 and math.sqrt(best[0]) * MILES_PER_DEGREE <= ring * self.min_cell_miles:
+                break
+
+        dist2, idx, t = best
+        if idx < 0:
+            return None
+        start_mile = self.cumulative[idx]
+        route_mile = start_mile + t * (self.cumulative[idx + 1] - start_mile)
+        return route_mile, math.sqrt(dist2) * MILES_PER_DEGREE
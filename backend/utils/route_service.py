@@ -1,10 +1,26 @@
 import json
+import math
 import os
 from urllib import error, request
 from dotenv import load_dotenv  
 
+from utils.ors_stream import parse_ors_directions
+
 load_dotenv()
 
+EARTH_RADIUS_MILES = 3958.7613
+SYNTHETIC_POINTS_PER_MILE = 1.0
+SYNTHETIC_ROAD_FACTOR = 1.2
+SYNTHETIC_AVERAGE_MPH = 55.0
+SYNTHETIC_WIGGLE_QUARTER_MILES = 2.5
+
+# ORS returns at most three alternatives; weight_factor bounds how much longer
+# an alternative may be, share_factor how much of the recommended route it may reuse.
+ORS_MAX_ALTERNATIVES = 3
+ORS_ALTERNATIVE_WEIGHT_FACTOR = 1.6
+ORS_ALTERNATIVE_SHARE_FACTOR = 0.6
+ORS_ERRORS = (KeyError, IndexError, TypeError, ValueError, error.URLError, error.HTTPError)
+
 def get_mock_route(current_location, pickup_location, dropoff_location):
     # Deterministic placeholder route for connectivity testing only.
     return {
@@ -25,6 +41,89 @@ def get_mock_route(current_location, pickup_location, dropoff_location):
     }
 
 
+def _env_float(name, default):
+    try:
+        return float(os.getenv(name, default))
+    except (TypeError, ValueError):
+        return default
+
+
+def _unit_vector(lng, lat):
+    lng_rad = math.radians(lng)
+    lat_rad = math.radians(lat)
+    cos_lat = math.cos(lat_rad)
+    return (cos_lat * math.cos(lng_rad), cos_lat * math.sin(lng_rad), math.sin(lat_rad))
+
+
+def get_synthetic_route(pickup, dropoff, points_per_mile=None, road_factor=None, num_points=None):
+    # Densified great-circle lane between the real endpoints. The road factor is
+    # realized as a lateral zig-zag around the great circle so that the polyline
+    # length matches distance_miles and stops interpolate onto the drawn route.
+    if points_per_mile is None:
+        points_per_mile = _env_float("SYNTHETIC_ROUTE_POINTS_PER_MILE", SYNTHETIC_POINTS_PER_MILE)
+    if road_factor is None:
+        road_factor = _env_float("SYNTHETIC_ROUTE_ROAD_FACTOR", SYNTHETIC_ROAD_FACTOR)
+    road_factor = max(1.0, float(road_factor))
+
+    start = _unit_vector(pickup["lng"], pickup["lat"])
+    end = _unit_vector(dropoff["lng"], dropoff["lat"])
+    dot = max(-1.0, min(1.0, sum(a * b for a, b in zip(start, end))))
+    omega = math.acos(dot)
+    great_circle_miles = EARTH_RADIUS_MILES * omega
+
+    if num_points is None:
+        num_points = int(math.ceil(great_circle_miles * max(0.0, float(points_per_mile)))) + 1
+    num_points = max(2, int(num_points))
+
+    normal = (
+        start[1] * end[2] - start[2] * end[1],
+        start[2] * end[0] - start[0] * end[2],
+        start[0] * end[1] - start[1] * end[0],
+    )
+    normal_norm = math.sqrt(sum(c * c for c in normal))
+    if normal_norm > 0:
+        normal = tuple(c / normal_norm for c in normal)
+
+    spacing_miles = great_circle_miles / (num_points - 1)
+    quarter = max(1, int(round(SYNTHETIC_WIGGLE_QUARTER_MILES / spacing_miles))) if spacing_miles > 0 else 1
+    amplitude_rad = 0.0
+    if normal_norm > 0 and road_factor > 1.0:
+        amplitude_rad = quarter * spacing_miles * math.sqrt(road_factor * road_factor - 1) / EARTH_RADIUS_MILES
+
+    sin_omega = math.sin(omega)
+    last = num_points - 1
+    polyline = []
+    for idx in range(num_points):
+        fraction = idx / last
+        if sin_omega > 1e-12:
+            weight_a = math.sin((1 - fraction) * omega) / sin_omega
+            weight_b = math.sin(fraction * omega) / sin_omega
+        else:
+            weight_a, weight_b = 1 - fraction, fraction
+        x = weight_a * start[0] + weight_b * end[0]
+        y = weight_a * start[1] + weight_b * end[1]
+        z = weight_a * start[2] + weight_b * end[2]
+
+        if amplitude_rad and 0 < idx < last:
+            phase = (idx % (4 * quarter)) / quarter
+            offset = phase if phase <= 1 else (2 - phase if phase <= 3 else phase - 4)
+            x += normal[0] * amplitude_rad * offset
+            y += normal[1] * amplitude_rad * offset
+            z += normal[2] * amplitude_rad * offset
+
+        polyline.append([math.degrees(math.atan2(y, x)), math.degrees(math.atan2(z, math.hypot(x, y)))])
+
+    polyline[0] = [pickup["lng"], pickup["lat"]]
+    polyline[-1] = [dropoff["lng"], dropoff["lat"]]
+
+    distance_miles = great_circle_miles * road_factor
+    return {
+        "distance_miles": round(distance_miles, 2),
+        "duration_hours": round(distance_miles / SYNTHETIC_AVERAGE_MPH, 2),
+        "polyline": polyline,
+    }
+
+
 def _has_coordinates(location):
     return (
         isinstance(location, dict)
@@ -32,51 +131,19 @@ def _has_coordinates(location):
         and location.get("lat") is not None
     )
 
-def _decode_ors_polyline(encoded: str):
-    # ORS uses encoded polyline with precision 5
-    coordinates = []
-    index = lat = lng = 0
-    length = len(encoded)
-
-    while index < length:
-        shift = result = 0
-        while True:
-            b = ord(encoded[index]) - 63
-            index += 1
-            result |= (b & 0x1F) << shift
-            shift += 5
-            if b < 0x20:
-                break
-        dlat = ~(result >> 1) if (result & 1) else (result >> 1)
-        lat += dlat
-
-        shift = result = 0
-        while True:
-            b = ord(encoded[index]) - 63
-            index += 1
-            result |= (b & 0x1F) << shift
-            shift += 5
-            if b < 0x20:
-                break
-        dlng = ~(result >> 1) if (result & 1) else (result >> 1)
-        lng += dlng
-
-        # precision 5
-        coordinates.append([lng / 1e5, lat / 1e5])
-
-    return coordinates
+class RouteUnavailable(Exception):
+    pass
 
-def get_route(pickup, dropoff):
-    if not _has_coordinates(pickup) or not _has_coordinates(dropoff):
-        print("get_route: missing coords", pickup, dropoff)
-        return get_mock_route(None, pickup, dropoff)
 
-    ors_api_key = os.getenv("ORS_API_KEY")
-    if not ors_api_key:
-        print("get_route: ORS_API_KEY missing")
+def get_route(pickup, dropoff):
+    try:
+        return get_route_alternatives(pickup, dropoff, count=1)[0]
+    except RouteUnavailable as e:
+        print("get_route: using mock route:", e)
         return get_mock_route(None, pickup, dropoff)
 
 
+def _ors_routes(pickup, dropoff, count, ors_api_key):
     url = "https://api.openrouteservice.org/v2/directions/driving-car"
     payload = {
         "coordinates": [
@@ -84,6 +151,12 @@ def get_route(pickup, dropoff):
             [dropoff["lng"], dropoff["lat"]],
         ]
     }
+    if count > 1:
+        payload["alternative_routes"] = {
+            "target_count": count,
+            "weight_factor": ORS_ALTERNATIVE_WEIGHT_FACTOR,
+            "share_factor": ORS_ALTERNATIVE_SHARE_FACTOR,
+        }
 
     req = request.Request(
         url=url,
@@ -95,34 +168,45 @@ def get_route(pickup, dropoff):
         method="POST",
     )
 
-    try:
-        with request.urlopen(req, timeout=15) as response:
-            raw = response.read().decode("utf-8")
-            data = json.loads(raw)
+    with request.urlopen(req, timeout=15) as response:
+        routes = parse_ors_directions(response, max_routes=count)
 
-        if "features" in data and data["features"]:
-            feature = data["features"][0]
-            summary = feature["properties"]["summary"]
-            coordinates = feature["geometry"]["coordinates"]
+    if not routes:
+        raise ValueError("ORS unexpected response: no routes or features")
 
-        elif "routes" in data and data["routes"]:
-            r0 = data["routes"][0]
-            summary = r0["summary"]
-            coordinates = _decode_ors_polyline(r0["geometry"])
+    return [
+        {
+            "distance_miles": round(route["distance"] / 1609.344, 2),
+            "duration_hours": round(route["duration"] / 3600, 2),
+            "polyline": route["coordinates"],
+        }
+        for route in routes
+    ]
 
-        else:
-            print("ORS unexpected response:", data)
-            return get_mock_route(None, pickup, dropoff)
 
-        distance_miles = summary["distance"] / 1609.344
-        duration_hours = summary["duration"] / 3600
+def get_route_alternatives(pickup, dropoff, count=ORS_MAX_ALTERNATIVES):
+    # Up to `count` routes from one ORS request, recommended route first. ORS
+    # only accepts alternative_routes for short lanes, so a rejected request is
+    # retried once as a single route. Raises RouteUnavailable rather than
+    # returning a placeholder; get_route alone falls back to the mock route.
+    if not _has_coordinates(pickup) or not _has_coordinates(dropoff):
+        raise RouteUnavailable("pickup and dropoff coordinates are required")
 
-        return {
-            "distance_miles": round(distance_miles, 2),
-            "duration_hours": round(duration_hours, 2),
-            "polyline": coordinates,
-        }
+    if os.getenv("ROUTE_BACKEND", "ors").strip().lower() == "synthetic":
+        return [get_synthetic_route(pickup, dropoff)]
 
-    except (KeyError, IndexError, TypeError, ValueError, error.URLError, error.HTTPError) as e:
-        print("ORS routing failed, using mock route:", e)
-        return get_mock_route(None, pickup, dropoff)
+    ors_api_key = os.getenv("ORS_API_KEY")
+    if not ors_api_key:
+        raise RouteUnavailable("ORS_API_KEY missing")
+
+    count = max(1, min(int(count), ORS_MAX_ALTERNATIVES))
+    try:
+        return _ors_routes(pickup, dropoff, count, ors_api_key)
+    except ORS_ERRORS as e:
+        if count == 1:
+            raise RouteUnavailable(f"ORS routing failed: {e}") from e
+        print("ORS alternatives failed, retrying as a single route:", e)
+    try:
+        return _ors_routes(pickup, dropoff, 1, ors_api_key)
+    except ORS_ERRORS as e:
+        raise RouteUnavailable(f"ORS routing failed: {e}") from e
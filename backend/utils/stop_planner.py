@@ -1,9 +1,52 @@
+import json
 import math
+import os
+import threading
+from bisect import bisect_left
 
 
 EARTH_RADIUS_MILES = 3958.7613
 BREAK_INTERVAL_MILES = 400
 FUEL_INTERVAL_MILES = 1000
+MERGE_WITHIN_MILES = 10
+SITE_CORRIDOR_MILES = 5.0
+
+# A rule places stops of one type either every `interval_miles` or at fixed
+# `sites` (route `mile`, or `lng`/`lat` projected onto the route). A rule with
+# `absorbs` takes the nearest stop of that type within `absorb_within_miles`
+# and gains its `combined` fields; `optional` sites are only kept when they
+# absorb something. Any other keys (duration_minutes, duty_status, reason,
+# eld_required, ...) are copied onto each stop.
+DEFAULT_STOP_RULES = (
+    {"type": "break", "interval_miles": BREAK_INTERVAL_MILES, "eld_required": True},
+    {
+        "type": "fuel",
+        "interval_miles": FUEL_INTERVAL_MILES,
+        "absorbs": "break",
+        "absorb_within_miles": MERGE_WITHIN_MILES,
+        "combined": {
+            "combined_break": True,
+            "reason": "Fuel + 30-min break",
+            "duration_minutes": 45,
+            "eld_required": True,
+        },
+    },
+)
+RULE_CONTROL_KEYS = {
+    "type",
+    "interval_miles",
+    "sites",
+    "absorbs",
+    "absorb_within_miles",
+    "combined",
+    "optional",
+    "corridor_miles",
+    "eld_required",
+}
+RESERVED_STOP_TYPES = {"pickup", "dropoff", "start"}
+
+_rule_files = {}
+_rule_files_lock = threading.Lock()
 
 
 def _haversine_miles(point_a, point_b):
@@ -37,6 +80,16 @@ def get_point_at_distance(polyline, target_miles):
     if target_miles <= 0:
         return polyline[0]
 
+    cumulative = getattr(polyline, "cumulative_miles", None)
+    if cumulative is not None:
+        idx = bisect_left(cumulative, target_miles)
+        if idx >= len(cumulative):
+            return polyline[-1]
+        start, end = polyline[idx - 1], polyline[idx]
+        # Same divisor as the scan below, so both paths give identical points.
+        ratio = (target_miles - cumulative[idx - 1]) / _haversine_miles(start, end)
+        return _interpolate_point(start, end, ratio)
+
     accumulated = 0.0
     for idx in range(len(polyline) - 1):
         start = polyline[idx]
@@ -102,7 +155,183 @@ def _add_stop(
     seen_coords.add(key)
 
 
-def plan_stops(route, pickup, dropoff):
+def _is_number(value):
+    if isinstance(value, bool):
+        return False
+    try:
+        return math.isfinite(float(value))
+    except (TypeError, ValueError):
+        return False
+
+
+def validate_stop_rules(rules):
+    # Checks the whole shape up front so planning never sees a rule it cannot
+    # use; every problem is a ValueError.
+    if not isinstance(rules, (list, tuple)) or not rules:
+        raise ValueError("Stop rules must be a non-empty list.")
+    for rule in rules:
+        if not isinstance(rule, dict) or not isinstance(rule.get("type"), str):
+            raise ValueError("Each stop rule needs a `type`.")
+        name = rule["type"]
+        if name in RESERVED_STOP_TYPES:
+            raise ValueError(f"Stop rule type `{name}` is reserved.")
+        if ("interval_miles" in rule) == ("sites" in rule):
+            raise ValueError(f"Stop rule `{name}` needs exactly one of interval_miles or sites.")
+        if "interval_miles" in rule and not (_is_number(rule["interval_miles"]) and float(rule["interval_miles"]) > 0):
+            raise ValueError(f"Stop rule `{name}` interval_miles must be a positive number.")
+        if rule.get("corridor_miles") is not None and not _is_number(rule["corridor_miles"]):
+            raise ValueError(f"Stop rule `{name}` corridor_miles must be a number.")
+        if "sites" in rule and not isinstance(rule["sites"], list):
+            raise ValueError(f"Stop rule `{name}` sites must be a list.")
+        for site in rule.get("sites", ()):
+            if not isinstance(site, dict):
+                raise ValueError(f"Stop rule `{name}` sites must be objects.")
+            for field in ("mile", "lng", "lat"):
+                if site.get(field) is not None and not _is_number(site[field]):
+                    raise ValueError(f"Stop rule `{name}` site {field} must be a number.")
+    return list(rules)
+
+
+def load_stop_rules(path, carrier=None):
+    # JSON file {"default": [rules], "carriers": {"<name>": [rules]}}; parsed
+    # once per file version. Falls back to DEFAULT_STOP_RULES.
+    if not path or not os.path.exists(path):
+        return list(DEFAULT_STOP_RULES)
+    stat = os.stat(path)
+    key = (stat.st_mtime_ns, stat.st_size)
+    with _rule_files_lock:
+        cached = _rule_files.get(path)
+    if cached is None or cached[0] != key:
+        with open(path, encoding="utf-8") as handle:
+            config = json.load(handle)
+        if not isinstance(config, dict) or not isinstance(config.get("carriers", {}), dict):
+            raise ValueError("Stop rules file must be an object with an optional `carriers` object.")
+        default = validate_stop_rules(config.get("default", DEFAULT_STOP_RULES))
+        carriers = {name: validate_stop_rules(rules) for name, rules in config.get("carriers", {}).items()}
+        cached = (key, default, carriers)
+        with _rule_files_lock:
+            _rule_files[path] = cached
+    return list(cached[2].get(carrier, cached[1]))
+
+
+def _site_miles(rule, polyline):
+    # Route miles for a sites rule: given miles as-is, coordinates projected
+    # onto the route (sites farther than corridor_miles are skipped).
+    sites = []
+    index = None
+    for site in rule["sites"]:
+        if site.get("mile") is not None:
+            sites.append((float(site["mile"]), site))
+            continue
+        if site.get("lng") is None or site.get("lat") is None:
+            continue
+        if index is None:
+            # Imported here: route_projection builds on this module.
+            from utils.route_projection import SegmentIndex
+
+            index = SegmentIndex(polyline)
+        corridor_miles = rule.get("corridor_miles")
+        corridor_miles = SITE_CORRIDOR_MILES if corridor_miles is None else float(corridor_miles)
+        projected = index.project(float(site["lng"]), float(site["lat"]), corridor_miles)
+        if projected is not None:
+            sites.append((projected[0], site))
+    return sites
+
+
+def _rule_candidates(rules, polyline, distance_miles):
+    # (mile, type, rule index, site or None) for every stop the rules place
+    # along the route; intervals stop short of the destination.
+    candidates = []
+    for rule_index, rule in enumerate(rules):
+        stop_type = rule["type"]
+        if "sites" in rule:
+            candidates.extend(
+                (mile, stop_type, rule_index, site)
+                for mile, site in _site_miles(rule, polyline)
+                if 0 <= mile <= distance_miles
+            )
+            continue
+        interval = float(rule["interval_miles"])
+        target = interval
+        while target < distance_miles:
+            candidates.append((target, stop_type, rule_index, None))
+            target += interval
+    return candidates
+
+
+def _points_at_distances(polyline, targets):
+    # get_point_at_distance for ascending targets in one walk of the polyline
+    # (same arithmetic as its scan, so the points are identical).
+    cumulative = getattr(polyline, "cumulative_miles", None)
+    if cumulative is not None:
+        return [get_point_at_distance(polyline, target) for target in targets]
+
+    points = []
+    idx = 0
+    accumulated = 0.0
+    segment_miles = _haversine_miles(polyline[0], polyline[1]) if len(polyline) > 1 else 0.0
+    for target in targets:
+        if target <= 0:
+            points.append(polyline[0])
+            continue
+        while idx < len(polyline) - 1 and not (target <= accumulated + segment_miles and segment_miles > 0):
+            accumulated += segment_miles
+            idx += 1
+            if idx < len(polyline) - 1:
+                segment_miles = _haversine_miles(polyline[idx], polyline[idx + 1])
+        if idx >= len(polyline) - 1:
+            points.append(polyline[-1])
+        else:
+            ratio = (target - accumulated) / segment_miles
+            points.append(_interpolate_point(polyline[idx], polyline[idx + 1], ratio))
+    return points
+
+
+def _merge_absorbed(stops, hosts):
+    # One sweep in route order: each host takes the nearest not-yet-absorbed
+    # stop of its `absorbs` type within its radius (earlier stop on ties).
+    # Stops are sorted by mile, so each host rule keeps a forward-only cursor
+    # into the absorbable stops. Returns {absorbed index: host index}.
+    by_type = {}
+    for idx, stop in enumerate(stops):
+        if stop.get("mile") is not None:
+            by_type.setdefault(stop["type"], []).append(idx)
+
+    absorbed = {}
+    cursors = {}
+    for host_idx, rule in hosts:
+        candidates = by_type.get(rule["absorbs"], [])
+        within = float(rule.get("absorb_within_miles", MERGE_WITHIN_MILES))
+        host_mile = float(stops[host_idx]["mile"])
+        cursor = cursors.get(id(rule), 0)
+        while cursor < len(candidates) and float(stops[candidates[cursor]]["mile"]) < host_mile - within:
+            cursor += 1
+        cursors[id(rule)] = cursor
+
+        match_idx = None
+        match_delta = None
+        for pos in range(cursor, len(candidates)):
+            idx = candidates[pos]
+            mile = float(stops[idx]["mile"])
+            if mile > host_mile + within:
+                break
+            if idx in absorbed:
+                continue
+            delta = abs(mile - host_mile)
+            if delta <= within and (match_delta is None or delta < match_delta):
+                match_idx = idx
+                match_delta = delta
+
+        if match_idx is not None:
+            absorbed[match_idx] = host_idx
+            stops[host_idx].update(rule.get("combined", {}))
+    return absorbed
+
+
+def plan_stops(route, pickup, dropoff, fuel_stops=None, rules=None):
+    # Stops come from `rules` (DEFAULT_STOP_RULES unless a carrier configures
+    # its own). `fuel_stops` (from utils.fuel_planner) replace the fuel
+    # interval and are merged with breaks like interval fuel stops.
     polyline = route.get("polyline") if isinstance(route, dict) else None
     distance_miles = float(route.get("distance_miles", 0) or 0) if isinstance(route, dict) else 0
 
@@ -142,24 +371,24 @@ def plan_stops(route, pickup, dropoff):
             )
         return stops
 
-    interval_targets = []
-
-    next_break = BREAK_INTERVAL_MILES
-    while next_break < distance_miles:
-        interval_targets.append((next_break, "break"))
-        next_break += BREAK_INTERVAL_MILES
-
-    next_fuel = FUEL_INTERVAL_MILES
-    while next_fuel < distance_miles:
-        interval_targets.append((next_fuel, "fuel"))
-        next_fuel += FUEL_INTERVAL_MILES
-
-    interval_targets.sort(key=lambda item: (item[0], item[1]))
-
-    for target_miles, stop_type in interval_targets:
-        point = get_point_at_distance(polyline, target_miles)
+    rules = list(DEFAULT_STOP_RULES if rules is None else rules)
+    if fuel_stops is not None:
+        # Planned fuel purchases take the place of the fuel interval.
+        fuel_rule = next((rule for rule in rules if rule["type"] == "fuel"), DEFAULT_STOP_RULES[1])
+        rules = [rule for rule in rules if rule["type"] != "fuel"]
+        rules.append({**{k: v for k, v in fuel_rule.items() if k != "interval_miles"}, "sites": fuel_stops})
+
+    candidates = _rule_candidates(rules, polyline, distance_miles)
+    candidates.sort(key=lambda item: (item[0], item[1]))
+    points = _points_at_distances(polyline, [item[0] for item in candidates])
+    hosts = []
+    for (target_miles, stop_type, rule_index, site), point in zip(candidates, points):
+        rule = rules[rule_index]
+        if site is not None and site.get("lng") is not None and site.get("lat") is not None:
+            point = (site["lng"], site["lat"])
         if not point:
             continue
+        added = len(stops)
         _add_stop(
             stops,
             seen_coords,
@@ -167,47 +396,22 @@ def plan_stops(route, pickup, dropoff):
             point[0],
             point[1],
             mile=target_miles,
-            eld_required=(stop_type == "break"),
-            allow_duplicate=False,
+            eld_required=bool(rule.get("eld_required")),
+            allow_duplicate=site is not None,
         )
-
-    # Merge break stops into nearby fuel stops (within +/-10 miles).
-    fuel_indices = [
-        idx
-        for idx, stop in enumerate(stops)
-        if stop.get("type") == "fuel" and stop.get("mile") is not None
-    ]
-    break_indices = [
-        idx
-        for idx, stop in enumerate(stops)
-        if stop.get("type") == "break" and stop.get("mile") is not None
-    ]
-    merged_break_indices = set()
-
-    for fuel_idx in fuel_indices:
-        fuel_stop = stops[fuel_idx]
-        fuel_mile = float(fuel_stop.get("mile"))
-
-        match_idx = None
-        match_delta = None
-        for break_idx in break_indices:
-            if break_idx in merged_break_indices:
-                continue
-            break_mile = float(stops[break_idx].get("mile"))
-            delta = abs(break_mile - fuel_mile)
-            if delta <= 10 and (match_delta is None or delta < match_delta):
-                match_idx = break_idx
-                match_delta = delta
-
-        if match_idx is not None:
-            merged_break_indices.add(match_idx)
-            fuel_stop["combined_break"] = True
-            fuel_stop["reason"] = "Fuel + 30-min break"
-            fuel_stop["duration_minutes"] = 45
-            fuel_stop["eld_required"] = True
-
-    if merged_break_indices:
-        stops = [stop for idx, stop in enumerate(stops) if idx not in merged_break_indices]
+        if len(stops) == added:
+            continue
+        extras = {key: value for key, value in rule.items() if key not in RULE_CONTROL_KEYS}
+        extras.update(site or {})
+        stops[-1].update({key: value for key, value in extras.items() if key not in stops[-1]})
+        if rule.get("absorbs"):
+            hosts.append((len(stops) - 1, rule))
+
+    absorbed = _merge_absorbed(stops, hosts)
+    hosts_used = set(absorbed.values())
+    dropped = set(absorbed) | {idx for idx, rule in hosts if rule.get("optional") and idx not in hosts_used}
+    if dropped:
+        stops = [stop for idx, stop in enumerate(stops) if idx not in dropped]
 
     if dropoff_coord:
         _add_stop(